@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Cached file responses go stale whenever a file row is saved or deleted
+        from django.db.models.signals import post_delete, post_save
+        from .models import FileUpload
+        from .services.response_cache import invalidate_on_change
+        post_save.connect(invalidate_on_change, sender=FileUpload, dispatch_uid='file-responses')
+        post_delete.connect(invalidate_on_change, sender=FileUpload, dispatch_uid='file-responses-delete')
+
+        # Build the shared S3 client when the worker starts instead of on
+        # the first request that needs it
+        if settings.AWS_S3_PREWARM_CLIENT:
+            from .services.s3 import get_s3_client
+            try:
+                get_s3_client()
+            except Exception as e:
+                logger.warning(f"Could not pre-warm S3 client: {str(e)}")
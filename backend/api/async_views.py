@@ -0,0 +1,131 @@
+# api/async_views.py
+from asgiref.sync import sync_to_async
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.request import Request
+import logging
+
+from .models import FileUpload
+from .serializers import FileUploadSerializer, FileUploadListSerializer
+from .services.file_service import FileService
+from .exceptions import FileValidationError, StorageError, QueryParameterError
+from .upload_handlers import ValidatingUploadHandler
+from .utils.filters import FileFilter
+from .utils.pagination import KeysetPagination
+from .utils.response import create_json_response
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFileView(View):
+    """
+    Base for the native async file endpoints served under ASGI.
+
+    DRF views are synchronous, and Django runs every sync view of a process
+    on one shared thread under ASGI, so a request waiting on S3 blocks all
+    the others. These views never block the event loop: the ORM is used
+    through Django's async API, transactional steps run on Django's
+    thread-sensitive executor and S3 calls on the bounded S3 pool.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.file_service = FileService()
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncFileListView(AsyncFileView):
+    """GET lists files one keyset page at a time, POST uploads one file."""
+
+    async def get(self, request):
+        """List files, one keyset page at a time"""
+        try:
+            fields = FileUploadListSerializer.parse_fields(request.GET.get('fields'))
+            columns = FileUploadListSerializer.ordered_fields(fields)
+            paginator = KeysetPagination()
+            drf_request = Request(request)
+            key_field = paginator.get_ordering(drf_request).lstrip('-')
+            queryset = FileFilter.from_query_params(request.GET).filter_queryset(
+                FileUpload.objects.committed()
+            ).values(*dict.fromkeys([*columns, 'id', key_field]))
+            page = await paginator.apaginate_queryset(queryset, drf_request)
+            return create_json_response(
+                data=FileUploadListSerializer.from_values(page, fields),
+                message="Files retrieved successfully",
+                pagination=paginator.get_pagination_data()
+            )
+        except QueryParameterError as e:
+            return create_json_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error listing files: {str(e)}")
+            return create_json_response(
+                error="Failed to retrieve files",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def post(self, request):
+        """Handle file upload"""
+        try:
+            request.upload_handlers = [ValidatingUploadHandler(request)]
+            # Parsing runs the validating handler over the whole body
+            files = await sync_to_async(lambda: request.FILES, thread_sensitive=False)()
+            if 'file' not in files:
+                return create_json_response(
+                    error="No file provided",
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            file_upload = await self.file_service.acreate_file(files['file'])
+            return create_json_response(
+                data=FileUploadSerializer(file_upload).data,
+                message="File uploaded successfully",
+                status=status.HTTP_201_CREATED
+            )
+
+        except FileValidationError as e:
+            return create_json_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except StorageError as e:
+            return create_json_response(
+                error=str(e),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during file upload: {str(e)}")
+            return create_json_response(
+                error="An unexpected error occurred",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncFileDetailView(AsyncFileView):
+    """DELETE removes one file; its S3 object goes through the deletion outbox."""
+
+    async def delete(self, request, pk):
+        """Delete file"""
+        try:
+            file_upload = await FileUpload.objects.committed().aget(pk=pk)
+            await self.file_service.adelete_file(file_upload)
+            return create_json_response(
+                message="File deleted successfully",
+                status=status.HTTP_204_NO_CONTENT
+            )
+        except FileUpload.DoesNotExist:
+            return create_json_response(
+                error="File not found",
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error deleting file: {str(e)}")
+            return create_json_response(
+                error="Failed to delete file",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
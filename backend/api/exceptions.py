@@ -2,6 +2,29 @@ class FileValidationError(Exception):
     """Raised when file validation fails"""
     pass
 
+class SuspiciousContentError(FileValidationError):
+    """Raised when the content scanner flags a file"""
+    def __init__(self, message, rules=()):
+        super().__init__(message)
+        self.rules = tuple(rules)
+
 class StorageError(Exception):
     """Raised when storage operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+class ObjectNotFoundError(Exception):
+    """Raised when a stored object does not exist"""
+    pass
+
+class QueryParameterError(Exception):
+    """Raised when a query string parameter is invalid"""
+    pass
+
+class PaginationError(QueryParameterError):
+    """Raised when a pagination cursor or page size is invalid"""
+    pass
+class RangeNotSatisfiableError(Exception):
+    """Raised when a requested byte range starts past the end of a file"""
+    def __init__(self, message, size=None):
+        super().__init__(message)
+        self.size = size
@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.outbox import DeletionWorker
+from api.services.s3 import DELETE_OBJECTS_MAX_KEYS
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deletes queued S3 objects in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETE_OBJECTS_MAX_KEYS,
+            help=f"Keys per DeleteObjects call (at most {DELETE_OBJECTS_MAX_KEYS})"
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Drain what is due now and exit instead of polling"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help="Seconds to sleep when nothing is due"
+        )
+
+    def handle(self, *args, **options):
+        worker = DeletionWorker(batch_size=options['batch_size'])
+        if options['once']:
+            handled = worker.drain()
+            self.stdout.write(self.style.SUCCESS(f"Processed {handled} queued deletions"))
+            return
+
+        self.stdout.write("Processing queued deletions, press Ctrl+C to stop")
+        try:
+            while True:
+                try:
+                    handled = worker.process_batch()
+                except Exception as e:
+                    # E.g. the database is briefly unreachable; keep polling
+                    logger.error(f"Failed to process queued deletions: {e}")
+                    handled = 0
+                if not handled:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
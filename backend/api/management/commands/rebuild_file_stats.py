@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.services.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the file stats counters from the committed files, "
+        "e.g. after files were changed outside the API."
+    )
+
+    def handle(self, *args, **options):
+        counts = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt file stats: {counts.get('type', 0)} file types "
+            f"and {counts.get('day', 0)} days"
+        ))
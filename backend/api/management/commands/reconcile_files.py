@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api.services.reconciler import Reconciler
+
+
+class Command(BaseCommand):
+    help = (
+        "Cleans up after interrupted uploads: stale pending rows and "
+        "orphaned S3 objects."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-period', type=int, default=None,
+            help="Only touch state older than this many seconds "
+                 "(default: FILE_RECONCILE_GRACE_PERIOD)"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would be cleaned up without changing anything"
+        )
+
+    def handle(self, *args, **options):
+        reconciler = Reconciler(grace_period=options['grace_period'], dry_run=options['dry_run'])
+        counts = reconciler.run()
+        prefix = "Would clean up" if options['dry_run'] else "Cleaned up"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {counts['pending']} pending files "
+            f"and {counts['orphans']} orphaned objects"
+        ))
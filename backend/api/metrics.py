@@ -0,0 +1,121 @@
+# api/metrics.py
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# Stages of the file pipeline, timed where the work happens. content_scan
+# runs inside validate; the other stages never overlap.
+STAGES = ('validate', 'content_scan', 's3_put', 's3_head', 's3_get', 'db_insert', 's3_delete')
+
+# Where /metrics may be scraped from when no METRICS_TOKEN is set
+LOCAL_ADDRESSES = frozenset(('127.0.0.1', '::1'))
+
+# Seconds; S3 calls sit in the 10 ms - 1 s range, scans and inserts below it
+_LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+# Bytes, from tiny JSON bodies to large downloads
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+STAGE_DURATION = Histogram(
+    'file_stage_duration_seconds', 'Time spent in each file pipeline stage', ['stage'],
+    buckets=_LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    'file_stage_errors_total', 'File pipeline stages that raised', ['stage']
+)
+STAGE_BYTES = Counter(
+    'file_stage_bytes_total', 'Bytes moved by S3 stages', ['stage']
+)
+STAGE_ITEMS = Counter(
+    'file_stage_items_total', 'Files or objects handled by each stage', ['stage']
+)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ['method', 'endpoint'],
+    buckets=_LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by endpoint and status', ['method', 'endpoint', 'status']
+)
+REQUEST_SIZE = Histogram(
+    'http_request_size_bytes', 'Request body size by endpoint', ['method', 'endpoint'],
+    buckets=_SIZE_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size by endpoint, as sent', ['method', 'endpoint'],
+    buckets=_SIZE_BUCKETS
+)
+
+CACHE_REQUESTS = Counter(
+    'file_storage_cache_requests_total', 'Reads from the local disk cache', ['result']
+)
+CACHE_BYTES = Gauge(
+    'file_storage_cache_bytes', 'Bytes held in the local disk cache', multiprocess_mode='livesum'
+)
+
+# Label lookups take a lock, so each stage's children are bound once
+_stage_duration = {stage: STAGE_DURATION.labels(stage) for stage in STAGES}
+_stage_errors = {stage: STAGE_ERRORS.labels(stage) for stage in STAGES}
+_stage_items = {stage: STAGE_ITEMS.labels(stage) for stage in STAGES}
+_stage_bytes = {stage: STAGE_BYTES.labels(stage) for stage in STAGES}
+
+
+@contextmanager
+def observe_stage(stage: str, items: int = 1, size: int = None):
+    """
+    Times the enclosed block as one run of a pipeline stage, and counts
+    it as an error when it raises. items and size (bytes) feed the
+    throughput counters.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        _stage_errors[stage].inc()
+        raise
+    finally:
+        _stage_duration[stage].observe(time.perf_counter() - start)
+    _stage_items[stage].inc(items)
+    if size:
+        _stage_bytes[stage].inc(size)
+
+
+def observe_stage_duration(stage: str, seconds: float) -> None:
+    """Records a stage timed by the caller, such as a scan fed chunk by chunk."""
+    _stage_duration[stage].observe(seconds)
+    _stage_items[stage].inc()
+
+
+def _registry():
+    # Under a multi-process server every worker writes its own files;
+    # they are merged at scrape time
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _may_scrape(request) -> bool:
+    """
+    With METRICS_TOKEN set, requires 'Authorization: Bearer <token>';
+    without it, only scrapes from this host are served.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    return request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES
+
+
+def metrics_view(request):
+    """Exposes every metric in the Prometheus text format."""
+    if not _may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
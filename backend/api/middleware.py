@@ -0,0 +1,125 @@
+# api/middleware.py
+import gzip
+import re
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import REQUEST_DURATION, REQUEST_SIZE, REQUESTS, RESPONSE_SIZE
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+_ACCEPT_ENCODING_ITEM = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+# Methods recorded under their own name; any other is labelled 'other',
+# so clients cannot create time series by inventing methods
+METRIC_METHODS = frozenset(('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'))
+
+
+def accepted_encodings(header: str) -> dict:
+    """Parses Accept-Encoding into {coding: q}, dropping malformed items."""
+    accepted = {}
+    for item in header.split(','):
+        match = _ACCEPT_ENCODING_ITEM.fullmatch(item)
+        if not match:
+            continue
+        try:
+            accepted[match.group(1).lower()] = float(match.group(2) or 1)
+        except ValueError:
+            continue
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses large responses with brotli or gzip, whichever the client
+    prefers (brotli on a tie, when installed).
+
+    Bodies under RESPONSE_COMPRESSION_MIN_SIZE bytes are sent as they are:
+    for small payloads the CPU cost outweighs the bytes saved. Like
+    Django's GZipMiddleware, strong ETags are weakened because the encoded
+    body is no longer byte-identical to the one the ETag was computed for.
+    """
+
+    def __init__(self, get_response):
+        # MiddlewareMixin makes this usable in sync and async stacks alike
+        super().__init__(get_response)
+        self.min_size = settings.RESPONSE_COMPRESSION_MIN_SIZE
+        self.codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def _choose_coding(self, request):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0)
+        best, best_q = None, 0
+        for coding in self.codings:
+            q = accepted.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def _compress(self, coding, content):
+        if coding == 'br':
+            return brotli.compress(content, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+        return gzip.compress(content, compresslevel=settings.RESPONSE_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        # The choice depends on Accept-Encoding even when nothing is compressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_size:
+            return response
+
+        coding = self._choose_coding(request)
+        if coding is None:
+            return response
+        compressed = self._compress(coding, response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Records latency, status and request/response sizes per endpoint.
+
+    Endpoints are labelled by URL name (e.g. 'fileupload-list'), never by
+    path, and unknown methods as 'other', so requests cannot create new
+    time series. Placed first, it
+    times the whole stack and sees response sizes as sent, after
+    compression.
+    """
+
+    def process_request(self, request):
+        request._metrics_start = time.perf_counter()
+
+    def process_response(self, request, response):
+        start = getattr(request, '_metrics_start', None)
+        if start is None:
+            return response
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name or match.url_name or 'unnamed') if match else 'unmatched'
+        method = request.method if request.method in METRIC_METHODS else 'other'
+
+        REQUEST_DURATION.labels(method, endpoint).observe(time.perf_counter() - start)
+        REQUESTS.labels(method, endpoint, str(response.status_code)).inc()
+        request_size = request.META.get('CONTENT_LENGTH')
+        if request_size and request_size.isdigit():
+            REQUEST_SIZE.labels(method, endpoint).observe(int(request_size))
+        if not response.streaming:
+            RESPONSE_SIZE.labels(method, endpoint).observe(len(response.content))
+        elif response.has_header('Content-Length'):
+            RESPONSE_SIZE.labels(method, endpoint).observe(int(response['Content-Length']))
+        return response
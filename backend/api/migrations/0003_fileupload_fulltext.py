@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE api_fileupload_fts "
+            "USING fts5(name, content, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_fileupload_fts (rowid, name, content) "
+            "SELECT id, name, content FROM api_fileupload"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE api_fileupload "
+            "ADD FULLTEXT INDEX api_fileupload_fulltext (name, content)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS api_fileupload_fts")
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE api_fileupload DROP INDEX api_fileupload_fulltext"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_fileupload_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_fileupload_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('s3_etag', models.CharField(max_length=100, null=True)),
+                ('s3_version_id', models.CharField(max_length=100, null=True)),
+                ('s3_metadata', models.JSONField(default=dict)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='content_hash',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_content_dedup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('committed', 'Committed')], default='committed', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'last_modified'], name='api_fileupl_status_4733b3_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_fileupload_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
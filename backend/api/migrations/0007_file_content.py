@@ -0,0 +1,98 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Rows copied per statement, so neither side holds a whole table in memory
+BACKFILL_BATCH_SIZE = 1000
+
+
+def copy_content_to_file_content(apps, schema_editor):
+    """Copies every body into FileContent, walking the ids in batches."""
+    FileUpload = apps.get_model('api', 'FileUpload')
+    FileContent = apps.get_model('api', 'FileContent')
+    last_id = 0
+    while True:
+        batch = list(
+            FileUpload.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'content')[:BACKFILL_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        FileContent.objects.bulk_create(
+            [FileContent(file_id=file_id, text=content) for file_id, content in batch],
+            ignore_conflicts=True
+        )
+        last_id = batch[-1][0]
+
+
+def copy_file_content_back(apps, schema_editor):
+    FileUpload = apps.get_model('api', 'FileUpload')
+    FileContent = apps.get_model('api', 'FileContent')
+    last_id = 0
+    while True:
+        batch = list(
+            FileContent.objects.filter(file_id__gt=last_id)
+            .order_by('file_id')
+            .values_list('file_id', 'text')[:BACKFILL_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        FileUpload.objects.bulk_update(
+            [FileUpload(id=file_id, content=text) for file_id, text in batch], ['content']
+        )
+        last_id = batch[-1][0]
+
+
+def move_fulltext_index(apps, schema_editor):
+    """On MySQL, indexes name and the bodies in their new tables."""
+    if schema_editor.connection.vendor != 'mysql':
+        # The SQLite FTS5 table keeps its own copy of the bodies
+        return
+    schema_editor.execute("ALTER TABLE api_fileupload DROP INDEX api_fileupload_fulltext")
+    schema_editor.execute(
+        "ALTER TABLE api_fileupload ADD FULLTEXT INDEX api_fileupload_name_fulltext (name)"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_filecontent ADD FULLTEXT INDEX api_filecontent_fulltext (text)"
+    )
+
+
+def restore_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute("ALTER TABLE api_filecontent DROP INDEX api_filecontent_fulltext")
+    schema_editor.execute("ALTER TABLE api_fileupload DROP INDEX api_fileupload_name_fulltext")
+    schema_editor.execute(
+        "ALTER TABLE api_fileupload ADD FULLTEXT INDEX api_fileupload_fulltext (name, content)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_object_deletion_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileContent',
+            fields=[
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='file_content', serialize=False, to='api.fileupload')),
+                ('text', models.TextField()),
+            ],
+        ),
+        # A default lets a rollback re-add the column before the bodies are copied back
+        migrations.AlterField(
+            model_name='fileupload',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(copy_content_to_file_content, copy_file_content_back),
+        migrations.RunPython(move_fulltext_index, restore_fulltext_index),
+        migrations.RemoveField(
+            model_name='fileupload',
+            name='content',
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:28
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_stats(apps, schema_editor):
+    """Counts the files that exist already, as rebuild_file_stats does."""
+    FileUpload = apps.get_model('api', 'FileUpload')
+    FileStat = apps.get_model('api', 'FileStat')
+    committed = FileUpload.objects.filter(status='committed').order_by()
+    total = committed.aggregate(count=Count('id'), size=Sum('size'))
+    rows = [FileStat(
+        dimension='total', key='', file_count=total['count'], total_bytes=round((total['size'] or 0) * 1024)
+    )]
+    groups = [
+        ('type', committed.values_list('file_type')),
+        ('day', committed.annotate(day=TruncDate('uploaded_at')).values_list('day')),
+    ]
+    for dimension, grouped in groups:
+        for key, count, size in grouped.annotate(count=Count('id'), size=Sum('size')):
+            rows.append(FileStat(
+                dimension=dimension,
+                key=key.isoformat() if dimension == 'day' else (key or ''),
+                file_count=count,
+                total_bytes=round(size * 1024)
+            ))
+    FileStat.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_file_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('type', 'Type'), ('day', 'Day')], max_length=8)),
+                ('key', models.CharField(blank=True, default='', max_length=50)),
+                ('file_count', models.BigIntegerField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='api_filestat_dimension_key')],
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
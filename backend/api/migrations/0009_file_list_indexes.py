@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_file_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'uploaded_at', 'id'], name='fileupload_list_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'name', 'id'], name='fileupload_list_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'size', 'id'], name='fileupload_list_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'file_type', 'uploaded_at', 'id'], name='fileupload_list_type_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='fileupload',
+            name='api_fileupl_name_72a980_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='fileupload',
+            name='api_fileupl_uploade_64f99a_idx',
+        ),
+    ]
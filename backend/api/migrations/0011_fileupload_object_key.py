@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+# Rows updated per statement, so the backfill never holds the whole table in memory
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_object_key(apps, schema_editor):
+    """Copies the last segment of every s3_url into object_key, walking the ids in batches."""
+    FileUpload = apps.get_model('api', 'FileUpload')
+    last_id = 0
+    while True:
+        batch = list(
+            FileUpload.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 's3_url')[:BACKFILL_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        FileUpload.objects.bulk_update(
+            [FileUpload(id=file_id, object_key=(s3_url or '').split('/')[-1]) for file_id, s3_url in batch],
+            ['object_key']
+        )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_finalized_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileupload',
+            name='object_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_object_key, migrations.RunPython.noop),
+    ]
@@ -1,23 +1,206 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
+
+
+def object_key_from_url(s3_url: str) -> str:
+    """The S3 key of an object URL stored on FileUpload.s3_url."""
+    return (s3_url or '').split('/')[-1]
+
+
+class FileUploadQuerySet(models.QuerySet):
+    def committed(self):
+        """Files whose S3 object is in place; the only ones clients see."""
+        return self.filter(status=FileUpload.Status.COMMITTED)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Also inserts the FileContent rows of the new files."""
+        for obj in objs:
+            obj.sync_object_key()
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            bodies = [obj for obj in objs if obj._content_changed]
+            if any(obj.pk is None for obj in bodies):
+                raise ValueError(
+                    "bulk_create cannot store file content on a backend that does not return ids"
+                )
+            FileContent.objects.using(self.db).bulk_create(
+                [FileContent(file=obj, text=obj._content) for obj in bodies],
+                batch_size=kwargs.get('batch_size')
+            )
+            for obj in bodies:
+                obj._content_changed = False
+        return objs
+
 
 class FileUpload(models.Model):
+    class Status(models.TextChoices):
+        # Row inserted, S3 upload not finished yet
+        PENDING = 'pending'
+        COMMITTED = 'committed'
+
     name = models.CharField(max_length=255)
     size = models.FloatField() 
-    content = models.TextField()  
     file_type = models.CharField(max_length=50)
     s3_url = models.URLField(max_length=1000)
+    # Last segment of s3_url, kept in step with it on save so the S3
+    # object of any row, legacy ones included, is an index lookup away
+    object_key = models.CharField(max_length=255, blank=True, default='', db_index=True)
     s3_etag = models.CharField(max_length=100, null=True)
     s3_version_id = models.CharField(max_length=100, null=True)
     s3_metadata = models.JSONField(default=dict)
+    # SHA-256 of the file bytes; files with the same hash share one S3 object.
+    # Null for files stored before deduplication, which own their object.
+    content_hash = models.CharField(max_length=64, null=True, db_index=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.COMMITTED)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
+
+    objects = FileUploadQuerySet.as_manager()
     
     class Meta:
         ordering = ['-uploaded_at']
         indexes = [
-            models.Index(fields=['name']),
-            models.Index(fields=['uploaded_at']),
+            # File list: one per ordering, led by the committed filter and
+            # ending in the id tie-breaker, so a keyset page is an index
+            # range read in order. Range filters on the sort field (name
+            # prefix, size, upload date) narrow the same range.
+            models.Index(fields=['status', 'uploaded_at', 'id'], name='fileupload_list_uploaded_idx'),
+            models.Index(fields=['status', 'name', 'id'], name='fileupload_list_name_idx'),
+            models.Index(fields=['status', 'size', 'id'], name='fileupload_list_size_idx'),
+            # A file_type filter under the default ordering
+            models.Index(fields=['status', 'file_type', 'uploaded_at', 'id'], name='fileupload_list_type_idx'),
+            # The reconciler sweeps rows stuck pending
+            models.Index(fields=['status', 'last_modified']),
+        ]
+
+    # File body, kept in FileContent so metadata scans never read it
+    _content = None
+    _content_changed = False
+
+    def __str__(self):
+        return f"{self.name} ({self.size}KB)"
+
+    @property
+    def content(self) -> str:
+        """The file body, loaded from FileContent on first access."""
+        if self._content is None:
+            try:
+                self._content = self.file_content.text
+            except FileContent.DoesNotExist:
+                self._content = ''
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self._content_changed = True
+
+    def sync_object_key(self) -> None:
+        """Sets object_key from s3_url."""
+        self.object_key = object_key_from_url(self.s3_url)
+
+    def save(self, *args, **kwargs):
+        self.sync_object_key()
+        if not self._content_changed:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            if adding:
+                FileContent.objects.using(using).create(file=self, text=self._content)
+            else:
+                FileContent.objects.using(using).update_or_create(
+                    file=self, defaults={'text': self._content}
+                )
+        self._content_changed = False
+
+
+class FileContent(models.Model):
+    """
+    Body of a FileUpload, one-to-one with it. Kept out of the FileUpload
+    table so list queries, index scans and metadata backups never read
+    file bodies.
+    """
+    file = models.OneToOneField(
+        FileUpload, on_delete=models.CASCADE, primary_key=True, related_name='file_content'
+    )
+    text = models.TextField()
+
+    def __str__(self):
+        return f"Content of file {self.file_id}"
+
+
+class StoredObject(models.Model):
+    """
+    An S3 object holding content shared by every FileUpload with the same
+    content_hash. ref_count is the number of those rows; the object is
+    deleted from S3 when it drops to zero.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    key = models.CharField(max_length=255, unique=True)
+    s3_etag = models.CharField(max_length=100, null=True)
+    s3_version_id = models.CharField(max_length=100, null=True)
+    s3_metadata = models.JSONField(default=dict)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.ref_count} refs)"
+
+
+class ObjectDeletion(models.Model):
+    """
+    Outbox entry for an S3 object to delete. Written in the same
+    transaction that drops the object's last reference, and drained
+    asynchronously by the process_deletions command.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Not picked up before this time: retry backoff, or a worker's lease
+    available_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.attempts} attempts)"
+
+
+class FinalizedUpload(models.Model):
+    """
+    Key of a direct upload that was finalized. The unique key lets each
+    upload token create at most one FileUpload, even when it is finalized
+    concurrently. Kept until the token has expired.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class FileStat(models.Model):
+    """
+    Running totals over committed files: one row for all files, one per
+    file type and one per upload day. FileService adjusts them in the
+    transaction that adds or removes files, so reading them never scans
+    FileUpload. rebuild_file_stats recomputes them from scratch.
+    """
+    class Dimension(models.TextChoices):
+        TOTAL = 'total'
+        TYPE = 'type'
+        DAY = 'day'
+
+    dimension = models.CharField(max_length=8, choices=Dimension.choices)
+    # '' for the total, the file type, or the day as YYYY-MM-DD
+    key = models.CharField(max_length=50, blank=True, default='')
+    file_count = models.BigIntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='api_filestat_dimension_key'),
         ]
 
     def __str__(self):
-        return f"{self.name} ({self.size}KB)"
\ No newline at end of file
+        return f"{self.dimension} {self.key}: {self.file_count} files, {self.total_bytes} bytes"
@@ -0,0 +1,190 @@
+# api/profiling.py
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# The profile of the request being handled, if it is sampled. S3 hooks and
+# SQL wrappers read it, so unsampled requests only pay for this lookup.
+_current_profile = ContextVar('request_profile', default=None)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+# Functions listed in a report, by cumulative time
+REPORT_TOP_FUNCTIONS = 30
+
+
+class RequestProfile:
+    """
+    Everything recorded for one sampled request: a cProfile CPU profile,
+    each SQL query and each S3 API call with its duration.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.cpu = cProfile.Profile()
+        self.queries = []
+        self.s3_calls = []
+        self.duration = None
+        self._stack = None
+        self._token = None
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': (time.perf_counter() - start) * 1000,
+                'many': many,
+                'database': context['connection'].alias
+            })
+
+    def record_s3_call(self, operation, seconds, error=None):
+        self.s3_calls.append({'operation': operation, 'ms': seconds * 1000, 'error': error})
+
+    def __enter__(self):
+        self._token = _current_profile.set(self)
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record_query))
+        self._start = time.perf_counter()
+        try:
+            self.cpu.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; a
+            # request sampled concurrently goes without a CPU profile
+            self.cpu = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.cpu is not None:
+            self.cpu.disable()
+        self.duration = time.perf_counter() - self._start
+        self._stack.close()
+        _current_profile.reset(self._token)
+        return False
+
+    def summary(self):
+        """Totals in milliseconds, as {name: (duration, description)}."""
+        cpu = pstats.Stats(self.cpu).total_tt if self.cpu is not None else 0
+        return {
+            'total': (self.duration * 1000, None),
+            'cpu': (cpu * 1000, None),
+            'sql': (sum(q['ms'] for q in self.queries), f"{len(self.queries)} queries"),
+            's3': (sum(c['ms'] for c in self.s3_calls), f"{len(self.s3_calls)} calls"),
+        }
+
+    def server_timing(self):
+        """The summary as a Server-Timing header value, shown by browser devtools."""
+        metrics = []
+        for name, (duration, description) in self.summary().items():
+            metric = f"{name};dur={duration:.1f}"
+            if description:
+                metric += f';desc="{description}"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+    def write(self, directory, request, response):
+        """Writes <id>.prof (load with pstats or snakeviz) and <id>.json."""
+        os.makedirs(directory, exist_ok=True)
+        top = io.StringIO()
+        if self.cpu is not None:
+            self.cpu.dump_stats(os.path.join(directory, f"{self.id}.prof"))
+            pstats.Stats(self.cpu, stream=top).sort_stats('cumulative').print_stats(REPORT_TOP_FUNCTIONS)
+        report = {
+            'id': self.id,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'summary': {name: round(duration, 3) for name, (duration, _) in self.summary().items()},
+            'queries': self.queries,
+            's3_calls': self.s3_calls,
+            'cpu_top': top.getvalue(),
+        }
+        with open(os.path.join(directory, f"{self.id}.json"), 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+def _before_s3_call(model, context, **kwargs):
+    if _current_profile.get() is not None:
+        context['profile_operation'] = model.name
+        context['profile_start'] = time.perf_counter()
+
+
+def _after_s3_call(context, exception=None, **kwargs):
+    profile = _current_profile.get()
+    start = context.get('profile_start')
+    if profile is None or start is None:
+        return
+    error = f"{type(exception).__name__}: {exception}" if exception is not None else None
+    if error is None:
+        # Service errors (4xx/5xx) come back parsed, not raised
+        code = (kwargs.get('parsed') or {}).get('Error', {}).get('Code')
+        error = code or None
+    profile.record_s3_call(context['profile_operation'], time.perf_counter() - start, error)
+
+
+def instrument_s3_client(client):
+    """
+    Hooks a boto3 client so calls made while a request is profiled are
+    recorded. Calls made on threads the request's context was not copied
+    to, such as the transfer manager's part uploads, are not seen.
+    """
+    events = client.meta.events
+    # Emitted for every call; before-call handlers can short-circuit each other
+    events.register('before-parameter-build.s3', _before_s3_call)
+    events.register('after-call.s3', _after_s3_call)
+    events.register('after-call-error.s3', _after_s3_call)
+    return client
+
+
+class ProfilerMiddleware:
+    """
+    Profiles requests that carry X-Profile with PROFILER_TOKEN, plus a
+    PROFILER_SAMPLE_RATE fraction of all others. A profiled response gets
+    a Server-Timing summary and an X-Profile-Id; with PROFILER_OUTPUT_DIR
+    set, the full report is written there under that id.
+
+    Not loaded at all unless PROFILER_ENABLED is set. cProfile follows a
+    single thread, so this middleware is sync only.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.token = settings.PROFILER_TOKEN
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        self.output_dir = settings.PROFILER_OUTPUT_DIR
+
+    def _should_profile(self, request):
+        header = request.META.get(PROFILE_HEADER)
+        if header and self.token and hmac.compare_digest(header.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+
+        with RequestProfile() as profile:
+            response = self.get_response(request)
+        response['Server-Timing'] = profile.server_timing()
+        response['X-Profile-Id'] = profile.id
+        if self.output_dir:
+            profile.write(self.output_dir, request, response)
+        return response
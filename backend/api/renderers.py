@@ -0,0 +1,37 @@
+# api/renderers.py
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Datetimes go through DRF's encoder too, so they are formatted exactly
+# as JSONRenderer formats them
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """Encodes data to compact UTF-8 JSON, falling back to DRF's encoder for other types."""
+    ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # Escaped by JSONRenderer too: valid JSON, but not valid JavaScript
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    Output matches JSONRenderer's defaults (compact separators, unescaped
+    unicode) byte for byte for the types serializers produce, at a fraction
+    of the CPU cost on large listings.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
@@ -1,8 +1,12 @@
 # api/serializers.py
 from rest_framework import serializers
+from .exceptions import QueryParameterError
 from .models import FileUpload
 
 class FileUploadSerializer(serializers.ModelSerializer):
+    # Stored in FileContent; the model exposes it as a property
+    content = serializers.CharField(allow_blank=True)
+
     class Meta:
         model = FileUpload
         fields = [
@@ -15,10 +19,11 @@ class FileUploadSerializer(serializers.ModelSerializer):
             's3_etag',
             's3_version_id',
             's3_metadata',
+            'content_hash',
             'uploaded_at',
             'last_modified'
         ]
-        read_only_fields = ['uploaded_at', 'last_modified']
+        read_only_fields = ['content_hash', 'uploaded_at', 'last_modified']
 
     def validate(self, data):
         # Validate file size (0.5KB to 2KB)
@@ -33,4 +38,94 @@ class FileUploadSerializer(serializers.ModelSerializer):
                 "file_type": "Only text files are allowed"
             })
         
-        return data
\ No newline at end of file
+        return data
+
+
+class FileUploadListSerializer(serializers.ModelSerializer):
+    """
+    Lightweight representation for listings: metadata only, no file body.
+    Pass `fields` to serialize only a subset of the columns.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    # DRF fields whose to_representation only re-applies the Python type
+    # the database already returns
+    PASSTHROUGH_FIELDS = (
+        serializers.CharField,
+        serializers.IntegerField,
+        serializers.FloatField,
+        serializers.BooleanField,
+        serializers.JSONField,
+    )
+
+    @classmethod
+    def ordered_fields(cls, fields=None):
+        """The serialized columns in representation order."""
+        return [field for field in cls.Meta.fields if fields is None or field in fields]
+
+    @classmethod
+    def from_values(cls, rows, fields=None):
+        """
+        Serializes .values() rows straight to dicts, without building model
+        instances or running every field. Only fields that really transform
+        their value (the datetimes) are called, so the output is identical
+        to serializing the instances.
+        """
+        columns = cls.ordered_fields(fields)
+        serializer_fields = cls(fields=columns).fields
+        for field in serializer_fields.values():
+            if isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone'):
+                # Resolve the current time zone once, not once per value
+                field.timezone = field.default_timezone()
+        converters = [
+            (column, serializer_fields[column].to_representation)
+            for column in columns
+            if not isinstance(serializer_fields[column], cls.PASSTHROUGH_FIELDS)
+        ]
+
+        data = []
+        for row in rows:
+            item = {column: row[column] for column in columns}
+            for column, to_representation in converters:
+                if item[column] is not None:
+                    item[column] = to_representation(item[column])
+            data.append(item)
+        return data
+
+    @classmethod
+    def parse_fields(cls, raw):
+        """
+        Parses a sparse fieldset such as 'a,b,c'.
+        Returns None when every field is wanted.
+        """
+        if not raw:
+            return None
+
+        fields = [field.strip() for field in raw.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in cls.Meta.fields]
+        if unknown:
+            raise QueryParameterError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+
+    class Meta:
+        model = FileUpload
+        fields = [
+            'id',
+            'name',
+            'size',
+            'file_type',
+            's3_url',
+            's3_etag',
+            's3_version_id',
+            's3_metadata',
+            'content_hash',
+            'uploaded_at',
+            'last_modified'
+        ]
+        read_only_fields = fields
\ No newline at end of file
@@ -0,0 +1,205 @@
+# api/services/content_scanner.py
+import re
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+ScanRule = namedtuple('ScanRule', ['name', 'category', 'regex', 'anchor'])
+ScanResult = namedtuple('ScanResult', ['category', 'rules', 'position'])
+
+# Characters that are matched literally when they appear outside a class
+_LITERAL_PREFIX = re.compile(r'[A-Za-z0-9_<>:;,/=-]+')
+
+
+def literal_prefix(pattern: str) -> str:
+    """
+    Returns the literal text every match of `pattern` must start with,
+    e.g. 'UNION' for r'UNION\\s+SELECT'.
+    """
+    match = _LITERAL_PREFIX.match(pattern)
+    prefix = match.group(0) if match else ''
+    # A trailing quantifier makes the last literal character optional
+    if prefix and pattern[len(prefix):len(prefix) + 1] in ('?', '*', '{'):
+        prefix = prefix[:-1]
+    return prefix
+
+
+class ContentScanner:
+    """
+    Single-pass scanner for a fixed set of regex rules.
+
+    Every rule starts with a literal anchor (its keyword). All anchors are
+    compiled into one alternation, so the content is walked once looking
+    for any keyword; the full rule is only tried at the
+    positions where its keyword occurs. Scanning stops as soon as a category
+    reaches its threshold of distinct rules.
+    """
+
+    def __init__(self, rules: Dict[str, Dict[str, str]], flags: Dict[str, int], thresholds: Dict[str, int]):
+        """
+        Args:
+            rules: {category: {rule name: pattern}}
+            flags: {category: re flags for that category's patterns}
+            thresholds: {category: distinct rules needed to reject}
+        """
+        self.thresholds = thresholds
+        compiled = []
+        for category, patterns in rules.items():
+            for name, pattern in patterns.items():
+                anchor = literal_prefix(pattern)
+                if not anchor:
+                    raise ValueError(f"Rule {name} must start with literal text")
+                compiled.append(ScanRule(
+                    name, category,
+                    re.compile(pattern, flags.get(category, 0) | re.IGNORECASE),
+                    anchor.lower()
+                ))
+
+        # Longest anchors first so the alternation reports the longest
+        # keyword at a position; shorter keywords there are its prefixes
+        anchors = sorted({rule.anchor for rule in compiled}, key=len, reverse=True)
+        # Capture groups would disable the regex engine's first-character
+        # prefilter, so the matched keyword text itself selects the rules
+        alternation = '|'.join(re.escape(anchor) for anchor in anchors)
+        # Searching lowercased text with a case-sensitive alternation is
+        # several times faster than an IGNORECASE one; the latter is only
+        # used when lowercasing would shift character offsets
+        self._anchor_regex = re.compile(alternation)
+        self._anchor_regex_ignorecase = re.compile(alternation, re.IGNORECASE)
+        self._rules_by_anchor = {
+            anchor: [rule for rule in compiled if anchor.startswith(rule.anchor)]
+            for anchor in anchors
+        }
+        # Longest keyword each keyword can still grow into, e.g. exec -> execute
+        self._longest_extension = {
+            anchor: max(len(other) for other in anchors if other.startswith(anchor))
+            for anchor in anchors
+        }
+        self.rules = compiled
+        self._holdback = max(len(anchor) for anchor in anchors) - 1
+
+    def _new_state(self) -> Dict[str, List[str]]:
+        return {category: [] for category in self.thresholds}
+
+    def _searcher(self, content: str, lowered: str):
+        """Picks the fast lowercase search unless lowercasing shifted offsets."""
+        if len(lowered) == len(content):
+            return lowered, self._anchor_regex.search
+        return content, self._anchor_regex_ignorecase.search
+
+    def _record(self, rule, offset, fired) -> Optional[ScanResult]:
+        hits = fired[rule.category]
+        hits.append(rule.name)
+        if len(hits) >= self.thresholds[rule.category]:
+            return ScanResult(rule.category, tuple(hits), offset)
+        return None
+
+    def _walk(self, content, haystack, search, position, fired, pending=None, base=0):
+        """
+        Tries the rules at every keyword from `position` on. When `pending`
+        is given the content is still incomplete: keywords that may yet grow
+        are left for later, and rules that do not match yet are recorded in
+        `pending` since more content may still complete them. `content` may
+        be a window of a longer text starting at offset `base`; reported and
+        pending offsets are relative to the whole text.
+        Returns (result, position in `content` to resume from).
+        """
+        while True:
+            keyword = search(haystack, position)
+            if keyword is None:
+                if pending is None:
+                    return None, len(content)
+                # A keyword may be cut off at the end of the buffer
+                return None, max(position, len(content) - self._holdback)
+
+            offset = keyword.start()
+            anchor = keyword.group(0).lower()
+            if pending is not None and offset + self._longest_extension[anchor] > len(content):
+                return None, offset
+
+            for rule in self._rules_by_anchor[anchor]:
+                if rule.name in fired[rule.category]:
+                    continue
+                if rule.regex.match(content, offset):
+                    result = self._record(rule, base + offset, fired)
+                    if result is not None:
+                        return result, offset
+                elif pending is not None:
+                    pending.append((rule, base + offset))
+
+            # Step one character so overlapping keywords are not skipped
+            position = offset + 1
+
+    def scan(self, content: str) -> Optional[ScanResult]:
+        """
+        Scans content and returns the first decisive result, or None if
+        no category reached its threshold.
+        """
+        haystack, search = self._searcher(content, content.lower())
+        result, _ = self._walk(content, haystack, search, 0, self._new_state())
+        return result
+
+    def session(self) -> 'ScanSession':
+        """Starts an incremental scan for content that arrives in chunks."""
+        return ScanSession(self)
+
+
+class ScanSession:
+    """
+    Incremental scan over content fed chunk by chunk.
+
+    A rule that matches the content received so far also matches the whole
+    content, so such hits are reported by feed() right away. Keywords close
+    to the end of the buffer may still grow into a longer keyword, and rules
+    that did not match yet may still be completed by later chunks; both are
+    settled in finish().
+
+    Keywords are searched in a window holding only the not yet scanned tail
+    of the content, at most one keyword long, plus the new chunk. The chunks
+    themselves are kept in a list and joined once, when content is read.
+    """
+
+    def __init__(self, scanner: ContentScanner):
+        self._scanner = scanner
+        self._fired = scanner._new_state()
+        self._pending = []
+        self._chunks = []
+        self._window = ''
+        self._window_start = 0
+
+    @property
+    def content(self) -> str:
+        """All the text fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def _walk(self, window: str, pending=None):
+        haystack, search = self._scanner._searcher(window, window.lower())
+        return self._scanner._walk(
+            window, haystack, search, 0, self._fired, pending, base=self._window_start
+        )
+
+    def feed(self, text: str) -> Optional[ScanResult]:
+        """Adds decoded text; returns a result as soon as one is decisive."""
+        self._chunks.append(text)
+        window = self._window + text
+        result, position = self._walk(window, self._pending)
+        self._window = window[position:]
+        self._window_start += position
+        return result
+
+    def finish(self) -> Optional[ScanResult]:
+        """Scans what is left once all content has arrived."""
+        result, _ = self._walk(self._window)
+        if result is not None:
+            return result
+
+        content = self.content
+        for rule, offset in self._pending:
+            if rule.name in self._fired[rule.category]:
+                continue
+            if rule.regex.match(content, offset):
+                result = self._scanner._record(rule, offset, self._fired)
+                if result is not None:
+                    return result
+        return None
@@ -1,29 +1,47 @@
 # api/services/content_validator.py
 import re
-from typing import List
-from ..exceptions import FileValidationError
+import logging
+from .content_scanner import ContentScanner
+from ..exceptions import SuspiciousContentError
+from ..metrics import observe_stage
+
+logger = logging.getLogger(__name__)
 
 class ContentValidator:
     # Only the most critical SQL injection patterns that shouldn't appear in normal text
-    SQL_KEYWORDS = [
-        r'UNION\s+SELECT',
-        r'INSERT\s+INTO.*VALUES',
-        r'UPDATE.*SET',
-        r'DROP\s+TABLE',
-        r'DELETE\s+FROM',
-        r'EXEC\s*\(',
-        r'EXECUTE\s*\('
-    ]
+    SQL_KEYWORDS = {
+        'union_select': r'UNION\s+SELECT',
+        'insert_values': r'INSERT\s+INTO.*VALUES',
+        'update_set': r'UPDATE.*SET',
+        'drop_table': r'DROP\s+TABLE',
+        'delete_from': r'DELETE\s+FROM',
+        'exec_call': r'EXEC\s*\(',
+        'execute_call': r'EXECUTE\s*\('
+    }
     
     # Only the most dangerous JavaScript/HTML patterns
-    DANGEROUS_PATTERNS = [
-        r'<script[\s>]',           # Script tags
-        r'javascript:.*\(.*\)',    # JavaScript protocol with function calls
-        r'data:text/html;base64,', # Base64 encoded HTML
-        r'onload\s*=',             # Inline event handlers
-        r'onerror\s*=',
-        r'onclick\s*='
-    ]
+    DANGEROUS_PATTERNS = {
+        'script_tag': r'<script[\s>]',                  # Script tags
+        'javascript_call': r'javascript:.*\(.*\)',      # JavaScript protocol with function calls
+        'base64_html': r'data:text/html;base64,',       # Base64 encoded HTML
+        'onload_handler': r'onload\s*=',                # Inline event handlers
+        'onerror_handler': r'onerror\s*=',
+        'onclick_handler': r'onclick\s*='
+    }
+
+    MESSAGES = {
+        # A single SQL command pattern is enough to reject the file
+        'sql': "File content contains multiple SQL command patterns",
+        # Scripts need two distinct patterns, one alone is often harmless
+        'script': "File content contains multiple suspicious script-like patterns"
+    }
+
+    # Compiled once at import and shared by every request
+    SCANNER = ContentScanner(
+        rules={'sql': SQL_KEYWORDS, 'script': DANGEROUS_PATTERNS},
+        flags={'sql': 0, 'script': re.DOTALL},
+        thresholds={'sql': 1, 'script': 2}
+    )
 
     @classmethod
     def validate_content(cls, content: str) -> None:
@@ -35,44 +53,22 @@ class ContentValidator:
             content: The text content to validate
             
         Raises:
-            FileValidationError: If clearly malicious content is detected
+            SuspiciousContentError: If clearly malicious content is detected
         """
-        
-        try:
-            cls._check_sql_injection(content)
-            cls._check_dangerous_patterns(content)
-        except FileValidationError as e:
-            # Add context to the error message
-            raise FileValidationError(
-                f"{str(e)}. If this is a legitimate file, please check for any "
-                "embedded scripts or SQL queries that might trigger this security check."
-            )
-        
-    @classmethod
-    def _check_sql_injection(cls, content: str) -> None:
-        """Check for obvious SQL injection patterns."""
-        # Look for SQL patterns that combine multiple keywords
-        # This reduces false positives for normal text containing SQL terms
-        for pattern in cls.SQL_KEYWORDS:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            if matches:
-                
-                if len(matches) > 0:
-                    raise FileValidationError(
-                        "File content contains multiple SQL command patterns"
-                    )
+        with observe_stage('content_scan'):
+            result = cls.SCANNER.scan(content)
+            if result is not None:
+                cls.reject(result)
 
     @classmethod
-    def _check_dangerous_patterns(cls, content: str) -> None:
-        """Check for clearly dangerous JavaScript/HTML patterns."""
-        dangerous_pattern_count = 0
-        
-        for pattern in cls.DANGEROUS_PATTERNS:
-            if re.search(pattern, content, re.IGNORECASE | re.DOTALL):
-                dangerous_pattern_count += 1
-                
-                # If we find multiple dangerous patterns, it's more likely to be malicious
-                if dangerous_pattern_count > 1:
-                    raise FileValidationError(
-                        "File content contains multiple suspicious script-like patterns"
-                    )
\ No newline at end of file
+    def reject(cls, result) -> None:
+        """Raises the validation error for a decisive scan result."""
+        logger.info(
+            f"Content rejected by rule(s) {', '.join(result.rules)} at offset {result.position}"
+        )
+        # Add context to the error message
+        raise SuspiciousContentError(
+            f"{cls.MESSAGES[result.category]}. If this is a legitimate file, please check for any "
+            "embedded scripts or SQL queries that might trigger this security check.",
+            rules=result.rules
+        )
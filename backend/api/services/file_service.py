@@ -1,19 +1,38 @@
-from django.db import transaction
-from typing import Tuple, Dict, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction, IntegrityError
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Tuple, Dict, Optional, List
 from datetime import datetime
+import hashlib
 import uuid
 import logging
 
-from ..models import FileUpload
-from .s3 import S3Service
-from ..exceptions import FileValidationError, StorageError
+from ..models import FileUpload, FinalizedUpload, StoredObject
+from .s3 import s3_to_async
+from .storage import get_storage
+from .search import get_search_index
+from .stats import record_file, record_files
+from .outbox import enqueue_deletions
+from .response_cache import invalidate_file_responses
+from ..exceptions import FileValidationError, ObjectNotFoundError, StorageError
+from ..metrics import observe_stage
 from .content_validator import ContentValidator
 from ..constants.file_service_constants import FileValidationConstants, ContentValidationMessages
 logger = logging.getLogger(__name__)
 
+PRESIGNED_UPLOAD_SALT = 'api.presigned-upload'
+
 class FileService:
     def __init__(self):
-        self.s3_service = S3Service()
+        self.storage = get_storage()
+        self.search_index = get_search_index()
 
     def _validate_content(self, content: str) -> None:
         """
@@ -45,25 +64,30 @@ class FileService:
             'original_name': s3_metadata.get('original_name')
         }
 
-    def _validate_file(self, file_obj) -> None:
-        """Validates file size, type and extension."""
-        # Validate size
-        if not (FileValidationConstants.MIN_SIZE_BYTES <= file_obj.size <= FileValidationConstants.MAX_SIZE_BYTES):
-            raise FileValidationError(ContentValidationMessages.INVALID_SIZE)
-        
+    @staticmethod
+    def validate_file_metadata(name: str, content_type: str) -> None:
+        """Validates type, extension and filename, which are known before any content."""
         # Validate content type
-        if file_obj.content_type != FileValidationConstants.ALLOWED_CONTENT_TYPE:
+        if content_type != FileValidationConstants.ALLOWED_CONTENT_TYPE:
             raise FileValidationError(ContentValidationMessages.INVALID_TYPE)
         
         # Validate extension
-        extension = file_obj.name.split('.')[-1].lower()
+        extension = name.split('.')[-1].lower()
         if extension not in FileValidationConstants.ALLOWED_EXTENSIONS:
             raise FileValidationError(ContentValidationMessages.INVALID_EXTENSION)
         
         # Validate filename length
-        if len(file_obj.name) > FileValidationConstants.MAX_FILENAME_LENGTH:
+        if len(name) > FileValidationConstants.MAX_FILENAME_LENGTH:
             raise FileValidationError(f"Filename exceeds {FileValidationConstants.MAX_FILENAME_LENGTH} characters")
 
+    def _validate_file(self, file_obj) -> None:
+        """Validates file size, type and extension."""
+        # Validate size
+        if not (FileValidationConstants.MIN_SIZE_BYTES <= file_obj.size <= FileValidationConstants.MAX_SIZE_BYTES):
+            raise FileValidationError(ContentValidationMessages.INVALID_SIZE)
+
+        self.validate_file_metadata(file_obj.name, file_obj.content_type)
+
     def _read_file_content(self, file_obj) -> str:
         """Reads and validates file content."""
         file_obj.seek(0)
@@ -72,80 +96,638 @@ class FileService:
             file_obj.seek(0)
             return content
         except UnicodeDecodeError:
-            raise FileValidationError("File must be UTF-8 encoded")
+            raise FileValidationError(ContentValidationMessages.INVALID_ENCODING)
 
     def _read_and_validate_file_content(self, file_obj) -> str:
         """
         Reads and validates file content.
+        Uploads received through ValidatingUploadHandler were already
+        decoded and scanned while streaming, so their text is reused.
         """
+        validated_text = getattr(file_obj, 'validated_text', None)
+        if validated_text is not None:
+            return validated_text
+
         content = self._read_file_content(file_obj)
         self._validate_content(content)
         return content
     
-    @transaction.atomic
+    def _generate_object_key(self, file_name: str) -> str:
+        """
+        Returns a fresh, collision-free S3 key keeping the file extension.
+        Keys are never reused, so deleting an object cannot race with a new
+        upload of the same content.
+        """
+        file_extension = file_name.split('.')[-1]
+        return f"{uuid.uuid4()}.{file_extension}"
+
+    def _content_hash(self, file_obj) -> str:
+        """SHA-256 of the file bytes; streamed uploads already carry it."""
+        content_hash = getattr(file_obj, 'sha256', None)
+        if content_hash:
+            return content_hash
+
+        digest = hashlib.sha256()
+        for chunk in file_obj.chunks():
+            digest.update(chunk)
+        file_obj.seek(0)
+        return digest.hexdigest()
+
+    def _retain_object(self, content_hash: str, object_key: Optional[str] = None,
+                       s3_metadata: Optional[Dict] = None, count: int = 1) -> Tuple[Optional[StoredObject], bool]:
+        """
+        Adds `count` references to the stored object for content_hash. When
+        there is none yet, the object just uploaded as object_key becomes it.
+        Must run inside a transaction.
+        Returns (stored_object, created); stored_object is None when nothing
+        is stored for the hash and no object_key was given.
+        """
+        stored = StoredObject.objects.select_for_update().filter(content_hash=content_hash).first()
+        if stored is None and object_key is not None:
+            try:
+                with transaction.atomic():
+                    stored = StoredObject.objects.create(
+                        content_hash=content_hash,
+                        key=object_key,
+                        s3_etag=s3_metadata.get('ETag'),
+                        s3_version_id=s3_metadata.get('VersionId'),
+                        s3_metadata=self._clean_s3_metadata(s3_metadata),
+                        ref_count=count
+                    )
+                return stored, True
+            except IntegrityError:
+                # Another upload of the same content got there first
+                stored = StoredObject.objects.select_for_update().get(content_hash=content_hash)
+
+        if stored is not None:
+            StoredObject.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') + count)
+        return stored, False
+
+    def _reused_metadata(self, stored: StoredObject, file_obj) -> Dict:
+        """S3 metadata for a file that references an object stored earlier."""
+        last_modified = stored.s3_metadata.get('LastModified')
+        return {
+            **stored.s3_metadata,
+            'ETag': stored.s3_etag,
+            'VersionId': stored.s3_version_id,
+            'LastModified': parse_datetime(last_modified) if last_modified else None,
+            'original_name': file_obj.name
+        }
+
+    def _build_record(self, file_obj, content: str, s3_url: str, s3_metadata: Dict,
+                      content_hash: Optional[str] = None) -> FileUpload:
+        """Builds an unsaved FileUpload row for an object already stored in S3."""
+        return FileUpload(
+            name=file_obj.name,
+            size=file_obj.size / 1024,  # Convert to KB
+            content=content,
+            s3_url=s3_url,
+            file_type=file_obj.content_type,
+            s3_etag=s3_metadata.get('ETag'),
+            s3_version_id=s3_metadata.get('VersionId'),
+            s3_metadata=self._clean_s3_metadata(s3_metadata),
+            content_hash=content_hash
+        )
+
+    def _create_record(self, file_obj, content: str, s3_url: str, s3_metadata: Dict,
+                       content_hash: Optional[str] = None) -> FileUpload:
+        """
+        Inserts the FileUpload row for an object already stored in S3.
+        Must run inside a transaction, which also covers the stats update.
+        """
+        file_upload = self._build_record(file_obj, content, s3_url, s3_metadata, content_hash)
+        with observe_stage('db_insert'):
+            file_upload.save()
+            self.search_index.index(file_upload)
+            record_file(file_upload)
+        return file_upload
+
+    def _upload_object(self, file_obj, object_key: str) -> Dict:
+        """Uploads a file under object_key. Returns its S3 metadata."""
+        s3_url, s3_metadata = self.storage.upload_file(
+            file_obj,
+            object_key,
+            file_obj.content_type,
+            self._prepare_file_metadata(file_obj)
+        )
+        if not s3_url:
+            raise StorageError("Failed to upload file to S3")
+        return s3_metadata
+
+    def _apply_s3_metadata(self, file_upload: FileUpload, s3_url: str, s3_metadata: Dict) -> None:
+        """Points a row at its S3 object."""
+        file_upload.s3_url = s3_url
+        file_upload.s3_etag = s3_metadata.get('ETag')
+        file_upload.s3_version_id = s3_metadata.get('VersionId')
+        file_upload.s3_metadata = self._clean_s3_metadata(s3_metadata)
+
+    def _abandon_pending(self, file_upload: FileUpload, object_key: str) -> None:
+        """Drops a pending row and its object; the reconciler retries on failure."""
+        try:
+            FileUpload.objects.filter(pk=file_upload.pk, status=FileUpload.Status.PENDING).delete()
+        except Exception as e:
+            logger.error(f"Failed to remove pending file {file_upload.pk}: {e}")
+        self._cleanup_objects([object_key])
+
+    def _prepare_upload(self, file_obj) -> Tuple[str, str]:
+        """Validates an upload. Returns its text and content hash."""
+        with observe_stage('validate'):
+            self._validate_file(file_obj)
+            content = self._read_and_validate_file_content(file_obj)
+            return content, self._content_hash(file_obj)
+
+    def _begin_create(self, file_obj, content: str, content_hash: str) -> Tuple[FileUpload, Optional[str]]:
+        """
+        References stored content or inserts a pending row, in one short
+        transaction. Returns (file_upload, object_key); object_key is None
+        when the content was already stored and the row is committed.
+        """
+        object_key = self._generate_object_key(file_obj.name)
+        with transaction.atomic():
+            stored, _ = self._retain_object(content_hash)
+            if stored is not None:
+                # Same bytes already in S3: nothing to upload
+                return self._create_record(
+                    file_obj, content, self.storage.get_url(stored.key),
+                    self._reused_metadata(stored, file_obj), content_hash
+                ), None
+
+            file_upload = self._build_record(
+                file_obj, content, self.storage.get_url(object_key), {}, content_hash
+            )
+            file_upload.status = FileUpload.Status.PENDING
+            with observe_stage('db_insert'):
+                file_upload.save()
+        return file_upload, object_key
+
+    def _commit_create(self, file_obj, file_upload: FileUpload, content_hash: str,
+                       object_key: str, s3_metadata: Dict) -> bool:
+        """
+        Commits a pending row once its object is in S3.
+        Returns False when the same content was stored concurrently, which
+        leaves the object just uploaded redundant.
+        Raises:
+            StorageError: If the reconciler dropped the pending row first;
+            nothing is committed and the caller removes the object
+        """
+        with observe_stage('db_insert'), transaction.atomic():
+            # Locking the row keeps the reconciler from dropping it until
+            # this commits; a plain save would re-insert a dropped row
+            if not FileUpload.objects.select_for_update().filter(
+                pk=file_upload.pk, status=FileUpload.Status.PENDING
+            ).exists():
+                raise StorageError("Upload was abandoned before it could be committed")
+            stored, created = self._retain_object(content_hash, object_key, s3_metadata)
+            if not created:
+                s3_metadata = self._reused_metadata(stored, file_obj)
+            self._apply_s3_metadata(file_upload, self.storage.get_url(stored.key), s3_metadata)
+            file_upload.status = FileUpload.Status.COMMITTED
+            file_upload.save(force_update=True)
+            self.search_index.index(file_upload)
+            # Pending rows are not counted until now
+            record_file(file_upload)
+        return created
+
     def create_file(self, file_obj) -> FileUpload:
         """
-        Creates a file entry with atomic transaction support.
+        Creates a file entry.
+        The row is inserted as pending, the S3 upload runs outside any
+        transaction, and the row is then committed; each transaction only
+        lasts as long as its database writes, however slow S3 is.
+        Content already stored in S3 is referenced instead of uploaded again.
         Raises:
             FileValidationError: If file validation fails
             StorageError: If S3 storage operations fail
         """
-        # Validate file
-        self._validate_file(file_obj)
-        content = self._read_and_validate_file_content(file_obj)
+        content, content_hash = self._prepare_upload(file_obj)
+        file_upload, object_key = self._begin_create(file_obj, content, content_hash)
+        if object_key is None:
+            return file_upload
 
-        # Prepare for S3 upload
-        file_extension = file_obj.name.split('.')[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+        try:
+            s3_metadata = self._upload_object(file_obj, object_key)
+            created = self._commit_create(file_obj, file_upload, content_hash, object_key, s3_metadata)
+        except Exception:
+            self._abandon_pending(file_upload, object_key)
+            raise
+
+        if not created:
+            # The same content was stored concurrently; this copy is redundant
+            self._cleanup_objects([object_key])
+        return file_upload
+
+    async def acreate_file(self, file_obj) -> FileUpload:
+        """
+        Async version of create_file for ASGI views.
+        Validation runs on a worker thread, the database steps on Django's
+        thread-sensitive executor and the S3 upload on the bounded S3 pool,
+        so a slow upload does not hold the event loop or a database thread.
+        Raises:
+            FileValidationError: If file validation fails
+            StorageError: If S3 storage operations fail
+        """
+        content, content_hash = await sync_to_async(
+            self._prepare_upload, thread_sensitive=False
+        )(file_obj)
+        file_upload, object_key = await sync_to_async(self._begin_create)(
+            file_obj, content, content_hash
+        )
+        if object_key is None:
+            return file_upload
 
-        # Create a save point for transaction
-        sid = transaction.savepoint()
-        
         try:
-            # Upload to S3
-            s3_url, s3_metadata = self.s3_service.upload_file(
-                file_obj,
-                unique_filename,
-                file_obj.content_type,
-                self._prepare_file_metadata(file_obj)
+            s3_metadata = await s3_to_async(self._upload_object)(file_obj, object_key)
+            created = await sync_to_async(self._commit_create)(
+                file_obj, file_upload, content_hash, object_key, s3_metadata
             )
+        except Exception:
+            await sync_to_async(self._abandon_pending)(file_upload, object_key)
+            raise
 
-            if not s3_url:
-                raise StorageError("Failed to upload file to S3")
-
-            # Create database record
-            file_upload = FileUpload.objects.create(
-                name=file_obj.name,
-                size=file_obj.size / 1024,  # Convert to KB
-                content=content,
-                s3_url=s3_url,
-                file_type=file_obj.content_type,
-                s3_etag=s3_metadata.get('ETag'),
-                s3_version_id=s3_metadata.get('VersionId'),
-                s3_metadata=self._clean_s3_metadata(s3_metadata)
-            )
+        if not created:
+            await sync_to_async(self._cleanup_objects)([object_key])
+        return file_upload
 
-            # If everything succeeded, commit the transaction
-            transaction.savepoint_commit(sid)
-            return file_upload
+    def _validate_batch_file(self, file_obj) -> str:
+        """Validates one file of a batch and returns its text."""
+        with observe_stage('validate'):
+            self._validate_file(file_obj)
+            return self._read_and_validate_file_content(file_obj)
 
-        except Exception as e:
-            # If anything fails, rollback the transaction and try to clean up S3
-            transaction.savepoint_rollback(sid)
+    def _run_batch(self, executor, func, arguments: List[Tuple]) -> List[Tuple]:
+        """
+        Runs func over every argument tuple on the executor.
+        Returns one (result, error) pair per call, in order.
+        """
+        # Each task runs in a copy of the caller's context, so the request
+        # profiler also sees the calls made on pool threads
+        futures = [executor.submit(copy_context().run, func, *args) for args in arguments]
+        results = []
+        for future in futures:
             try:
-                self.s3_service.delete_file(unique_filename)
-            except Exception as cleanup_error:
-                logger.error(f"Failed to cleanup S3 file after transaction failure: {cleanup_error}")
+                results.append((future.result(), None))
+            except Exception as e:
+                if not isinstance(e, (FileValidationError, StorageError)):
+                    logger.error(f"Unexpected error in batch upload: {str(e)}")
+                results.append((None, e))
+        return results
+
+    def _cleanup_objects(self, object_keys: List[str]) -> None:
+        """
+        Removes S3 objects that will not get a database row; objects S3
+        fails to delete are queued in the deletion outbox.
+        Objects that are (still) referenced by a StoredObject are kept.
+        """
+        referenced = set(
+            StoredObject.objects.filter(key__in=object_keys).values_list('key', flat=True)
+        )
+        object_keys = [key for key in object_keys if key not in referenced]
+        if not object_keys:
+            return
+        try:
+            errors = self.storage.delete_files(object_keys)
+        except Exception as cleanup_error:
+            errors = {object_key: str(cleanup_error) for object_key in object_keys}
+        if errors:
+            logger.error(f"Failed to cleanup {len(errors)} S3 files, queueing them for retry")
+            try:
+                enqueue_deletions(errors)
+            except Exception as e:
+                logger.error(f"Failed to queue S3 cleanup, the reconciler will remove the objects: {e}")
+
+    def _insert_records(self, records: List[FileUpload]) -> None:
+        """Inserts new rows, in one statement where the backend returns their ids."""
+        with observe_stage('db_insert', items=len(records)):
+            if connection.features.can_return_rows_from_bulk_insert:
+                FileUpload.objects.bulk_create(records)
+            else:
+                # Without RETURNING the new ids cannot be matched back to rows
+                # that share an S3 object, so each row is inserted on its own
+                for record in records:
+                    record.save()
+
+    def create_files(self, file_objs: List) -> List[Tuple[Optional[FileUpload], Optional[Exception]]]:
+        """
+        Creates many files at once. Files are validated on a bounded pool,
+        each new content is uploaded to S3 once over the same pool, and all
+        rows are inserted with a single bulk_create. Uploads parsed by
+        ValidatingUploadHandler were already scanned while the body streamed
+        in, one after the other; the pool then only re-checks their metadata.
+        Returns one (file_upload, error) pair per file, in input order;
+        exactly one of the two is None.
+        Raises:
+            Exception: If the rows cannot be inserted; every object uploaded
+            for the batch is removed from S3 first
+        """
+        if not file_objs:
+            return []
+
+        workers = min(settings.FILE_BATCH_MAX_WORKERS, len(file_objs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = self._run_batch(executor, self._validate_batch_file, [(f,) for f in file_objs])
+            valid = [index for index, (_, error) in enumerate(outcomes) if error is None]
+            hashes = {index: self._content_hash(file_objs[index]) for index in valid}
+
+            # One upload per content not stored yet, however many files share it
+            existing = set(
+                StoredObject.objects
+                .filter(content_hash__in=set(hashes.values()))
+                .values_list('content_hash', flat=True)
+            )
+            uploaders = {}
+            for index in valid:
+                if hashes[index] not in existing:
+                    uploaders.setdefault(hashes[index], index)
+            object_keys = {
+                content_hash: self._generate_object_key(file_objs[index].name)
+                for content_hash, index in uploaders.items()
+            }
+            uploads = dict(zip(uploaders, self._run_batch(executor, self._upload_object, [
+                (file_objs[index], object_keys[content_hash])
+                for content_hash, index in uploaders.items()
+            ])))
+
+        # A failed upload can still leave an object behind, e.g. when the
+        # PUT succeeded but reading its metadata back did not
+        self._cleanup_objects([
+            object_keys[content_hash] for content_hash, (_, error) in uploads.items() if error
+        ])
+
+        pending = []
+        for index in valid:
+            _, upload_error = uploads.get(hashes[index], (None, None))
+            if upload_error:
+                outcomes[index] = (None, upload_error)
+            else:
+                pending.append(index)
+        if not pending:
+            return outcomes
+
+        uploaded_keys = [
+            object_keys[content_hash] for content_hash, (_, error) in uploads.items() if not error
+        ]
+        try:
+            with transaction.atomic():
+                stored_objects = {}
+                for content_hash, count in Counter(hashes[index] for index in pending).items():
+                    s3_metadata = uploads.get(content_hash, (None, None))[0]
+                    stored_objects[content_hash] = self._retain_object(
+                        content_hash, object_keys.get(content_hash), s3_metadata, count
+                    )
+
+                records = []
+                for index in pending:
+                    file_obj, content_hash = file_objs[index], hashes[index]
+                    stored, created = stored_objects[content_hash]
+                    if stored is None:
+                        # Deleted since it was looked up; nothing to reference
+                        outcomes[index] = (None, StorageError("Stored content is no longer available"))
+                        continue
+                    if created and uploaders[content_hash] == index:
+                        s3_metadata = uploads[content_hash][0]
+                    else:
+                        s3_metadata = self._reused_metadata(stored, file_obj)
+                    record = self._build_record(
+                        file_obj, outcomes[index][0], self.storage.get_url(stored.key),
+                        s3_metadata, content_hash
+                    )
+                    outcomes[index] = (record, None)
+                    records.append(record)
+
+                self._insert_records(records)
+                for file_upload in records:
+                    self.search_index.index(file_upload)
+                record_files(
+                    (file_upload.size, file_upload.file_type, file_upload.uploaded_at)
+                    for file_upload in records
+                )
+                # bulk_create sends no post_save
+                invalidate_file_responses()
+        except Exception:
+            self._cleanup_objects(uploaded_keys)
+            raise
+
+        # Drops uploads made redundant by the same content stored concurrently
+        self._cleanup_objects(uploaded_keys)
+        return outcomes
+
+    def create_presigned_upload(self, name: str, content_type: str) -> Dict:
+        """
+        Prepares a direct browser-to-S3 upload.
+        Returns the presigned POST plus a signed token for finalize_presigned_upload.
+        Raises:
+            FileValidationError: If the name or type is not allowed
+            StorageError: If the upload could not be presigned
+        """
+        self.validate_file_metadata(name, content_type)
+        object_key = self._generate_object_key(name)
+        expires_in = settings.FILE_PRESIGNED_UPLOAD_EXPIRY
+
+        presigned = self.storage.generate_presigned_post(
+            object_key,
+            content_type,
+            FileValidationConstants.MIN_SIZE_BYTES,
+            FileValidationConstants.MAX_SIZE_BYTES,
+            expires_in
+        )
+        if not presigned:
+            raise StorageError("Failed to prepare direct upload")
+
+        # The token binds finalize to a key this service issued
+        upload_token = signing.dumps(
+            {'key': object_key, 'name': name, 'content_type': content_type},
+            salt=PRESIGNED_UPLOAD_SALT
+        )
+        return {
+            'url': presigned['url'],
+            'fields': presigned['fields'],
+            'upload_token': upload_token,
+            'expires_in': expires_in
+        }
+
+    def finalize_presigned_upload(self, upload_token: str) -> FileUpload:
+        """
+        Validates an object uploaded with a presigned POST and records it.
+        S3 is read outside any transaction. Rejected objects are deleted from S3.
+        Each token is finalized at most once: a FinalizedUpload row for its
+        key is inserted in the transaction that creates the file.
+        Raises:
+            FileValidationError: If the token or the uploaded file is invalid,
+                the token was already finalized or nothing was uploaded
+            StorageError: If the object cannot be read from S3
+        """
+        try:
+            upload = signing.loads(
+                upload_token or '',
+                salt=PRESIGNED_UPLOAD_SALT,
+                max_age=settings.FILE_PRESIGNED_UPLOAD_EXPIRY * 2
+            )
+        except signing.BadSignature:
+            raise FileValidationError("Invalid or expired upload token")
+
+        object_key = upload['key']
+        if FinalizedUpload.objects.filter(key=object_key).exists():
+            raise FileValidationError("Upload has already been finalized")
+
+        try:
+            # Read one byte past the limit so oversized objects are detected
+            body, s3_metadata = self.storage.get_object(
+                object_key, FileValidationConstants.MAX_SIZE_BYTES + 1
+            )
+        except ObjectNotFoundError:
+            raise FileValidationError("Uploaded file not found")
+        if body is None:
+            raise StorageError("Uploaded file could not be read from S3")
+
+        file_obj = SimpleUploadedFile(upload['name'], body, content_type=s3_metadata['content_type'])
+        file_obj.size = s3_metadata['size']
+        try:
+            with observe_stage('validate'):
+                self._validate_file(file_obj)
+                content = self._read_and_validate_file_content(file_obj)
+        except FileValidationError:
+            self.storage.delete_file(object_key)
             raise
 
-    @transaction.atomic
+        s3_metadata['original_name'] = upload['name']
+        content_hash = hashlib.sha256(body).hexdigest()
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    FinalizedUpload.objects.create(key=object_key)
+            except IntegrityError:
+                # A concurrent finalize of the same token got there first
+                raise FileValidationError("Upload has already been finalized")
+            stored, created = self._retain_object(content_hash, object_key, s3_metadata)
+            if not created:
+                s3_metadata = self._reused_metadata(stored, file_obj)
+            file_upload = self._create_record(
+                file_obj, content, self.storage.get_url(stored.key), s3_metadata, content_hash
+            )
+
+        if not created:
+            # The same bytes are already stored; the direct upload is redundant
+            self._cleanup_objects([object_key])
+        return file_upload
+
     def delete_file(self, file_upload: FileUpload) -> None:
+        """Deletes a file; see delete_files."""
+        self.delete_files(FileUpload.objects.filter(pk=file_upload.pk))
+
+    def _release_objects(self, counts: Dict[str, int]) -> Dict[str, str]:
+        """
+        Drops references to stored objects, {content_hash: references}.
+        Must run inside a transaction.
+        Returns {content_hash: key} for the objects left without references;
+        their StoredObject rows are deleted and the S3 objects are up to the caller.
         """
-        Deletes a file with atomic transaction support.
+        orphaned = {}
+        locked = StoredObject.objects.select_for_update().filter(content_hash__in=counts)
+        for stored in locked:
+            count = counts[stored.content_hash]
+            if stored.ref_count <= count:
+                orphaned[stored.content_hash] = stored.key
+                stored.delete()
+            else:
+                StoredObject.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') - count)
+        return orphaned
+
+    def delete_files(self, queryset, limit: Optional[int] = None) -> Dict:
+        """
+        Deletes every committed file in the queryset, or the `limit` with
+        the lowest ids.
+        One short transaction releases the files' references, deletes the
+        rows, updates the stats and queues the S3 objects left without
+        references in the deletion outbox; no S3 call is made here. Shared objects stay until
+        their last reference goes.
+        Returns: {'deleted': [ids], 'queued_deletions': [outbox entry ids],
+        'has_more': whether the limit left files in the queryset}
         """
-        if file_upload.s3_url:
-            file_name = file_upload.s3_url.split('/')[-1]
-            if not self.s3_service.delete_file(file_name):
-                raise StorageError("Failed to delete file from S3")
+        with transaction.atomic():
+            rows = queryset.committed().select_for_update().values_list(
+                'id', 'object_key', 'content_hash', 'size', 'file_type', 'uploaded_at'
+            )
+            if limit is not None:
+                # One row past the limit tells whether another call is needed
+                rows = rows.order_by('id')[:limit + 1]
+            rows = list(rows)
+            has_more = limit is not None and len(rows) > limit
+            if has_more:
+                rows = rows[:limit]
+            orphaned = self._release_objects(
+                Counter(content_hash for _, _, content_hash, *_ in rows if content_hash)
+            )
+            # Legacy rows without a hash own their object outright
+            object_keys = [
+                object_key
+                for _, object_key, content_hash, *_ in rows if content_hash is None and object_key
+            ]
+            deleted = [file_id for file_id, *_ in rows]
 
-        file_upload.delete()
\ No newline at end of file
+            self.search_index.remove_many(deleted)
+            FileUpload.objects.filter(pk__in=deleted).delete()
+            record_files(
+                [(size, file_type, uploaded_at) for *_, size, file_type, uploaded_at in rows], sign=-1
+            )
+            # The post_delete hook has invalidated cached responses
+            queued = enqueue_deletions([*object_keys, *orphaned.values()])
+
+        return {'deleted': deleted, 'queued_deletions': queued, 'has_more': has_more}
+
+    async def adelete_file(self, file_upload: FileUpload) -> None:
+        """Async version of delete_file; S3 is left to the deletion outbox."""
+        await sync_to_async(self.delete_file)(file_upload)
+
+    def search_files(self, terms: List[str], limit: int, offset: int = 0) -> List[Tuple[FileUpload, float, str]]:
+        """
+        Ranked full-text search over file names and content.
+        Returns (file_upload, score, snippet) tuples, best match first.
+        """
+        hits = self.search_index.search(terms, limit, offset)
+        files = FileUpload.objects.committed().in_bulk([hit.id for hit in hits])
+        return [
+            (files[hit.id], hit.score, hit.snippet)
+            for hit in hits if hit.id in files
+        ]
+
+    def _object_key(self, file_upload: FileUpload) -> str:
+        return file_upload.s3_url.split('/')[-1]
+
+    def is_stored_locally(self, file_upload: FileUpload) -> bool:
+        """Whether a file's object can be read without leaving this host."""
+        return self.storage.is_local(self._object_key(file_upload))
+
+    def presign_download(self, file_upload: FileUpload) -> str:
+        """
+        Presigns a short-lived GET of a file's S3 object, served under the
+        file's own name and type.
+        Raises:
+            StorageError: If the download could not be presigned
+        """
+        url = self.storage.generate_presigned_get(
+            self._object_key(file_upload),
+            settings.FILE_PRESIGNED_DOWNLOAD_EXPIRY,
+            download_name=file_upload.name,
+            content_type=file_upload.file_type
+        )
+        if not url:
+            raise StorageError("Failed to prepare download")
+        return url
+
+    def open_download(self, file_upload: FileUpload, byte_range: Optional[str] = None) -> Tuple:
+        """
+        Opens a file's object, or one byte range of it, for streaming.
+        Returns (chunks, metadata) as S3Service.open_object does; chunks
+        is a LocalFileChunks when the object is on local disk.
+        Raises:
+            RangeNotSatisfiableError: If the range starts past the end
+            StorageError: If the object cannot be read from storage
+        """
+        chunks, metadata = self.storage.open_object(
+            self._object_key(file_upload),
+            byte_range,
+            chunk_size=settings.FILE_DOWNLOAD_CHUNK_SIZE
+        )
+        if chunks is None:
+            raise StorageError("File content is not available")
+        return chunks, metadata
@@ -0,0 +1,152 @@
+# api/services/outbox.py
+from datetime import timedelta
+from typing import Dict, Iterable, List
+import logging
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ObjectDeletion, StoredObject
+from .s3 import DELETE_OBJECTS_MAX_KEYS
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_deletions(keys: Iterable[str]) -> List[int]:
+    """
+    Queues S3 objects for deletion. Call it inside the transaction that
+    drops their last reference, so the outbox and the data commit together.
+    Returns the ids of the outbox entries, including ones already queued.
+    """
+    keys = list(dict.fromkeys(keys))
+    ObjectDeletion.objects.bulk_create(
+        [ObjectDeletion(key=key) for key in keys],
+        ignore_conflicts=True
+    )
+    # ignore_conflicts leaves the new ids unset on every backend
+    ids = []
+    for start in range(0, len(keys), DELETE_OBJECTS_MAX_KEYS):
+        ids.extend(
+            ObjectDeletion.objects.filter(key__in=keys[start:start + DELETE_OBJECTS_MAX_KEYS])
+            .values_list('id', flat=True)
+        )
+    return sorted(ids)
+
+
+def deletion_status(ids: Iterable[int]) -> List[Dict]:
+    """
+    Where each queued deletion stands, in the order given: 'queued' while
+    it is waiting or being retried, 'failed' once it ran out of attempts,
+    and 'done' when the object is gone and the entry was removed.
+    """
+    ids = list(ids)
+    entries = ObjectDeletion.objects.in_bulk(ids)
+    max_attempts = settings.FILE_DELETE_MAX_ATTEMPTS
+    statuses = []
+    for entry_id in ids:
+        entry = entries.get(entry_id)
+        if entry is None:
+            statuses.append({'id': entry_id, 'status': 'done'})
+            continue
+        statuses.append({
+            'id': entry_id,
+            'key': entry.key,
+            'status': 'failed' if entry.attempts >= max_attempts else 'queued',
+            'attempts': entry.attempts,
+            'last_error': entry.last_error,
+        })
+    return statuses
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter, capped at FILE_DELETE_RETRY_MAX_DELAY."""
+    delay = min(
+        settings.FILE_DELETE_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.FILE_DELETE_RETRY_MAX_DELAY
+    )
+    # Jitter keeps retries of a failed batch from arriving together
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+class DeletionWorker:
+    """
+    Drains the ObjectDeletion outbox with batched DeleteObjects calls.
+
+    Entries are claimed by pushing their available_at past a lease, so
+    several workers can run side by side and a crashed worker's batch is
+    picked up again once the lease runs out. Failed keys are retried with
+    backoff until FILE_DELETE_MAX_ATTEMPTS; after that they stay in the
+    table for inspection.
+    """
+    lease = timedelta(minutes=5)
+
+    def __init__(self, batch_size: int = DELETE_OBJECTS_MAX_KEYS):
+        self.storage = get_storage()
+        self.batch_size = min(batch_size, DELETE_OBJECTS_MAX_KEYS)
+        self.max_attempts = settings.FILE_DELETE_MAX_ATTEMPTS
+
+    def claim(self):
+        """Leases the next batch of due entries."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                ObjectDeletion.objects
+                .select_for_update(skip_locked=True)
+                .filter(available_at__lte=now, attempts__lt=self.max_attempts)
+                .order_by('available_at')[:self.batch_size]
+            )
+            ObjectDeletion.objects.filter(pk__in=[entry.pk for entry in batch]).update(
+                available_at=now + self.lease
+            )
+        return batch
+
+    def process_batch(self) -> int:
+        """
+        Deletes one batch of objects.
+        Returns the number of entries handled, 0 when nothing is due.
+        """
+        batch = self.claim()
+        if not batch:
+            return 0
+
+        # A key that is referenced again must never be deleted
+        referenced = set(
+            StoredObject.objects.filter(key__in=[entry.key for entry in batch])
+            .values_list('key', flat=True)
+        )
+        for key in referenced:
+            logger.error(f"Skipping deletion of referenced object {key}")
+        keys = [entry.key for entry in batch if entry.key not in referenced]
+        try:
+            errors = self.storage.delete_files(keys)
+        except Exception as e:
+            # E.g. the endpoint is unreachable: every key failed this attempt
+            logger.error(f"Failed to delete a batch of {len(keys)} objects: {e}")
+            errors = {key: str(e) or type(e).__name__ for key in keys}
+
+        done = [entry.pk for entry in batch if entry.key not in errors]
+        ObjectDeletion.objects.filter(pk__in=done).delete()
+
+        now = timezone.now()
+        for entry in batch:
+            if entry.key not in errors:
+                continue
+            entry.attempts += 1
+            entry.last_error = errors[entry.key]
+            entry.available_at = now + retry_delay(entry.attempts)
+            entry.save(update_fields=['attempts', 'last_error', 'available_at'])
+            if entry.attempts >= self.max_attempts:
+                logger.error(f"Giving up on deleting {entry.key}: {entry.last_error}")
+        return len(batch)
+
+    def drain(self) -> int:
+        """Processes batches until nothing is due. Returns entries handled."""
+        handled = 0
+        while True:
+            count = self.process_batch()
+            if not count:
+                return handled
+            handled += count
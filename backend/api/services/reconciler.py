@@ -0,0 +1,107 @@
+# api/services/reconciler.py
+from datetime import timedelta
+from itertools import islice
+from typing import Dict, List
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import FileUpload, FinalizedUpload, StoredObject
+from .file_service import FileService
+from .s3 import DELETE_OBJECTS_MAX_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Listed keys checked against the database per round trip
+SWEEP_BATCH_SIZE = DELETE_OBJECTS_MAX_KEYS
+
+
+class Reconciler:
+    """
+    Repairs what interrupted uploads leave behind:
+
+    - pending rows whose upload never committed, and their objects
+    - S3 objects that no row or stored object references
+    - finalized direct upload markers whose token has expired
+
+    Only state older than the grace period is touched, so uploads still
+    in flight are left alone. Deletes are retried by the deletion outbox
+    worker, not here.
+    """
+
+    def __init__(self, grace_period: int = None, dry_run: bool = False):
+        self.file_service = FileService()
+        self.storage = self.file_service.storage
+        self.grace_period = timedelta(seconds=(
+            settings.FILE_RECONCILE_GRACE_PERIOD if grace_period is None else grace_period
+        ))
+        self.dry_run = dry_run
+
+    def _stale_pending(self):
+        cutoff = timezone.now() - self.grace_period
+        return FileUpload.objects.filter(status=FileUpload.Status.PENDING, last_modified__lt=cutoff)
+
+    def sweep_pending(self) -> int:
+        """Drops pending rows that never committed, and their objects."""
+        keys_by_id = dict(self._stale_pending().values_list('id', 'object_key'))
+        if keys_by_id and not self.dry_run:
+            FileUpload.objects.filter(
+                pk__in=keys_by_id, status=FileUpload.Status.PENDING
+            ).delete()
+            self.file_service._cleanup_objects(list(keys_by_id.values()))
+        return len(keys_by_id)
+
+    def _unreferenced(self, keys: List[str]) -> List[str]:
+        """The keys that no stored object or row points at."""
+        referenced = set(StoredObject.objects.filter(key__in=keys).values_list('key', flat=True))
+        candidates = [key for key in keys if key not in referenced]
+        # Pending rows and rows from before deduplication have no stored
+        # object; the indexed object_key column finds them
+        if candidates:
+            referenced.update(
+                FileUpload.objects.filter(object_key__in=candidates).values_list('object_key', flat=True)
+            )
+        return [key for key in candidates if key not in referenced]
+
+    def sweep_orphans(self) -> int:
+        """
+        Deletes S3 objects nothing references any more. The listing is
+        checked against the database one batch at a time, so memory use
+        does not grow with the bucket or the tables.
+        """
+        # Unfinalized direct uploads are unreferenced until finalize runs
+        grace_period = max(
+            self.grace_period,
+            timedelta(seconds=settings.FILE_PRESIGNED_UPLOAD_EXPIRY * 2)
+        )
+        cutoff = timezone.now() - grace_period
+
+        old_keys = (key for key, last_modified in self.storage.list_objects() if last_modified < cutoff)
+        count = 0
+        while True:
+            keys = list(islice(old_keys, SWEEP_BATCH_SIZE))
+            if not keys:
+                return count
+            orphans = self._unreferenced(keys)
+            if orphans and not self.dry_run:
+                errors = self.storage.delete_files(orphans)
+                orphans = [key for key in orphans if key not in errors]
+            count += len(orphans)
+
+    def sweep_finalized_uploads(self) -> int:
+        """Forgets finalized direct uploads whose token can no longer be used."""
+        cutoff = timezone.now() - timedelta(seconds=settings.FILE_PRESIGNED_UPLOAD_EXPIRY * 2)
+        expired = FinalizedUpload.objects.filter(created_at__lt=cutoff)
+        if self.dry_run:
+            return expired.count()
+        count, _ = expired.delete()
+        return count
+
+    def run(self) -> Dict[str, int]:
+        """Runs every sweep. Returns the number of items each one handled."""
+        return {
+            'pending': self.sweep_pending(),
+            'orphans': self.sweep_orphans(),
+            'finalized_uploads': self.sweep_finalized_uploads(),
+        }
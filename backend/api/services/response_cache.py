@@ -0,0 +1,106 @@
+# api/services/response_cache.py
+from typing import Iterable, Optional, Tuple
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+VERSION_KEY = 'files:version'
+
+
+def _initial_version() -> int:
+    # A version lost to eviction restarts from the clock, never from a
+    # number an older ETag could still carry
+    return time.time_ns() // 1000
+
+
+def get_collection_version() -> int:
+    """Returns the current version of the file collection."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY, _initial_version())
+    return version
+
+
+def _bump_collection_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Missing or evicted: any fresh version invalidates everything
+        cache.set(VERSION_KEY, _initial_version(), timeout=None)
+
+
+def invalidate_file_responses() -> None:
+    """
+    Invalidates every cached list and detail response. Call it inside the
+    transaction that changes the files: the version moves on now, so no
+    request starts caching under the old one, and again on commit, so
+    nothing a request read before the commit outlives it.
+    """
+    _bump_collection_version()
+    transaction.on_commit(_bump_collection_version)
+
+
+def invalidate_on_change(sender, origin=None, **kwargs) -> None:
+    """
+    post_save and post_delete hook: any saved or deleted file, from the
+    API, the admin or a queryset delete, invalidates.
+    """
+    # A queryset delete sends post_delete for every row with the same
+    # origin; invalidating once covers them all
+    if origin is not None:
+        if getattr(origin, '_invalidated_file_responses', False):
+            return
+        origin._invalidated_file_responses = True
+    invalidate_file_responses()
+
+
+def compute_etag(version: int, rows: Iterable[Tuple]) -> str:
+    """Strong ETag over the collection version and (id, s3_etag, last_modified) rows."""
+    digest = hashlib.sha256(str(version).encode())
+    for file_id, s3_etag, last_modified in rows:
+        digest.update(f'|{file_id}:{s3_etag}:{last_modified.isoformat()}'.encode())
+    return quote_etag(digest.hexdigest()[:32])
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized file responses.
+
+    Entries are keyed by the collection version read before the database
+    is queried, so bumping the version drops them all at once and they
+    simply expire from the backend. Each entry keeps the ETag of its body,
+    which lets a matching If-None-Match be answered without any query.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.version = get_collection_version()
+
+    def key(self, *parts) -> str:
+        raw = '&'.join(str(part) for part in parts)
+        digest = hashlib.sha256(raw.encode()).hexdigest()[:32]
+        return f'files:{self.scope}:{self.version}:{digest}'
+
+    def get(self, key: str) -> Optional[Tuple[str, dict]]:
+        """Returns (etag, payload), or None on a miss."""
+        return cache.get(key)
+
+    def set(self, key: str, etag: str, payload: dict) -> None:
+        cache.set(key, (etag, payload), timeout=settings.FILE_CACHE_TIMEOUT)
+
+    @staticmethod
+    def matches(request, etag: str) -> bool:
+        """True when the request's If-None-Match already names this ETag."""
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+        # If-None-Match uses the weak comparison, so a W/ prefix is ignored
+        candidates = parse_etags(header)
+        return '*' in candidates or etag in (
+            candidate.removeprefix('W/') for candidate in candidates
+        )
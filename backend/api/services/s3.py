@@ -1,20 +1,169 @@
+from asgiref.sync import sync_to_async
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from s3transfer.utils import ChunksizeAdjuster
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import logging
 import mimetypes
+import threading
+import time
+
+from ..exceptions import ObjectNotFoundError, RangeNotSatisfiableError
+from ..metrics import observe_stage
+from ..profiling import instrument_s3_client
+from .storage import StorageBackend
 
 logger = logging.getLogger(__name__)
 
-class S3Service:
+# DeleteObjects accepts at most this many keys per call
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+# boto3 clients are thread-safe once built, but building one is expensive
+# (credential resolution, endpoint/model loading, a fresh connection pool).
+# A single client is therefore shared by every request in the process.
+_client = None
+_client_lock = threading.Lock()
+
+
+def _build_s3_client():
+    """Builds an S3 client with the pool size and timeouts from settings."""
+    config = Config(
+        max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+        read_timeout=settings.AWS_S3_READ_TIMEOUT,
+        retries={
+            'max_attempts': settings.AWS_S3_MAX_ATTEMPTS,
+            'mode': 'standard'
+        }
+    )
+    # Sessions are not thread-safe, so the client gets a private one
+    session = boto3.session.Session()
+    client = session.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION,
+        config=config
+    )
+    # Lets the request profiler account for S3 calls
+    return instrument_s3_client(client)
+
+
+def get_s3_client():
+    """Returns the process-wide S3 client, building it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_s3_client()
+    return _client
+
+
+def reset_s3_client():
+    """Drops the shared client so the next call builds a fresh one."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+# Blocking S3 calls made from async views run on this pool. It is bounded
+# so a burst of uploads queues here instead of exhausting the connection
+# pool or spawning a thread per request.
+_executor = None
+
+
+def get_s3_executor():
+    """Returns the process-wide pool for S3 calls made from async code."""
+    global _executor
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.AWS_S3_ASYNC_MAX_WORKERS,
+                    thread_name_prefix='s3'
+                )
+    return _executor
+
+
+def s3_to_async(func):
+    """Wraps a blocking S3 call so it can be awaited on the S3 pool."""
+    return sync_to_async(func, thread_sensitive=False, executor=get_s3_executor())
+
+
+def build_transfer_config():
+    """Builds the managed-transfer policy used for multipart uploads."""
+    return TransferConfig(
+        multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=settings.AWS_S3_MAX_CONCURRENCY,
+        use_threads=settings.AWS_S3_USE_THREADS
+    )
+
+
+class TransferStats:
+    """Counts bytes sent by a transfer; safe to use as a boto3 Callback."""
+
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
+        self.bytes_sent = 0
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        # Multipart transfers report progress from several threads
+        with self._lock:
+            self.bytes_sent += bytes_amount
+
+    def log(self, file_name, mode):
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.bytes_sent / 1024 / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"S3 {mode} upload of {file_name}: {self.bytes_sent} bytes "
+            f"in {elapsed:.3f}s ({rate:.1f} KiB/s)"
         )
+
+
+def _file_size(file_obj):
+    """Size of an upload without reading it, or None when unknown."""
+    size = getattr(file_obj, 'size', None)
+    if size is None and hasattr(file_obj, 'seek') and hasattr(file_obj, 'tell'):
+        position = file_obj.tell()
+        size = file_obj.seek(0, 2) - position
+        file_obj.seek(position)
+    return size
+
+
+def _multipart_etag(file_obj, size, chunksize):
+    """
+    The ETag S3 gives a multipart upload: the MD5 of the concatenated part
+    MD5s, suffixed with the part count. Parts are sized the way the
+    transfer manager sizes them. Not valid for SSE-KMS encrypted objects,
+    whose ETags are not MD5 based.
+    """
+    chunksize = ChunksizeAdjuster().adjust_chunksize(chunksize, size)
+    position = file_obj.tell()
+    part_digests = []
+    for chunk in iter(lambda: file_obj.read(chunksize), b''):
+        part_digests.append(hashlib.md5(chunk).digest())
+    file_obj.seek(position)
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+class S3Service(StorageBackend):
+    def __init__(self):
+        self.s3_client = get_s3_client()
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+        self.transfer_config = build_transfer_config()
+        self.verify_uploads = settings.AWS_S3_VERIFY_UPLOADS
+
+    def get_url(self, file_name):
+        """Returns the (private) object URL stored on FileUpload.s3_url"""
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{file_name}"
 
     def upload_file(self, file_obj, file_name, content_type=None, metadata=None):
         """
@@ -27,46 +176,261 @@ class S3Service:
                 'ACL': 'private',
                 'Metadata': metadata or {}
             }
-            
-            # Upload to S3
-            self.s3_client.upload_fileobj(
-                file_obj,
-                self.bucket_name,
-                file_name,
-                ExtraArgs=extra_args
-            )
 
-            # Get object metadata after upload
-            response = self.s3_client.head_object(
-                Bucket=self.bucket_name,
-                Key=file_name
-            )
-            logger.info(f"------------tyring to save file got response {response}")
+            # Upload to S3: one PUT below the multipart threshold, parallel
+            # parts above it. The metadata comes from the write itself, so
+            # no extra round trip is needed to read it back.
+            stats = TransferStats()
+            size = _file_size(file_obj)
+            if size is not None and size < self.transfer_config.multipart_threshold:
+                with observe_stage('s3_put', size=size):
+                    response = self.s3_client.put_object(
+                        Bucket=self.bucket_name,
+                        Key=file_name,
+                        Body=file_obj,
+                        **extra_args
+                    )
+                stats(size)
+                stats.log(file_name, 'single-part')
+                etag = response.get('ETag', '').strip('"')
+                version_id = response.get('VersionId')
+            else:
+                # The transfer manager returns nothing, so the ETag is
+                # computed locally; the version id is only known after a HEAD
+                etag = _multipart_etag(file_obj, size, self.transfer_config.multipart_chunksize) \
+                    if size is not None else None
+                with observe_stage('s3_put', size=size):
+                    self.s3_client.upload_fileobj(
+                        file_obj,
+                        self.bucket_name,
+                        file_name,
+                        ExtraArgs=extra_args,
+                        Config=self.transfer_config,
+                        Callback=stats
+                    )
+                stats.log(file_name, 'multipart')
+                version_id = None
 
             s3_metadata = {
-                'ETag': response.get('ETag', '').strip('"'),
-                'VersionId': response.get('VersionId'),
-                'LastModified': response.get('LastModified'),
-                **response.get('Metadata', {})
+                'ETag': etag,
+                'VersionId': version_id,
+                'LastModified': timezone.now(),
+                **extra_args['Metadata']
             }
+            if self.verify_uploads:
+                s3_metadata = self._verify_upload(file_name, s3_metadata)
+                if s3_metadata is None:
+                    return None, None
 
-            # Generate the URL
-            url = f"https://{self.bucket_name}.s3.amazonaws.com/{file_name}"
-            return url, s3_metadata
+            return self.get_url(file_name), s3_metadata
 
         except ClientError as e:
             logger.error(f"Error uploading file to S3: {str(e)}")
             return None, None
 
+    def _verify_upload(self, file_name, s3_metadata):
+        """
+        Reads an uploaded object back and checks it is the one just written.
+        Returns the metadata as S3 reports it, or None on an ETag mismatch.
+        """
+        with observe_stage('s3_head'):
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=file_name
+            )
+        etag = response.get('ETag', '').strip('"')
+        if s3_metadata['ETag'] and etag != s3_metadata['ETag']:
+            logger.error(
+                f"ETag mismatch after uploading {file_name}: expected {s3_metadata['ETag']}, got {etag}"
+            )
+            return None
+        return {
+            'ETag': etag,
+            'VersionId': response.get('VersionId'),
+            'LastModified': response.get('LastModified'),
+            **response.get('Metadata', {})
+        }
+
     def delete_file(self, file_name):
         """Delete a file from S3"""
         logger.info(f"trying to delete file  : {file_name}")
         try:
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=file_name
-            )
+            with observe_stage('s3_delete'):
+                self.s3_client.delete_object(
+                    Bucket=self.bucket_name,
+                    Key=file_name
+                )
             return True
         except ClientError as e:
             logger.error(f"Error deleting file from S3: {str(e)}")
-         
\ No newline at end of file
+
+    def delete_files(self, file_names):
+        """
+        Deletes many objects with one DeleteObjects call per 1000 keys.
+        Returns: {key: error message} for the keys S3 did not delete
+        """
+        file_names = list(file_names)
+        errors = {}
+        for start in range(0, len(file_names), DELETE_OBJECTS_MAX_KEYS):
+            chunk = file_names[start:start + DELETE_OBJECTS_MAX_KEYS]
+            try:
+                # Quiet mode only reports the keys that failed
+                with observe_stage('s3_delete', items=len(chunk)):
+                    response = self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={
+                            'Objects': [{'Key': key} for key in chunk],
+                            'Quiet': True
+                        }
+                    )
+            except ClientError as e:
+                logger.error(f"Error deleting files from S3: {str(e)}")
+                errors.update({key: str(e) for key in chunk})
+                continue
+
+            for error in response.get('Errors', []):
+                errors[error['Key']] = f"{error.get('Code')}: {error.get('Message')}"
+
+        if errors:
+            logger.error(f"S3 failed to delete {len(errors)} of {len(file_names)} files")
+        return errors
+
+    def list_objects(self):
+        """
+        Yields (key, last_modified) for every object in the bucket,
+        one ListObjectsV2 page at a time.
+        """
+        kwargs = {'Bucket': self.bucket_name}
+        while True:
+            response = self.s3_client.list_objects_v2(**kwargs)
+            for item in response.get('Contents', []):
+                yield item['Key'], item['LastModified']
+            if not response.get('IsTruncated'):
+                return
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def generate_presigned_post(self, file_name, content_type, min_size, max_size, expires_in):
+        """
+        Presigns a browser POST straight to S3. The policy pins the key and
+        content type and bounds the size, so S3 itself rejects anything else.
+        Returns: {'url': ..., 'fields': {...}} if successful, None if failed
+        """
+        try:
+            return self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                Fields={'Content-Type': content_type, 'acl': 'private'},
+                Conditions=[
+                    {'Content-Type': content_type},
+                    {'acl': 'private'},
+                    ['content-length-range', min_size, max_size]
+                ],
+                ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            logger.error(f"Error presigning S3 upload: {str(e)}")
+            return None
+
+    def get_object(self, file_name, max_bytes):
+        """
+        Reads at most max_bytes of an object.
+        Returns: (body, metadata) tuple if successful, (None, None) if failed.
+        metadata['size'] is the full object size, even when body is truncated.
+        Raises:
+            ObjectNotFoundError: If there is no such object
+        """
+        try:
+            with observe_stage('s3_get'):
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=file_name,
+                    Range=f"bytes=0-{max_bytes - 1}"
+                )
+                body = response['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise ObjectNotFoundError(f"No object {file_name}")
+            logger.error(f"Error reading file from S3: {str(e)}")
+            return None, None
+
+        # 'bytes 0-2047/5000' -> 5000
+        content_range = response.get('ContentRange')
+        size = int(content_range.rsplit('/', 1)[-1]) if content_range else len(body)
+        return body, {
+            'ETag': response.get('ETag', '').strip('"'),
+            'VersionId': response.get('VersionId'),
+            'LastModified': response.get('LastModified'),
+            'content_type': response.get('ContentType'),
+            'size': size,
+            **response.get('Metadata', {})
+        }
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024):
+        """
+        Opens an object, or one byte range of it, for streaming.
+        byte_range is a single HTTP range such as 'bytes=0-99', 'bytes=100-'
+        or 'bytes=-100'; S3 resolves it against the object size.
+        Returns: (chunks, metadata) tuple if successful, (None, None) if failed.
+        chunks yields the body chunk_size bytes at a time and releases the
+        connection once exhausted or closed. metadata['length'] is the byte
+        count of chunks, metadata['size'] the full object size.
+        Raises:
+            RangeNotSatisfiableError: If the range starts past the end
+        """
+        kwargs = {'Bucket': self.bucket_name, 'Key': file_name}
+        if byte_range:
+            kwargs['Range'] = byte_range
+        try:
+            # Only the call is timed; the body streams after it returns
+            with observe_stage('s3_get'):
+                response = self.s3_client.get_object(**kwargs)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if error.get('Code') == 'InvalidRange':
+                size = error.get('ActualObjectSize')
+                raise RangeNotSatisfiableError(
+                    "Requested range not satisfiable",
+                    size=int(size) if size is not None else None
+                )
+            logger.error(f"Error opening file in S3: {str(e)}")
+            return None, None
+
+        length = response.get('ContentLength')
+        # 'bytes 0-99/5000' -> 5000
+        content_range = response.get('ContentRange')
+        size = int(content_range.rsplit('/', 1)[-1]) if content_range else length
+        return self._iter_body(response['Body'], chunk_size), {
+            'ETag': response.get('ETag', '').strip('"'),
+            'LastModified': response.get('LastModified'),
+            'content_type': response.get('ContentType'),
+            'content_range': content_range,
+            'length': length,
+            'size': size
+        }
+
+    @staticmethod
+    def _iter_body(body, chunk_size):
+        """Yields an S3 body in chunks; closing the generator closes the body."""
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def generate_presigned_get(self, file_name, expires_in, download_name=None, content_type=None):
+        """
+        Presigns a GET of a private object. S3 answers Range and
+        conditional requests on it itself.
+        Returns: the URL if successful, None if failed
+        """
+        params = {'Bucket': self.bucket_name, 'Key': file_name}
+        if download_name:
+            params['ResponseContentDisposition'] = content_disposition_header(True, download_name)
+        if content_type:
+            params['ResponseContentType'] = content_type
+        try:
+            return self.s3_client.generate_presigned_url(
+                'get_object', Params=params, ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            logger.error(f"Error presigning S3 download: {str(e)}")
+            return None
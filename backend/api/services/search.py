@@ -0,0 +1,181 @@
+# api/services/search.py
+import html
+import re
+from collections import namedtuple
+from typing import List
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+SearchHit = namedtuple('SearchHit', ['id', 'score', 'snippet'])
+
+# Private-use characters mark highlighted terms until the snippet is escaped
+_MARK_START = '\ue000'
+_MARK_END = '\ue001'
+_TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+MAX_QUERY_TERMS = 10
+SNIPPET_TOKENS = 16
+SNIPPET_CHARS = 120
+
+
+def parse_terms(query: str) -> List[str]:
+    """Splits a user query into plain search terms, dropping operators."""
+    return _TERM_PATTERN.findall(query or '')[:MAX_QUERY_TERMS]
+
+
+def _render_snippet(raw: str) -> str:
+    """HTML-escapes a snippet and turns the term markers into <mark> tags."""
+    return (
+        html.escape(raw)
+        .replace(_MARK_START, '<mark>')
+        .replace(_MARK_END, '</mark>')
+    )
+
+
+class SearchIndex:
+    """
+    Full-text index over FileUpload name and content.
+    Subclasses implement the index for a specific database vendor.
+    """
+
+    def index(self, file_upload) -> None:
+        """Adds or refreshes a file in the index."""
+        raise NotImplementedError
+
+    def remove(self, file_id: int) -> None:
+        """Removes a file from the index."""
+        raise NotImplementedError
+
+    def remove_many(self, file_ids: List[int]) -> None:
+        """Removes several files from the index."""
+        for file_id in file_ids:
+            self.remove(file_id)
+
+    def search(self, terms: List[str], limit: int, offset: int = 0) -> List[SearchHit]:
+        """Returns hits for all terms, best match first."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Index(SearchIndex):
+    """
+    Local development index: an FTS5 virtual table whose rowid is the
+    FileUpload id. FTS5 tables are not kept in sync by SQLite, so
+    FileService updates it alongside every create and delete.
+    """
+    table = 'api_fileupload_fts'
+
+    def _match_expression(self, terms: List[str]) -> str:
+        # Every term must match; the last one also matches as a prefix
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def index(self, file_upload) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, name, content) VALUES (%s, %s, %s)",
+                [file_upload.pk, file_upload.name, file_upload.content]
+            )
+
+    def remove(self, file_id: int) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [file_id])
+
+    def remove_many(self, file_ids: List[int]) -> None:
+        # Chunked to stay well under SQLite's bound-parameter limit
+        with connection.cursor() as cursor:
+            for start in range(0, len(file_ids), 500):
+                chunk = file_ids[start:start + 500]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", chunk
+                )
+
+    def search(self, terms: List[str], limit: int, offset: int = 0) -> List[SearchHit]:
+        with connection.cursor() as cursor:
+            # bm25() is lower-is-better; name matches weigh twice as much
+            cursor.execute(
+                f"SELECT rowid, bm25({self.table}, 2.0, 1.0) AS rank, "
+                f"snippet({self.table}, 1, %s, %s, '…', %s) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [_MARK_START, _MARK_END, SNIPPET_TOKENS,
+                 self._match_expression(terms), limit, offset]
+            )
+            return [
+                SearchHit(row_id, -rank, _render_snippet(snippet))
+                for row_id, rank, snippet in cursor.fetchall()
+            ]
+
+
+class MySQLFullTextIndex(SearchIndex):
+    """
+    Production index: InnoDB FULLTEXT indexes on FileUpload.name and
+    FileContent.text. InnoDB maintains them on every write, so
+    index/remove are no-ops.
+    """
+    table = 'api_fileupload'
+    content_table = 'api_filecontent'
+
+    def index(self, file_upload) -> None:
+        pass
+
+    def remove(self, file_id: int) -> None:
+        pass
+
+    def remove_many(self, file_ids: List[int]) -> None:
+        pass
+
+    def _boolean_expression(self, terms: List[str]) -> str:
+        required = [f'+{term}' for term in terms]
+        required[-1] += '*'
+        return ' '.join(required)
+
+    def _snippet(self, content: str, terms: List[str]) -> str:
+        """Cuts a window around the first matching term and marks all terms."""
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        first = pattern.search(content)
+        start = max((first.start() if first else 0) - SNIPPET_CHARS // 2, 0)
+        window = content[start:start + SNIPPET_CHARS]
+        marked = pattern.sub(lambda m: f'{_MARK_START}{m.group(0)}{_MARK_END}', window)
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if start + SNIPPET_CHARS < len(content) else ''
+        return _render_snippet(f'{prefix}{marked}{suffix}')
+
+    def search(self, terms: List[str], limit: int, offset: int = 0) -> List[SearchHit]:
+        natural = ' '.join(terms)
+        boolean = self._boolean_expression(terms)
+        with connection.cursor() as cursor:
+            # A FULLTEXT index covers one table, so all terms must match in
+            # the name or in the body; name matches weigh twice as much
+            cursor.execute(
+                f"SELECT f.id, "
+                f"MATCH(f.name) AGAINST (%s IN NATURAL LANGUAGE MODE) * 2 "
+                f"+ MATCH(c.text) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score, c.text "
+                f"FROM {self.table} f JOIN {self.content_table} c ON c.file_id = f.id "
+                f"WHERE MATCH(f.name) AGAINST (%s IN BOOLEAN MODE) "
+                f"OR MATCH(c.text) AGAINST (%s IN BOOLEAN MODE) "
+                f"ORDER BY score DESC, f.id DESC LIMIT %s OFFSET %s",
+                [natural, natural, boolean, boolean, limit, offset]
+            )
+            return [
+                SearchHit(row_id, score, self._snippet(content, terms))
+                for row_id, score, content in cursor.fetchall()
+            ]
+
+
+_INDEXES = {
+    'sqlite': SQLiteFTS5Index,
+    'mysql': MySQLFullTextIndex,
+}
+
+
+def get_search_index() -> SearchIndex:
+    """Returns the full-text index for the default database."""
+    try:
+        return _INDEXES[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Full-text search is not supported on {connection.vendor}"
+        )
@@ -0,0 +1,113 @@
+# api/services/stats.py
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import FileStat, FileUpload
+
+Dimension = FileStat.Dimension
+
+
+def _bytes(size_kb: float) -> int:
+    # FileUpload.size is bytes / 1024, which a float holds exactly
+    return round((size_kb or 0) * 1024)
+
+
+def _keys(size_kb: float, file_type: str, uploaded_at) -> Iterable[Tuple[str, str]]:
+    yield Dimension.TOTAL, ''
+    yield Dimension.TYPE, file_type or ''
+    yield Dimension.DAY, timezone.localdate(uploaded_at).isoformat()
+
+
+def record_files(files: Iterable[Tuple[float, str, object]], sign: int = 1) -> None:
+    """
+    Adds (sign=1) or removes (sign=-1) committed files from the counters,
+    given as (size, file_type, uploaded_at). Must run inside the
+    transaction that writes the files, so both commit or neither does.
+    """
+    deltas: Dict[Tuple[str, str], list] = defaultdict(lambda: [0, 0])
+    for size, file_type, uploaded_at in files:
+        for key in _keys(size, file_type, uploaded_at):
+            deltas[key][0] += sign
+            deltas[key][1] += sign * _bytes(size)
+
+    # Rows are locked in one global order, so concurrent writers never deadlock
+    for (dimension, key), (count, size) in sorted(deltas.items()):
+        _apply(dimension, key, count, size)
+
+
+def _apply(dimension: str, key: str, count: int, size: int) -> None:
+    rows = FileStat.objects.filter(dimension=dimension, key=key)
+    if rows.update(file_count=F('file_count') + count, total_bytes=F('total_bytes') + size):
+        return
+    try:
+        with transaction.atomic():
+            FileStat.objects.create(dimension=dimension, key=key, file_count=count, total_bytes=size)
+    except IntegrityError:
+        # Created concurrently since the update
+        rows.update(file_count=F('file_count') + count, total_bytes=F('total_bytes') + size)
+
+
+def record_file(file_upload: FileUpload, sign: int = 1) -> None:
+    """record_files for a single row."""
+    record_files([(file_upload.size, file_upload.file_type, file_upload.uploaded_at)], sign)
+
+
+def get_stats() -> Dict:
+    """
+    The dashboard totals: file count and bytes overall, by type and by
+    day. Reads the counters only, one row per type and per day.
+    """
+    rows = FileStat.objects.filter(file_count__gt=0).values_list(
+        'dimension', 'key', 'file_count', 'total_bytes'
+    )
+    stats = {'total_files': 0, 'total_bytes': 0, 'by_type': [], 'by_day': []}
+    for dimension, key, count, size in rows:
+        if dimension == Dimension.TOTAL:
+            stats['total_files'], stats['total_bytes'] = count, size
+        elif dimension == Dimension.TYPE:
+            stats['by_type'].append({'file_type': key, 'count': count, 'bytes': size})
+        else:
+            stats['by_day'].append({'date': key, 'count': count, 'bytes': size})
+    stats['by_type'].sort(key=lambda item: (-item['count'], item['file_type']))
+    stats['by_day'].sort(key=lambda item: item['date'])
+    return stats
+
+
+def rebuild_stats() -> Dict[str, int]:
+    """
+    Recomputes every counter from the committed files, replacing the old
+    rows in one transaction. For recovery after writes that bypassed
+    FileService, such as admin deletes or raw SQL.
+    Returns the number of rows written per dimension.
+    """
+    committed = FileUpload.objects.committed().order_by()
+    rows = []
+    with transaction.atomic():
+        FileStat.objects.all().delete()
+        total = committed.aggregate(count=Count('id'), size=Sum('size'))
+        if total['count']:
+            rows.append(FileStat(
+                dimension=Dimension.TOTAL, file_count=total['count'], total_bytes=_bytes(total['size'])
+            ))
+        for file_type, count, size in committed.values_list('file_type').annotate(
+            count=Count('id'), size=Sum('size')
+        ):
+            rows.append(FileStat(
+                dimension=Dimension.TYPE, key=file_type or '', file_count=count, total_bytes=_bytes(size)
+            ))
+        for day, count, size in committed.annotate(day=TruncDate('uploaded_at')).values_list('day').annotate(
+            count=Count('id'), size=Sum('size')
+        ):
+            rows.append(FileStat(
+                dimension=Dimension.DAY, key=day.isoformat(), file_count=count, total_bytes=_bytes(size)
+            ))
+        FileStat.objects.bulk_create(rows)
+    counts = defaultdict(int)
+    for row in rows:
+        counts[row.dimension] += 1
+    return dict(counts)
@@ -0,0 +1,636 @@
+# api/services/storage.py
+import hashlib
+import json
+import logging
+import mimetypes
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from ..exceptions import ObjectNotFoundError
+from ..metrics import CACHE_BYTES, CACHE_REQUESTS
+from ..utils.ranges import resolve_byte_range
+
+logger = logging.getLogger(__name__)
+
+# FILE_STORAGE_BACKEND shorthands; any other value is a dotted class path
+BACKENDS = {
+    's3': 'api.services.s3.S3Service',
+    'local': 'api.services.storage.LocalStorage',
+    'memory': 'api.services.storage.MemoryStorage',
+}
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend:
+    """
+    Object store holding file bodies under flat keys.
+    Subclasses implement it for a specific store; S3Service is the
+    reference implementation and documents each return value.
+    """
+
+    def get_url(self, file_name: str) -> str:
+        """Returns the object URL stored on FileUpload.s3_url."""
+        raise NotImplementedError
+
+    def upload_file(self, file_obj, file_name, content_type=None, metadata=None) -> Tuple:
+        """Writes an object. Returns (url, metadata), or (None, None) if failed."""
+        raise NotImplementedError
+
+    def get_object(self, file_name, max_bytes) -> Tuple:
+        """
+        Reads at most max_bytes. Returns (body, metadata), or (None, None).
+        Raises ObjectNotFoundError if there is no such object.
+        """
+        raise NotImplementedError
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024) -> Tuple:
+        """Opens an object or one byte range for streaming. Returns (chunks, metadata)."""
+        raise NotImplementedError
+
+    def delete_file(self, file_name) -> Optional[bool]:
+        """Deletes one object. Returns True if deleted."""
+        raise NotImplementedError
+
+    def delete_files(self, file_names) -> Dict[str, str]:
+        """Deletes many objects. Returns {key: error message} for failures."""
+        errors = {}
+        for file_name in file_names:
+            if not self.delete_file(file_name):
+                errors[file_name] = 'Delete failed'
+        return errors
+
+    def list_objects(self) -> Iterator[Tuple[str, datetime]]:
+        """Yields (key, last_modified) for every object."""
+        raise NotImplementedError
+
+    def is_local(self, file_name) -> bool:
+        """Whether reading the object stays on this host."""
+        return False
+
+    def generate_presigned_post(self, file_name, content_type, min_size, max_size, expires_in):
+        """Presigns a browser upload. None when the store cannot take one."""
+        return None
+
+    def generate_presigned_get(self, file_name, expires_in, download_name=None, content_type=None):
+        """Presigns a download. None when the store cannot serve one."""
+        return None
+
+
+class LocalFileChunks:
+    """
+    Bytes [offset, offset + length) of an open local file. Iterating reads
+    them through an mmap of the file, so chunks come straight from the page
+    cache without read() calls. A whole file can instead be handed to the
+    server as .file, which lets it use sendfile().
+    """
+
+    def __init__(self, file, offset: int, length: int, chunk_size: int):
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        try:
+            if self.length:
+                with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    end = self.offset + self.length
+                    for start in range(self.offset, end, self.chunk_size):
+                        yield mapped[start:min(start + self.chunk_size, end)]
+        finally:
+            self.file.close()
+
+    def close(self):
+        self.file.close()
+
+
+def _serialize_info(info: Dict) -> Dict:
+    last_modified = info.get('LastModified')
+    if isinstance(last_modified, datetime):
+        info = {**info, 'LastModified': last_modified.isoformat()}
+    return info
+
+
+def _deserialize_info(info: Dict) -> Dict:
+    last_modified = info.get('LastModified')
+    if isinstance(last_modified, str):
+        info = {**info, 'LastModified': parse_datetime(last_modified)}
+    return info
+
+
+def _iter_file(file_obj, chunk_size=_COPY_CHUNK_SIZE) -> Iterator[bytes]:
+    return iter(lambda: file_obj.read(chunk_size), b'')
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as files in one directory on this host. Each object's ETag,
+    content type and metadata sit in a JSON sidecar under .meta/. Writes
+    go through a temporary file and a rename, so readers never see a
+    partial object.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or settings.FILE_STORAGE_LOCAL_ROOT)
+        self.meta_root = self.root / '.meta'
+        self.meta_root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, file_name: str) -> Path:
+        # Keys are flat; anything else could escape the root
+        if not file_name or os.path.basename(file_name) != file_name or file_name.startswith('.'):
+            raise ValueError(f"Invalid object key: {file_name!r}")
+        return self.root / file_name
+
+    def _meta_path(self, file_name: str) -> Path:
+        return self.meta_root / f"{file_name}.json"
+
+    def get_url(self, file_name):
+        return self._path(file_name).absolute().as_uri()
+
+    def is_local(self, file_name):
+        return True
+
+    def write_object(self, file_name: str, chunks: Iterable[bytes], info: Dict) -> int:
+        """
+        Stores an object from an iterable of chunks, replacing any existing
+        one. A missing ETag is filled in with the body's MD5.
+        Returns: the object size
+        """
+        path = self._path(file_name)
+        digest = hashlib.md5()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            info = {'ETag': digest.hexdigest(), **{k: v for k, v in info.items() if v is not None}}
+            # The sidecar goes first: an object file never lacks one
+            meta_fd, meta_temp_path = tempfile.mkstemp(dir=self.meta_root, prefix='.upload-')
+            with os.fdopen(meta_fd, 'w') as meta_file:
+                json.dump(_serialize_info(info), meta_file)
+            os.replace(meta_temp_path, self._meta_path(file_name))
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return size
+
+    def stat(self, file_name: str) -> Optional[Dict]:
+        """The stored info of an object plus its size, or None if it is missing."""
+        try:
+            size = self._path(file_name).stat().st_size
+            with open(self._meta_path(file_name)) as meta_file:
+                info = _deserialize_info(json.load(meta_file))
+        except (FileNotFoundError, ValueError):
+            return None
+        return {'size': size, **info}
+
+    def upload_file(self, file_obj, file_name, content_type=None, metadata=None):
+        info = {
+            'content_type': content_type or mimetypes.guess_type(file_name)[0],
+            'LastModified': timezone.now(),
+            'Metadata': metadata or {},
+        }
+        try:
+            self.write_object(file_name, _iter_file(file_obj), info)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error writing file to local storage: {str(e)}")
+            return None, None
+        stored = self.stat(file_name)
+        return self.get_url(file_name), {
+            'ETag': stored['ETag'],
+            'VersionId': None,
+            'LastModified': stored['LastModified'],
+            **stored['Metadata']
+        }
+
+    def get_object(self, file_name, max_bytes):
+        try:
+            info = self.stat(file_name)
+            if info is not None:
+                with open(self._path(file_name), 'rb') as body_file:
+                    body = body_file.read(max_bytes)
+        except FileNotFoundError:
+            # Deleted since stat()
+            info = None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading file from local storage: {str(e)}")
+            return None, None
+        if info is None:
+            raise ObjectNotFoundError(f"No object {file_name}")
+        return body, {
+            'ETag': info['ETag'],
+            'VersionId': None,
+            'LastModified': info.get('LastModified'),
+            'content_type': info.get('content_type'),
+            'size': info['size'],
+            **info.get('Metadata', {})
+        }
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024):
+        """
+        Opens an object like S3Service.open_object. chunks is a
+        LocalFileChunks, so callers can serve the file itself.
+        Raises:
+            RangeNotSatisfiableError: If the range starts past the end
+        """
+        info = self.stat(file_name)
+        if info is None:
+            return None, None
+        try:
+            body_file = open(self._path(file_name), 'rb')
+        except OSError as e:
+            logger.error(f"Error opening file in local storage: {str(e)}")
+            return None, None
+        size = os.fstat(body_file.fileno()).st_size
+        start, length, content_range = 0, size, None
+        if byte_range:
+            try:
+                first, last = resolve_byte_range(byte_range, size)
+            except Exception:
+                body_file.close()
+                raise
+            start, length = first, last - first + 1
+            content_range = f"bytes {first}-{last}/{size}"
+        body_file.seek(start)
+        return LocalFileChunks(body_file, start, length, chunk_size), {
+            'ETag': info['ETag'],
+            'LastModified': info.get('LastModified'),
+            'content_type': info.get('content_type'),
+            'content_range': content_range,
+            'length': length,
+            'size': size
+        }
+
+    def _remove(self, file_name: str) -> None:
+        for path in (self._path(file_name), self._meta_path(file_name)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def delete_file(self, file_name):
+        logger.info(f"trying to delete file  : {file_name}")
+        try:
+            self._remove(file_name)
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"Error deleting file from local storage: {str(e)}")
+
+    def list_objects(self):
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                yield entry.name, datetime.fromtimestamp(entry.stat().st_mtime, tz=dt_timezone.utc)
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Objects in a dict shared by every instance in the process. For tests
+    and development; nothing survives a restart.
+    """
+    _objects: Dict[str, Tuple[bytes, Dict]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._objects.clear()
+
+    def get_url(self, file_name):
+        return f"memory://{file_name}"
+
+    def is_local(self, file_name):
+        return True
+
+    def upload_file(self, file_obj, file_name, content_type=None, metadata=None):
+        body = file_obj.read()
+        info = {
+            'ETag': hashlib.md5(body).hexdigest(),
+            'LastModified': timezone.now(),
+            'content_type': content_type or mimetypes.guess_type(file_name)[0],
+            'Metadata': dict(metadata or {}),
+        }
+        with self._lock:
+            self._objects[file_name] = (body, info)
+        return self.get_url(file_name), {
+            'ETag': info['ETag'], 'VersionId': None, 'LastModified': info['LastModified'], **info['Metadata']
+        }
+
+    def _get(self, file_name):
+        with self._lock:
+            return self._objects.get(file_name, (None, None))
+
+    def get_object(self, file_name, max_bytes):
+        body, info = self._get(file_name)
+        if body is None:
+            raise ObjectNotFoundError(f"No object {file_name}")
+        return body[:max_bytes], {
+            'ETag': info['ETag'],
+            'VersionId': None,
+            'LastModified': info['LastModified'],
+            'content_type': info['content_type'],
+            'size': len(body),
+            **info['Metadata']
+        }
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024):
+        body, info = self._get(file_name)
+        if body is None:
+            return None, None
+        size = len(body)
+        start, end, content_range = 0, size - 1, None
+        if byte_range:
+            start, end = resolve_byte_range(byte_range, size)
+            content_range = f"bytes {start}-{end}/{size}"
+        view = memoryview(body)[start:end + 1]
+        return (bytes(view[i:i + chunk_size]) for i in range(0, len(view), chunk_size)), {
+            'ETag': info['ETag'],
+            'LastModified': info['LastModified'],
+            'content_type': info['content_type'],
+            'content_range': content_range,
+            'length': len(view),
+            'size': size
+        }
+
+    def delete_file(self, file_name):
+        with self._lock:
+            self._objects.pop(file_name, None)
+        return True
+
+    def list_objects(self):
+        with self._lock:
+            items = [(key, info['LastModified']) for key, (_, info) in self._objects.items()]
+        yield from items
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class DiskCache(LocalStorage):
+    """
+    A LocalStorage directory bounded to max_bytes, evicting the least
+    recently used objects first. Objects above max_object_bytes are never
+    cached. Recency is tracked in memory and mirrored in file mtimes, so
+    a restarted process picks up the directory in roughly LRU order.
+
+    Each process enforces the bound on the entries it knows about; give
+    every worker process its own directory for a strict bound.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_object_bytes: int):
+        super().__init__(root)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        found = []
+        for file_name, last_used in self.list_objects():
+            info = LocalStorage.stat(self, file_name)
+            if info is not None:
+                found.append((last_used, file_name, info))
+        with self._lock:
+            for _, file_name, info in sorted(found, key=lambda item: item[0]):
+                self._entries[file_name] = info
+                self._size += info['size']
+        self._evict()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def contains(self, file_name: str) -> bool:
+        with self._lock:
+            return file_name in self._entries
+
+    def stat(self, file_name):
+        with self._lock:
+            info = self._entries.get(file_name)
+            if info is not None:
+                self._entries.move_to_end(file_name)
+        return info
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024):
+        known = self.contains(file_name)
+        try:
+            chunks, metadata = super().open_object(file_name, byte_range, chunk_size)
+        except FileNotFoundError:
+            chunks, metadata = None, None
+        if chunks is None:
+            if known:
+                # Evicted by another process
+                self.discard([file_name])
+        else:
+            try:
+                os.utime(self._path(file_name))
+            except OSError:
+                pass
+        CACHE_REQUESTS.labels('hit' if chunks is not None else 'miss').inc()
+        return chunks, metadata
+
+    def put(self, file_name: str, chunks: Iterable[bytes], info: Dict) -> bool:
+        """
+        Caches an object, evicting older ones past the size bound.
+        Returns False, caching nothing, once the object proves too large.
+        """
+        def bounded(chunks):
+            size = 0
+            for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_object_bytes:
+                    raise _TooLarge
+                yield chunk
+
+        try:
+            size = self.write_object(file_name, bounded(chunks), info)
+        except _TooLarge:
+            return False
+        stored = LocalStorage.stat(self, file_name)
+        if stored is None:
+            return False
+        with self._lock:
+            previous = self._entries.pop(file_name, None)
+            self._size += size - (previous['size'] if previous else 0)
+            self._entries[file_name] = stored
+        self._evict()
+        return True
+
+    def _evict(self):
+        evicted = []
+        with self._lock:
+            while self._size > self.max_bytes and self._entries:
+                file_name, info = self._entries.popitem(last=False)
+                self._size -= info['size']
+                evicted.append(file_name)
+            CACHE_BYTES.set(self._size)
+        for file_name in evicted:
+            self._remove(file_name)
+
+    def discard(self, file_names: Iterable[str]) -> None:
+        """Drops objects from the cache, e.g. once they are deleted upstream."""
+        file_names = list(file_names)
+        with self._lock:
+            for file_name in file_names:
+                info = self._entries.pop(file_name, None)
+                if info is not None:
+                    self._size -= info['size']
+            CACHE_BYTES.set(self._size)
+        for file_name in file_names:
+            try:
+                self._remove(file_name)
+            except (OSError, ValueError):
+                pass
+
+
+class TieredStorage(StorageBackend):
+    """
+    A backend fronted by a DiskCache. Uploads are written through to both;
+    downloads are served from disk, fetching the whole object into the
+    cache on a miss, so repeated reads of a hot file never leave the host.
+    Listing, presigning and direct-upload checks go to the backend.
+    """
+
+    def __init__(self, backend: StorageBackend, cache: DiskCache):
+        self.backend = backend
+        self.cache = cache
+
+    def get_url(self, file_name):
+        return self.backend.get_url(file_name)
+
+    def is_local(self, file_name):
+        return self.backend.is_local(file_name) or self.cache.contains(file_name)
+
+    def upload_file(self, file_obj, file_name, content_type=None, metadata=None):
+        url, s3_metadata = self.backend.upload_file(file_obj, file_name, content_type, metadata)
+        if url is not None:
+            # Best effort: the upload has succeeded either way
+            try:
+                file_obj.seek(0)
+                self.cache.put(file_name, _iter_file(file_obj), {
+                    'ETag': s3_metadata.get('ETag'),
+                    'LastModified': s3_metadata.get('LastModified'),
+                    'content_type': content_type or mimetypes.guess_type(file_name)[0],
+                    'Metadata': metadata or {},
+                })
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not cache {file_name}: {str(e)}")
+        return url, s3_metadata
+
+    def get_object(self, file_name, max_bytes):
+        if self.cache.contains(file_name):
+            try:
+                body, metadata = self.cache.get_object(file_name, max_bytes)
+            except ObjectNotFoundError:
+                # Evicted since contains()
+                body = None
+            if body is not None:
+                return body, metadata
+        return self.backend.get_object(file_name, max_bytes)
+
+    def _fill(self, file_name, chunk_size) -> bool:
+        """Copies a whole object into the cache. Returns False if it was not cached."""
+        chunks, metadata = self.backend.open_object(file_name, None, chunk_size)
+        if chunks is None:
+            return False
+        try:
+            if metadata['size'] > self.cache.max_object_bytes:
+                return False
+            return self.cache.put(file_name, chunks, {
+                'ETag': metadata.get('ETag'),
+                'LastModified': metadata.get('LastModified'),
+                'content_type': metadata.get('content_type'),
+            })
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not cache {file_name}: {str(e)}")
+            return False
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def open_object(self, file_name, byte_range=None, chunk_size=64 * 1024):
+        chunks, metadata = self.cache.open_object(file_name, byte_range, chunk_size)
+        if chunks is None and self._fill(file_name, chunk_size):
+            chunks, metadata = self.cache.open_object(file_name, byte_range, chunk_size)
+        if chunks is None:
+            return self.backend.open_object(file_name, byte_range, chunk_size)
+        return chunks, metadata
+
+    def delete_file(self, file_name):
+        self.cache.discard([file_name])
+        return self.backend.delete_file(file_name)
+
+    def delete_files(self, file_names):
+        file_names = list(file_names)
+        self.cache.discard(file_names)
+        return self.backend.delete_files(file_names)
+
+    def list_objects(self):
+        return self.backend.list_objects()
+
+    def generate_presigned_post(self, file_name, content_type, min_size, max_size, expires_in):
+        return self.backend.generate_presigned_post(file_name, content_type, min_size, max_size, expires_in)
+
+    def generate_presigned_get(self, file_name, expires_in, download_name=None, content_type=None):
+        return self.backend.generate_presigned_get(file_name, expires_in, download_name, content_type)
+
+
+# One cache per directory per process: its index must outlive requests
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_disk_cache(directory: str) -> DiskCache:
+    """Returns the process-wide cache over a directory, loading it on first use."""
+    cache = _caches.get(directory)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(directory)
+            if cache is None:
+                cache = _caches[directory] = DiskCache(
+                    directory,
+                    settings.FILE_STORAGE_CACHE_MAX_BYTES,
+                    settings.FILE_STORAGE_CACHE_MAX_OBJECT_BYTES
+                )
+    return cache
+
+
+def get_storage() -> StorageBackend:
+    """
+    Returns the FILE_STORAGE_BACKEND backend, behind the disk cache when
+    FILE_STORAGE_CACHE_DIR is set. Backends are cheap to build; their
+    clients and caches are shared per process.
+    """
+    path = BACKENDS.get(settings.FILE_STORAGE_BACKEND, settings.FILE_STORAGE_BACKEND)
+    try:
+        backend = import_string(path)()
+    except ImportError:
+        raise ImproperlyConfigured(f"Unknown file storage backend: {settings.FILE_STORAGE_BACKEND}")
+    if settings.FILE_STORAGE_CACHE_DIR:
+        return TieredStorage(backend, get_disk_cache(settings.FILE_STORAGE_CACHE_DIR))
+    return backend
@@ -0,0 +1,6 @@
+"""
+Opt-in benchmarks. They are not collected by the default test run; execute
+them explicitly with:
+
+    python manage.py test api.tests.benchmarks --pattern "bench_*.py"
+"""
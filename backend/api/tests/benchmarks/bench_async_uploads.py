@@ -0,0 +1,51 @@
+import asyncio
+import time
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase
+from api.tests.s3_stub import FakeS3Client, patch_s3
+
+UPLOADS = 100
+# Simulated S3 round trip of a slow upload, in seconds
+LATENCY = 0.1
+
+
+def _upload(url, i):
+    # Distinct bodies, so deduplication never skips the S3 upload
+    body = f'load test {url} {i:03d} '.encode() * 40
+    return SimpleUploadedFile('notes.txt', body, content_type='text/plain')
+
+
+class AsyncUploadConcurrencyBenchmark(TestCase):
+    """
+    Concurrent slow uploads against one ASGI process: the sync DRF endpoint
+    vs the native async one. Django runs sync views on a single shared
+    thread under ASGI, so the former handles one upload at a time.
+    """
+
+    async def _burst(self, url):
+        s3_client = FakeS3Client()
+        s3_client.latency = LATENCY
+        with patch_s3(s3_client):
+            client = AsyncClient()
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post(url, {'file': _upload(url, i)}) for i in range(UPLOADS)
+            ))
+            elapsed = time.perf_counter() - start
+        self.assertTrue(all(response.status_code == 201 for response in responses))
+        return elapsed, s3_client.peak_concurrency
+
+    async def test_concurrent_slow_uploads(self):
+        sync_elapsed, sync_peak = await self._burst('/api/files/')
+        async_elapsed, async_peak = await self._burst('/api/async/files/')
+
+        print(
+            f"\n{UPLOADS} concurrent uploads, {LATENCY * 1000:.0f} ms S3 latency: "
+            f"sync view {sync_elapsed:.2f}s ({UPLOADS / sync_elapsed:.0f}/s, "
+            f"peak {sync_peak} in flight), "
+            f"async view {async_elapsed:.2f}s ({UPLOADS / async_elapsed:.0f}/s, "
+            f"peak {async_peak} in flight)"
+        )
+        self.assertEqual(sync_peak, 1)
+        self.assertGreater(async_peak, 1)
+        self.assertLess(async_elapsed, sync_elapsed)
@@ -0,0 +1,45 @@
+import os
+import time
+from django.test import SimpleTestCase
+from api.services.content_validator import ContentValidator
+from api.tests.test_content_validator import legacy_is_malicious, load_corpus
+
+# Sizes each corpus file is repeated up to before scanning
+SIZES = (2 * 1024, 256 * 1024)
+ROUNDS = int(os.getenv('SCAN_BENCH_ROUNDS', 20))
+# Worst acceptable scan cost; raise it deliberately if a new rule needs it
+BUDGET_MS_PER_MB = float(os.getenv('SCAN_BUDGET_MS_PER_MB', 100))
+
+
+def _grow(text, size):
+    return (text * (size // len(text) + 1))[:size]
+
+
+def _timed(func, samples):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for sample in samples:
+            func(sample)
+    return time.perf_counter() - start
+
+
+class ContentScanBenchmark(SimpleTestCase):
+    """Scan throughput over the benign/malicious corpus, engine vs legacy."""
+
+    def test_scan_throughput(self):
+        scan = ContentValidator.SCANNER.scan
+        for kind in ('benign', 'malicious'):
+            for size in SIZES:
+                samples = [_grow(text, size) for text in load_corpus(kind).values()]
+                megabytes = ROUNDS * sum(len(sample) for sample in samples) / (1024 * 1024)
+
+                engine = _timed(scan, samples)
+                legacy = _timed(legacy_is_malicious, samples)
+                ms_per_mb = engine * 1000 / megabytes
+
+                print(
+                    f"\n{kind:9} {size // 1024:4d} KiB: engine {megabytes / engine:8.1f} MB/s "
+                    f"({ms_per_mb:.2f} ms/MB), legacy {megabytes / legacy:8.1f} MB/s"
+                )
+                self.assertLessEqual(engine, legacy)
+                self.assertLessEqual(ms_per_mb, BUDGET_MS_PER_MB)
@@ -0,0 +1,43 @@
+import os
+from django.db import connection
+from django.test import TransactionTestCase
+from api.tests.s3_stub import FakeS3Client, patch_s3
+from .loadtest import BaselineStore, LoadConfig, LoadRunner, compare_to_baseline, format_results
+
+
+class LoadMixBenchmark(TransactionTestCase):
+    """
+    Concurrent upload/list/retrieve/delete mix through the real viewset,
+    with the in-process S3 stub standing in for S3. Fails when p95 latency
+    or throughput regresses past BENCH_TOLERANCE against the saved baseline
+    for the same scenario; see loadtest.py for the knobs.
+
+    SQLite's in-memory test database cannot take concurrent writers, so
+    runs on it use one client. Point SQLITE_TEST_NAME at a file (or use
+    MySQL) to run concurrently.
+    """
+
+    def test_load_mix(self):
+        config = LoadConfig.from_env()
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            config.concurrency = 1
+
+        s3_client = FakeS3Client()
+        s3_client.latency = config.s3_latency
+        with patch_s3(s3_client):
+            results = LoadRunner(config).run()
+
+        scenario = config.scenario()
+        print(f"\n{scenario}\n{format_results(results)}")
+        self.assertEqual(results['errors'], 0)
+
+        store = BaselineStore('load_mix')
+        baseline = store.load().get(scenario)
+        if baseline is None or os.environ.get('BENCH_UPDATE_BASELINE') == '1':
+            store.save(scenario, config, results)
+            print(f"Baseline saved to {store.path}")
+            return
+
+        tolerance = float(os.environ.get('BENCH_TOLERANCE', 0.3))
+        regressions = compare_to_baseline(results, baseline, tolerance)
+        self.assertFalse(regressions, "Regressed against baseline:\n" + '\n'.join(regressions))
@@ -0,0 +1,50 @@
+import time
+import boto3
+from django.conf import settings
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+from api.services.s3 import get_s3_client, reset_s3_client
+from api.views import FileUploadViewSet
+
+ITERATIONS = 200
+
+
+def _per_call_ms(func, iterations=ITERATIONS):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+class S3ClientOverheadBenchmark(SimpleTestCase):
+    """Per-request cost of getting an S3 client: new client vs shared client."""
+
+    def setUp(self):
+        reset_s3_client()
+        get_s3_client()
+        self.request = APIRequestFactory().get('/api/files/')
+
+    def _new_client(self):
+        # What every request paid before the client was shared
+        return boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION
+        )
+
+    def _dispatch_view(self):
+        # Builds the viewset (and its FileService/S3Service) like DRF does
+        FileUploadViewSet.as_view({'get': 'list'}).cls()
+
+    def test_client_overhead(self):
+        before = _per_call_ms(self._new_client, iterations=20)
+        after = _per_call_ms(get_s3_client)
+        view = _per_call_ms(self._dispatch_view)
+
+        print(
+            f"\nS3 client per request: new client {before:.3f} ms, "
+            f"shared client {after:.5f} ms, viewset construction {view:.3f} ms"
+        )
+        self.assertLess(after, before)
+        self.assertLess(view, before)
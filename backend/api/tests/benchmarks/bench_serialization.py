@@ -0,0 +1,69 @@
+import time
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from api.models import FileUpload
+from api.renderers import ORJSONRenderer
+from api.serializers import FileUploadListSerializer
+from api.utils.response import build_response_body
+
+ROW_COUNTS = (1_000, 10_000, 100_000)
+
+
+def _seed(count):
+    FileUpload.objects.bulk_create([
+        FileUpload(
+            name=f'file-{i}.txt', size=1.5, content='x', file_type='text/plain',
+            s3_url=f'https://test-bucket.s3.amazonaws.com/{i}.txt',
+            s3_etag=f'{i:032x}', s3_version_id=str(i),
+            s3_metadata={'original_name': f'file-{i}.txt', 'content_type': 'text/plain', 'size': '1536'},
+            content_hash=f'{i:064x}'
+        )
+        for i in range(count)
+    ], batch_size=5000)
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+class SerializationThroughputBenchmark(TestCase):
+    """
+    Listing cost for the old path (model instances, ModelSerializer,
+    JSONRenderer) and the fast path (.values() rows, from_values,
+    ORJSONRenderer), split into the database fetch and the
+    serialize + render step.
+    """
+
+    def _model_serializer(self, rows):
+        data = FileUploadListSerializer(rows, many=True).data
+        return JSONRenderer().render(build_response_body(data, message="Files retrieved successfully"))
+
+    def _values(self, rows):
+        data = FileUploadListSerializer.from_values(rows)
+        return ORJSONRenderer().render(build_response_body(data, message="Files retrieved successfully"))
+
+    def test_throughput(self):
+        seeded = 0
+        columns = FileUploadListSerializer.ordered_fields()
+        print()
+        for count in ROW_COUNTS:
+            _seed(count - seeded)
+            seeded = count
+            queryset = FileUpload.objects.order_by('-uploaded_at', '-id')
+
+            old_fetch, instances = _timed(lambda: list(queryset.only(*columns)))
+            old_render, old_body = _timed(lambda: self._model_serializer(instances))
+            new_fetch, rows = _timed(lambda: list(queryset.values(*columns)))
+            new_render, new_body = _timed(lambda: self._values(rows))
+
+            print(
+                f"{count:>7} rows | serialize+render: ModelSerializer+JSONRenderer "
+                f"{count / old_render:>9,.0f} rows/s, values+orjson {count / new_render:>9,.0f} rows/s "
+                f"({old_render / new_render:.1f}x) | with fetch: {old_fetch + old_render:.3f}s vs "
+                f"{new_fetch + new_render:.3f}s ({(old_fetch + old_render) / (new_fetch + new_render):.1f}x)"
+            )
+            # Identical but for the envelope timestamp
+            self.assertEqual(old_body[old_body.index(b'"data"'):], new_body[new_body.index(b'"data"'):])
+            self.assertLess(new_render, old_render)
@@ -0,0 +1,288 @@
+"""
+Load-test harness: drives a weighted mix of upload, list, retrieve and
+delete requests through the full Django stack from concurrent clients,
+and compares the results with a saved JSON baseline.
+
+Scale is configured through the environment:
+
+    BENCH_OPERATIONS    requests in the timed run (default 1000)
+    BENCH_CONCURRENCY   concurrent clients (default 8)
+    BENCH_MIX           weights, e.g. "upload=4,list=3,retrieve=2,delete=1"
+    BENCH_SEED_FILES    files uploaded before the run (default 200)
+    BENCH_S3_LATENCY    simulated S3 round trip in seconds (default 0)
+    BENCH_RANDOM_SEED   seed of the request sequence (default 1234)
+    BENCH_TOLERANCE     allowed regression, as a fraction (default 0.3)
+    BENCH_UPDATE_BASELINE=1 overwrites the saved baseline with this run
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.test import Client
+
+OPERATIONS = ('upload', 'list', 'retrieve', 'delete')
+EXPECTED_STATUS = {'upload': 201, 'list': 200, 'retrieve': 200, 'delete': 204}
+PERCENTILES = (50, 95, 99)
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def _parse_mix(raw):
+    mix = {}
+    for item in raw.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in BENCH_MIX: {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+class LoadConfig:
+    """Scale and shape of a load run."""
+
+    def __init__(self, operations=1000, concurrency=8, mix=None, seed_files=200,
+                 s3_latency=0.0, random_seed=1234):
+        self.operations = operations
+        self.concurrency = concurrency
+        self.mix = mix or {'upload': 4, 'list': 3, 'retrieve': 2, 'delete': 1}
+        self.seed_files = seed_files
+        self.s3_latency = s3_latency
+        self.random_seed = random_seed
+
+    @classmethod
+    def from_env(cls, **defaults):
+        env = os.environ
+        config = cls(**defaults)
+        config.operations = int(env.get('BENCH_OPERATIONS', config.operations))
+        config.concurrency = int(env.get('BENCH_CONCURRENCY', config.concurrency))
+        if 'BENCH_MIX' in env:
+            config.mix = _parse_mix(env['BENCH_MIX'])
+        config.seed_files = int(env.get('BENCH_SEED_FILES', config.seed_files))
+        config.s3_latency = float(env.get('BENCH_S3_LATENCY', config.s3_latency))
+        config.random_seed = int(env.get('BENCH_RANDOM_SEED', config.random_seed))
+        return config
+
+    def scenario(self):
+        """Baseline key: results are only compared between identical setups."""
+        mix = ','.join(f"{name}={self.mix[name]:g}" for name in OPERATIONS if name in self.mix)
+        database = connection.vendor
+        if database == 'sqlite' and connection.is_in_memory_db():
+            database += '-memory'
+        return (
+            f"{database}/ops={self.operations}/c={self.concurrency}/"
+            f"seed_files={self.seed_files}/s3_latency={self.s3_latency:g}/{mix}"
+        )
+
+    def as_dict(self):
+        return {
+            'operations': self.operations,
+            'concurrency': self.concurrency,
+            'mix': self.mix,
+            'seed_files': self.seed_files,
+            's3_latency': self.s3_latency,
+            'random_seed': self.random_seed,
+        }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class FilePool:
+    """
+    Ids the run may read or delete. Retrieves only target files that are
+    never deleted, so every request has a well-defined expected status.
+    """
+
+    def __init__(self, stable, deletable):
+        self.stable = list(stable)
+        self._deletable = deque(deletable)
+        self._lock = threading.Lock()
+
+    def add(self, file_id):
+        with self._lock:
+            self._deletable.append(file_id)
+
+    def take(self):
+        with self._lock:
+            return self._deletable.popleft() if self._deletable else None
+
+
+class LoadRunner:
+    """Runs one load scenario against the API with Django's test client."""
+
+    def __init__(self, config):
+        self.config = config
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def _body(self):
+        # Distinct bodies, so deduplication never skips the S3 upload
+        with self._counter_lock:
+            self._counter += 1
+            n = self._counter
+        return SimpleUploadedFile(
+            'load.txt', f'load test file {n:08d} '.encode() * 40, content_type='text/plain'
+        )
+
+    def _upload(self, client):
+        response = client.post('/api/files/', {'file': self._body()})
+        file_id = response.json()['data'].get('id') if response.status_code == 201 else None
+        return response, file_id
+
+    def seed(self):
+        """Uploads the files list, retrieve and delete work on. Untimed."""
+        client = Client()
+        ids = [self._upload(client)[1] for _ in range(self.config.seed_files)]
+        ids = [file_id for file_id in ids if file_id is not None]
+        half = len(ids) // 2
+        return FilePool(ids[:half], ids[half:])
+
+    def _schedule(self):
+        rng = random.Random(self.config.random_seed)
+        names = list(self.config.mix)
+        return rng.choices(names, weights=[self.config.mix[name] for name in names], k=self.config.operations)
+
+    def _request(self, client, pool, rng, operation):
+        if operation == 'upload':
+            response, file_id = self._upload(client)
+            if file_id is not None:
+                pool.add(file_id)
+            return response
+        if operation == 'list':
+            return client.get('/api/files/', {'page_size': 50})
+        if operation == 'retrieve':
+            return client.get(f'/api/files/{rng.choice(pool.stable)}/')
+        file_id = pool.take()
+        if file_id is None:
+            return None
+        return client.delete(f'/api/files/{file_id}/')
+
+    def _worker(self, operations, pool, worker_index):
+        client = Client()
+        rng = random.Random(self.config.random_seed + worker_index)
+        samples = []
+        try:
+            for operation in operations:
+                start = time.perf_counter()
+                response = self._request(client, pool, rng, operation)
+                elapsed = time.perf_counter() - start
+                if response is None:
+                    # Nothing left to delete
+                    continue
+                ok = response.status_code == EXPECTED_STATUS[operation]
+                samples.append((operation, elapsed, ok))
+        finally:
+            connections.close_all()
+        return samples
+
+    def run(self):
+        """Runs the scenario; returns its results as a JSON-ready dict."""
+        pool = self.seed()
+        schedule = self._schedule()
+        workers = self.config.concurrency
+        # Round-robin, so every worker gets the same share of the mix
+        shares = [schedule[index::workers] for index in range(workers)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._worker, shares, [pool] * workers, range(workers)))
+        wall = time.perf_counter() - start
+        return self.summarize([sample for samples in results for sample in samples], wall)
+
+    def summarize(self, samples, wall):
+        by_operation = defaultdict(list)
+        errors = defaultdict(int)
+        for operation, elapsed, ok in samples:
+            by_operation[operation].append(elapsed * 1000)
+            if not ok:
+                errors[operation] += 1
+
+        operations = {}
+        for operation, latencies in by_operation.items():
+            latencies.sort()
+            operations[operation] = {
+                'count': len(latencies),
+                'errors': errors[operation],
+                'throughput': round(len(latencies) / wall, 2),
+                **{f'p{pct}_ms': round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            }
+        return {
+            'wall_seconds': round(wall, 3),
+            'throughput': round(len(samples) / wall, 2),
+            'errors': sum(errors.values()),
+            'operations': operations,
+        }
+
+
+def format_results(results):
+    lines = [
+        f"{'operation':<10} {'count':>6} {'errors':>6} {'req/s':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    ]
+    for operation in OPERATIONS:
+        stats = results['operations'].get(operation)
+        if stats is None:
+            continue
+        lines.append(
+            f"{operation:<10} {stats['count']:>6} {stats['errors']:>6} {stats['throughput']:>9.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+    lines.append(
+        f"total: {results['throughput']:.1f} req/s over {results['wall_seconds']:.2f}s, "
+        f"{results['errors']} errors"
+    )
+    return '\n'.join(lines)
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Lists regressions against a baseline: per operation, p95 latency above
+    or throughput below the baseline by more than the tolerance.
+    """
+    regressions = []
+    for operation, expected in baseline['operations'].items():
+        actual = results['operations'].get(operation)
+        if actual is None:
+            continue
+        if actual['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{operation} p95 {actual['p95_ms']:.2f} ms vs baseline {expected['p95_ms']:.2f} ms"
+            )
+        if actual['throughput'] < expected['throughput'] * (1 - tolerance):
+            regressions.append(
+                f"{operation} throughput {actual['throughput']:.1f}/s vs baseline {expected['throughput']:.1f}/s"
+            )
+    return regressions
+
+
+class BaselineStore:
+    """Baselines of one benchmark, keyed by scenario, in a JSON file."""
+
+    def __init__(self, name):
+        self.path = os.path.join(BASELINE_DIR, f'{name}.json')
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as baseline_file:
+            return json.load(baseline_file)
+
+    def save(self, scenario, config, results):
+        baselines = self.load()
+        baselines[scenario] = {'config': config.as_dict(), **results}
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(self.path, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
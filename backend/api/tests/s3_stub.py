@@ -0,0 +1,173 @@
+import hashlib
+import io
+import itertools
+import threading
+import time
+from unittest.mock import patch
+from urllib.parse import urlencode
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from django.utils import timezone
+
+
+def _client_error(code, operation):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client used by S3Service."""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+        self.transfer_configs = []
+        # Key -> error code that delete_objects reports for that key
+        self.delete_errors = {}
+        # Simulated network round trip, in seconds, added to every call
+        self.latency = 0
+        # Most calls that were sleeping on latency at the same time
+        self.peak_concurrency = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+
+    def _record(self, operation):
+        self.calls.append(operation)
+        if not self.latency:
+            return
+        with self._lock:
+            self._in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _store(self, key, body, content_type=None, metadata=None):
+        etag = hashlib.md5(body).hexdigest()
+        version = str(next(self._versions))
+        self.objects[key] = {
+            'Body': body,
+            'ETag': f'"{etag}"',
+            'VersionId': version,
+            'LastModified': timezone.now(),
+            'ContentType': content_type,
+            'Metadata': metadata or {},
+        }
+        return self.objects[key]
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, Callback=None, Config=None):
+        self._record('upload_fileobj')
+        self.transfer_configs.append(Config)
+        extra = ExtraArgs or {}
+        body = Fileobj.read()
+        if Callback:
+            Callback(len(body))
+        self._store(Key, body, extra.get('ContentType'), extra.get('Metadata'))
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, Metadata=None, **kwargs):
+        self._record('put_object')
+        body = Body if isinstance(Body, bytes) else Body.read()
+        obj = self._store(Key, body, ContentType, Metadata)
+        return {'ETag': obj['ETag'], 'VersionId': obj['VersionId']}
+
+    def head_object(self, Bucket, Key):
+        self._record('head_object')
+        if Key not in self.objects:
+            raise _client_error('404', 'HeadObject')
+        obj = self.objects[Key]
+        return {
+            'ETag': obj['ETag'],
+            'VersionId': obj['VersionId'],
+            'LastModified': obj['LastModified'],
+            'ContentLength': len(obj['Body']),
+            'ContentType': obj['ContentType'],
+            'Metadata': obj['Metadata'],
+        }
+
+    def get_object(self, Bucket, Key, Range=None):
+        self._record('get_object')
+        if Key not in self.objects:
+            raise _client_error('NoSuchKey', 'GetObject')
+        obj = self.objects[Key]
+        body, size = obj['Body'], len(obj['Body'])
+        response = {
+            'ETag': obj['ETag'],
+            'VersionId': obj['VersionId'],
+            'LastModified': obj['LastModified'],
+            'ContentType': obj['ContentType'],
+            'Metadata': obj['Metadata'],
+        }
+        if Range:
+            first, last = Range.split('=')[1].split('-')
+            if not first:
+                # Suffix range: the last N bytes
+                first, last = max(size - int(last), 0), size - 1
+            first, last = int(first), min(int(last) if last else size - 1, size - 1)
+            if first >= size:
+                raise ClientError(
+                    {'Error': {'Code': 'InvalidRange', 'Message': 'InvalidRange', 'ActualObjectSize': str(size)}},
+                    'GetObject'
+                )
+            body = body[first:last + 1]
+            response['ContentRange'] = f'bytes {first}-{last}/{size}'
+        response['Body'] = StreamingBody(io.BytesIO(body), len(body))
+        response['ContentLength'] = len(body)
+        return response
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600):
+        self._record('generate_presigned_url')
+        params = dict(Params or {})
+        bucket, key = params.pop('Bucket'), params.pop('Key')
+        query = urlencode({**params, 'X-Amz-Expires': ExpiresIn, 'X-Amz-Signature': 'fake-signature'})
+        return f'https://{bucket}.s3.amazonaws.com/{key}?{query}'
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600):
+        self._record('generate_presigned_post')
+        return {
+            'url': f'https://{Bucket}.s3.amazonaws.com/',
+            'fields': {**(Fields or {}), 'key': Key, 'policy': 'fake-policy'},
+        }
+
+    def put_fixture(self, key, body, content_type='text/plain'):
+        """Stores an object as if a client had uploaded it directly."""
+        self._store(key, body, content_type)
+
+    def delete_object(self, Bucket, Key):
+        self._record('delete_object')
+        self.objects.pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete):
+        self._record('delete_objects')
+        assert len(Delete['Objects']) <= 1000, "DeleteObjects takes at most 1000 keys"
+        errors = []
+        for item in Delete['Objects']:
+            code = self.delete_errors.get(item['Key'])
+            if code:
+                errors.append({'Key': item['Key'], 'Code': code, 'Message': code})
+            else:
+                self.objects.pop(item['Key'], None)
+        return {'Errors': errors} if errors else {}
+
+    def list_objects_v2(self, Bucket, ContinuationToken=None, MaxKeys=1000):
+        self._record('list_objects_v2')
+        # Like S3, the token marks the last key listed, so objects deleted
+        # between pages do not shift the next page
+        keys = sorted(key for key in self.objects if ContinuationToken is None or key > ContinuationToken)
+        page = keys[:MaxKeys]
+        response = {
+            'Contents': [
+                {'Key': key, 'LastModified': self.objects[key]['LastModified']} for key in page
+            ],
+            'IsTruncated': MaxKeys < len(keys),
+        }
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+
+def patch_s3(client=None):
+    """Routes every S3Service built inside the context to a FakeS3Client."""
+    return patch('api.services.s3.get_s3_client', return_value=client or FakeS3Client())
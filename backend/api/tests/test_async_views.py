@@ -0,0 +1,84 @@
+import asyncio
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase
+from rest_framework import status
+from api.models import FileUpload, ObjectDeletion
+from .s3_stub import FakeS3Client, patch_s3
+
+URL = '/api/async/files/'
+
+
+def body(i):
+    return f'async upload {i} '.encode() * 40
+
+
+class AsyncFileViewTest(TestCase):
+    def setUp(self):
+        self.client = AsyncClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _upload(self, i=0, name='notes.txt', content_type='text/plain'):
+        upload = SimpleUploadedFile(name, body(i), content_type=content_type)
+        return self.client.post(URL, {'file': upload})
+
+    async def test_upload_commits_the_file(self):
+        """Test an async upload stores the object and a committed row"""
+        response = await self._upload()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.json()['data']
+        file_upload = await FileUpload.objects.aget(pk=data['id'])
+        self.assertEqual(file_upload.status, FileUpload.Status.COMMITTED)
+        self.assertEqual(data['s3_etag'], file_upload.s3_etag)
+        self.assertEqual(len(self.s3_client.objects), 1)
+
+    async def test_invalid_upload_is_rejected(self):
+        """Test validation errors map to 400 and store nothing"""
+        response = await self._upload(name='notes.exe', content_type='application/octet-stream')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.json()['success'])
+        self.assertFalse(await FileUpload.objects.aexists())
+        self.assertEqual(self.s3_client.objects, {})
+
+    async def test_list_pages_with_cursors(self):
+        """Test the async list uses the same keyset pages as the sync one"""
+        for i in range(3):
+            await self._upload(i)
+
+        first = (await self.client.get(URL, {'page_size': 2, 'fields': 'id,name'})).json()
+        second = (await self.client.get(
+            URL, {'page_size': 2, 'cursor': first['pagination']['next']}
+        )).json()
+
+        self.assertEqual([set(item) for item in first['data']], [{'id', 'name'}] * 2)
+        self.assertEqual(len(second['data']), 1)
+        self.assertIsNone(second['pagination']['next'])
+        response = await self.client.get(URL, {'fields': 'content'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_delete_queues_the_object(self):
+        """Test an async delete removes the row and queues the object"""
+        file_id = (await self._upload()).json()['data']['id']
+
+        response = await self.client.delete(f'{URL}{file_id}/')
+        missing = await self.client.delete(f'{URL}{file_id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(await FileUpload.objects.aexists())
+        self.assertEqual(await ObjectDeletion.objects.acount(), 1)
+
+    async def test_slow_uploads_overlap(self):
+        """Test concurrent uploads wait on S3 together, not one after another"""
+        self.s3_client.latency = 0.2
+
+        responses = await asyncio.gather(*(self._upload(i) for i in range(10)))
+
+        self.assertEqual(
+            [response.status_code for response in responses], [status.HTTP_201_CREATED] * 10
+        )
+        self.assertEqual(self.s3_client.peak_concurrency, 10)
@@ -0,0 +1,128 @@
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.constants.file_service_constants import FileValidationConstants
+from api.models import FileUpload
+from .s3_stub import FakeS3Client, patch_s3
+
+VALID_BODY = ('plain text ' * 60).encode()
+
+
+def body(i):
+    """Distinct valid content, so files are not deduplicated"""
+    return f'file {i} '.encode() + VALID_BODY
+
+
+class BatchUploadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _post(self, *files):
+        uploads = [
+            SimpleUploadedFile(name, body, content_type=content_type)
+            for name, body, content_type in files
+        ]
+        return self.client.post('/api/files/batch/', {'files': uploads}, format='multipart')
+
+    def test_all_files_are_created(self):
+        """Test every valid file is uploaded and inserted"""
+        files = [(f'notes-{i}.txt', body(i), 'text/plain') for i in range(5)]
+        response = self._post(*files)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data['data']
+        self.assertEqual([item['index'] for item in results], list(range(5)))
+        self.assertTrue(all(item['status'] == 'created' for item in results))
+        self.assertEqual(FileUpload.objects.count(), 5)
+        self.assertEqual(len(self.s3_client.objects), 5)
+        self.assertEqual(
+            {item['file']['id'] for item in results},
+            set(FileUpload.objects.values_list('id', flat=True))
+        )
+
+    def test_invalid_files_fail_individually(self):
+        """Test rejected files are reported without failing the rest"""
+        response = self._post(
+            ('good.txt', VALID_BODY, 'text/plain'),
+            ('run.exe', VALID_BODY, 'application/exe'),
+            ('bad.txt', b"'; DROP TABLE users; -- " * 30, 'text/plain'),
+            ('tiny.txt', b'x', 'text/plain'),
+            ('also-good.txt', body(2), 'text/plain'),
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [(item['name'], item['status']) for item in response.data['data']]
+        self.assertEqual(statuses, [
+            ('good.txt', 'created'),
+            ('run.exe', 'failed'),
+            ('bad.txt', 'failed'),
+            ('tiny.txt', 'failed'),
+            ('also-good.txt', 'created'),
+        ])
+        self.assertEqual(
+            set(FileUpload.objects.values_list('name', flat=True)),
+            {'good.txt', 'also-good.txt'}
+        )
+        self.assertEqual(len(self.s3_client.objects), 2)
+
+    def test_failed_upload_is_cleaned_up(self):
+        """Test an object whose upload did not complete is deleted"""
+        head_object = self.s3_client.head_object
+        failed = []
+
+        def flaky_head_object(Bucket, Key):
+            if not failed:
+                failed.append(Key)
+                raise ClientError({'Error': {'Code': '500', 'Message': 'boom'}}, 'HeadObject')
+            return head_object(Bucket=Bucket, Key=Key)
+
+        with self.settings(AWS_S3_VERIFY_UPLOADS=True), \
+                patch.object(self.s3_client, 'head_object', side_effect=flaky_head_object):
+            response = self._post(*[(f'notes-{i}.txt', body(i), 'text/plain') for i in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(FileUpload.objects.count(), 2)
+        self.assertNotIn(failed[0], self.s3_client.objects)
+        self.assertEqual(len(self.s3_client.objects), 2)
+
+    def test_insert_failure_removes_all_objects(self):
+        """Test a failed bulk insert leaves nothing behind in S3"""
+        with patch.object(FileUpload.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            response = self._post(*[(f'notes-{i}.txt', body(i), 'text/plain') for i in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(FileUpload.objects.count(), 0)
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_too_many_files_is_rejected(self):
+        """Test the per-request file cap fails the whole batch"""
+        with self.settings(FILE_BATCH_MAX_FILES=2):
+            response = self._post(*[(f'notes-{i}.txt', body(i), 'text/plain') for i in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_empty_batch_is_rejected(self):
+        """Test a batch without files returns 400"""
+        response = self.client.post('/api/files/batch/', {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_full_batch_of_largest_files_fits_the_size_check(self):
+        """Test part headers with long names do not trip the up-front body limit"""
+        largest = FileValidationConstants.MAX_SIZE_BYTES
+        files = [
+            ('é' * 120 + f'{i:03d}.txt', body(i)[:largest].ljust(largest, b' '), 'text/plain')
+            for i in range(100)
+        ]
+        with self.settings(FILE_BATCH_MAX_FILES=100):
+            response = self._post(*files)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(FileUpload.objects.count(), 100)
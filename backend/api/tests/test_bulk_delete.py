@@ -0,0 +1,165 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload, ObjectDeletion
+from api.services.outbox import DeletionWorker
+from api.services.s3 import S3Service
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class S3DeleteFilesTest(TestCase):
+    def setUp(self):
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def test_keys_are_deleted_in_chunks_of_1000(self):
+        """Test large deletes are split into DeleteObjects calls"""
+        keys = [f'{i}.txt' for i in range(2500)]
+        for key in keys:
+            self.s3_client.put_fixture(key, b'x')
+
+        errors = S3Service().delete_files(keys)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(self.s3_client.calls.count('delete_objects'), 3)
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_per_key_errors_are_returned(self):
+        """Test keys S3 refused are reported, the rest still deleted"""
+        for key in ('a.txt', 'b.txt'):
+            self.s3_client.put_fixture(key, b'x')
+        self.s3_client.delete_errors['b.txt'] = 'AccessDenied'
+
+        errors = S3Service().delete_files(['a.txt', 'b.txt'])
+
+        self.assertEqual(list(errors), ['b.txt'])
+        self.assertIn('AccessDenied', errors['b.txt'])
+        self.assertEqual(list(self.s3_client.objects), ['b.txt'])
+
+
+class BulkDeleteViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _create(self, name, size=1.0, file_type='text/plain'):
+        key = f'{name}.key'
+        self.s3_client.put_fixture(key, b'x')
+        return FileUpload.objects.create(
+            name=name,
+            size=size,
+            content='content',
+            file_type=file_type,
+            s3_url=f'https://test-bucket.s3.amazonaws.com/{key}'
+        )
+
+    def _bulk_delete(self, body):
+        return self.client.post('/api/files/bulk-delete/', body, format='json')
+
+    def test_delete_by_ids(self):
+        """Test the listed files are deleted with one S3 call"""
+        files = [self._create(f'file-{i}.txt') for i in range(3)]
+
+        response = self._bulk_delete({'ids': [files[0].id, files[2].id, 999]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(sorted(data['deleted']), [files[0].id, files[2].id])
+        self.assertEqual(data['not_found'], [999])
+        self.assertEqual(list(FileUpload.objects.values_list('id', flat=True)), [files[1].id])
+        self.assertEqual(ObjectDeletion.objects.count(), 2)
+
+        DeletionWorker().drain()
+
+        self.assertEqual(list(self.s3_client.objects), ['file-1.txt.key'])
+        self.assertEqual(self.s3_client.calls.count('delete_objects'), 1)
+        self.assertNotIn('delete_object', self.s3_client.calls)
+
+    def test_delete_by_filter(self):
+        """Test a filter selects the files to delete"""
+        self._create('report-1.txt', size=1.5)
+        self._create('report-2.txt', size=0.6)
+        keep = self._create('notes.txt', size=1.5)
+
+        response = self._bulk_delete({'filter': {'name': 'report', 'min_size': 1}})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']['deleted']), 1)
+        self.assertEqual(
+            set(FileUpload.objects.values_list('name', flat=True)),
+            {'report-2.txt', keep.name}
+        )
+
+    def test_s3_failures_do_not_fail_the_request(self):
+        """Test objects S3 could not delete stay queued, the rows are gone"""
+        ok = self._create('ok.txt')
+        stuck = self._create('stuck.txt')
+        self.s3_client.delete_errors['stuck.txt.key'] = 'AccessDenied'
+
+        response = self._bulk_delete({'ids': [ok.id, stuck.id]})
+        DeletionWorker().drain()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['data']['deleted']), [ok.id, stuck.id])
+        self.assertFalse(FileUpload.objects.exists())
+        self.assertEqual(list(self.s3_client.objects), ['stuck.txt.key'])
+        entry = ObjectDeletion.objects.get()
+        self.assertEqual((entry.key, entry.attempts), ('stuck.txt.key', 1))
+        self.assertIn('AccessDenied', entry.last_error)
+
+    def test_queued_deletions_can_be_tracked(self):
+        """Test the outbox ids from a bulk delete report each S3 outcome"""
+        ok = self._create('ok.txt')
+        stuck = self._create('stuck.txt')
+        self.s3_client.delete_errors['stuck.txt.key'] = 'AccessDenied'
+        queued = self._bulk_delete({'ids': [ok.id, stuck.id]}).data['data']['queued_deletions']
+        self.assertEqual(len(queued), 2)
+
+        ids = ','.join(str(entry_id) for entry_id in queued)
+        before = self.client.get('/api/files/deletions/', {'ids': ids}).data['data']
+        DeletionWorker().drain()
+        with self.settings(FILE_DELETE_MAX_ATTEMPTS=1):
+            after = self.client.get('/api/files/deletions/', {'ids': ids}).data['data']
+
+        self.assertEqual([item['status'] for item in before], ['queued', 'queued'])
+        by_status = {item['status']: item for item in after}
+        self.assertEqual(sorted(by_status), ['done', 'failed'])
+        self.assertEqual(by_status['failed']['key'], 'stuck.txt.key')
+        self.assertIn('AccessDenied', by_status['failed']['last_error'])
+        response = self.client.get('/api/files/deletions/', {'ids': 'one,two'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_requests_are_rejected(self):
+        """Test ids/filter must be given exactly once and be well formed"""
+        self._create('keep.txt')
+        for body in (
+            {},
+            {'ids': [1], 'filter': {'name': 'x'}},
+            {'ids': 'all'},
+            {'filter': {}},
+            {'filter': {'nmae': 'typo'}},
+            {'filter': {'min_size': 'big'}},
+        ):
+            response = self._bulk_delete(body)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+        self.assertEqual(FileUpload.objects.count(), 1)
+
+    def test_bulk_deletes_are_capped(self):
+        """Test long id lists are rejected and filter deletes stop at the limit"""
+        files = [self._create(f'report-{i}.txt') for i in range(5)]
+
+        with self.settings(FILE_BULK_DELETE_MAX_FILES=2):
+            too_many = self._bulk_delete({'ids': [f.id for f in files[:3]]})
+            pages = [self._bulk_delete({'filter': {'name': 'report'}}).data['data'] for _ in range(3)]
+
+        self.assertEqual(too_many.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([page['deleted'] for page in pages], [
+            [files[0].id, files[1].id], [files[2].id, files[3].id], [files[4].id]
+        ])
+        self.assertEqual([page['has_more'] for page in pages], [True, True, False])
+        self.assertFalse(FileUpload.objects.exists())
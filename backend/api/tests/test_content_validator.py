@@ -0,0 +1,122 @@
+import re
+from pathlib import Path
+from django.test import SimpleTestCase
+from api.exceptions import FileValidationError, SuspiciousContentError
+from api.services.content_scanner import ContentScanner, literal_prefix
+from api.services.content_validator import ContentValidator
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'corpus'
+
+
+def load_corpus(kind):
+    return {path.name: path.read_text() for path in sorted((CORPUS_DIR / kind).glob('*.txt'))}
+
+
+def legacy_is_malicious(content):
+    """The original one-regex-at-a-time checks, kept as a reference."""
+    for pattern in ContentValidator.SQL_KEYWORDS.values():
+        if re.findall(pattern, content, re.IGNORECASE):
+            return True
+    found = 0
+    for pattern in ContentValidator.DANGEROUS_PATTERNS.values():
+        if re.search(pattern, content, re.IGNORECASE | re.DOTALL):
+            found += 1
+            if found > 1:
+                return True
+    return False
+
+
+class ContentValidatorTest(SimpleTestCase):
+    def test_benign_corpus_is_accepted(self):
+        """Test ordinary text, including technical prose, passes"""
+        for name, content in load_corpus('benign').items():
+            with self.subTest(name=name):
+                ContentValidator.validate_content(content)
+
+    def test_malicious_corpus_is_rejected_with_rule_names(self):
+        """Test every malicious sample is rejected and reports its rules"""
+        for name, content in load_corpus('malicious').items():
+            with self.subTest(name=name):
+                with self.assertRaises(SuspiciousContentError) as ctx:
+                    ContentValidator.validate_content(content)
+                self.assertIsInstance(ctx.exception, FileValidationError)
+                self.assertTrue(ctx.exception.rules)
+
+    def test_decisions_match_legacy_checks(self):
+        """Test the single-pass scanner agrees with the per-pattern checks"""
+        samples = list(load_corpus('benign').values()) + list(load_corpus('malicious').values())
+        samples += [
+            'deletexec(1)',                      # keywords overlap
+            'EXECUTE (proc)',
+            'update\nset',                       # SQL rules do not span lines
+            '<script>\njavascript:go(\n)',       # script rules do
+            'onload = 1',
+            'onclick=1 onclick=2',               # same rule twice is one rule
+        ]
+        for content in samples:
+            with self.subTest(content=content[:30]):
+                self.assertEqual(
+                    ContentValidator.SCANNER.scan(content) is not None,
+                    legacy_is_malicious(content)
+                )
+
+    def test_scan_reports_first_decisive_rule(self):
+        """Test the result names the rule and where it fired"""
+        content = 'harmless text then UNION SELECT secrets and DROP TABLE x'
+        result = ContentValidator.SCANNER.scan(content)
+        self.assertEqual(result.category, 'sql')
+        self.assertEqual(result.rules, ('union_select',))
+        self.assertEqual(result.position, content.index('UNION'))
+
+
+class ContentScannerTest(SimpleTestCase):
+    def test_literal_prefix(self):
+        """Test anchors are derived from the leading literal text"""
+        self.assertEqual(literal_prefix(r'UNION\s+SELECT'), 'UNION')
+        self.assertEqual(literal_prefix(r'<script[\s>]'), '<script')
+        self.assertEqual(literal_prefix(r'javascript:.*\(.*\)'), 'javascript:')
+        self.assertEqual(literal_prefix(r'colou?r'), 'colo')
+
+    def test_rule_without_anchor_is_refused(self):
+        """Test rules that cannot be anchored are rejected at compile time"""
+        with self.assertRaises(ValueError):
+            ContentScanner({'x': {'bad': r'\d+'}}, {}, {'x': 1})
+
+
+class ScanSessionTest(SimpleTestCase):
+    def _feed(self, content, chunk_size):
+        session = ContentValidator.SCANNER.session()
+        for start in range(0, len(content), chunk_size):
+            result = session.feed(content[start:start + chunk_size])
+            if result is not None:
+                return result
+        return session.finish()
+
+    def test_chunked_decisions_match_whole_scan(self):
+        """Test feeding content in chunks reaches the same decision"""
+        samples = list(load_corpus('benign').values()) + list(load_corpus('malicious').values())
+        samples.append('text ending in a keyword split as exec' + 'ute (x)')
+        for content in samples:
+            expected = ContentValidator.SCANNER.scan(content) is not None
+            for chunk_size in (1, 3, 7, 64):
+                with self.subTest(content=content[:20], chunk_size=chunk_size):
+                    self.assertEqual(self._feed(content, chunk_size) is not None, expected)
+
+    def test_feed_reports_hits_before_finish(self):
+        """Test a decisive hit is reported as soon as its chunk arrives"""
+        session = ContentValidator.SCANNER.session()
+        self.assertIsNone(session.feed('intro text '))
+        self.assertIsNotNone(session.feed('then DROP TABLE users; and more to come'))
+
+    def test_window_stays_bounded_and_positions_are_absolute(self):
+        """Test scanned text is dropped from the window and offsets count from the start"""
+        session = ContentValidator.SCANNER.session()
+        filler = 'plain words ' * 100
+        for _ in range(20):
+            self.assertIsNone(session.feed(filler))
+            self.assertLessEqual(len(session._window), session._scanner._holdback)
+
+        whole = filler * 20 + 'then DROP TABLE users; and more to come'
+        result = session.feed('then DROP TABLE users; and more to come') or session.finish()
+        self.assertEqual(result, ContentValidator.SCANNER.scan(whole))
+        self.assertEqual(session.content, whole)
@@ -0,0 +1,117 @@
+import hashlib
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload, StoredObject
+from api.services.outbox import DeletionWorker
+from .s3_stub import FakeS3Client, patch_s3
+
+BODY = ('shared boilerplate ' * 40).encode()
+BODY_HASH = hashlib.sha256(BODY).hexdigest()
+
+
+class ContentDeduplicationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _upload(self, name='notes.txt', body=BODY):
+        upload = SimpleUploadedFile(name, body, content_type='text/plain')
+        response = self.client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return FileUpload.objects.get(pk=response.data['data']['id'])
+
+    def _uploads(self):
+        return self.s3_client.calls.count('put_object') + self.s3_client.calls.count('upload_fileobj')
+
+    def test_identical_uploads_share_one_object(self):
+        """Test the second upload of the same bytes skips S3"""
+        first = self._upload('a.txt')
+        second = self._upload('b.txt')
+
+        self.assertEqual(self._uploads(), 1)
+        self.assertEqual(list(self.s3_client.objects), [StoredObject.objects.get(content_hash=BODY_HASH).key])
+        self.assertEqual(first.content_hash, BODY_HASH)
+        self.assertEqual(second.s3_url, first.s3_url)
+        self.assertEqual(second.s3_etag, first.s3_etag)
+        self.assertEqual(second.s3_metadata['original_name'], 'b.txt')
+        self.assertEqual(StoredObject.objects.get().ref_count, 2)
+
+    def test_object_is_deleted_with_its_last_reference(self):
+        """Test deleting one of two references keeps the object"""
+        first = self._upload('a.txt')
+        second = self._upload('b.txt')
+
+        self.client.delete(f'/api/files/{first.id}/')
+        self.assertEqual(StoredObject.objects.get().ref_count, 1)
+        self.assertEqual(len(self.s3_client.objects), 1)
+
+        self.client.delete(f'/api/files/{second.id}/')
+        DeletionWorker().drain()
+        self.assertFalse(StoredObject.objects.exists())
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_bulk_delete_counts_references(self):
+        """Test bulk delete only removes objects nothing else references"""
+        files = [self._upload(f'{i}.txt') for i in range(3)]
+        other = self._upload('other.txt', b'different ' * 60)
+
+        response = self.client.post(
+            '/api/files/bulk-delete/', {'ids': [files[0].id, files[1].id, other.id]}, format='json'
+        )
+        DeletionWorker().drain()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.s3_client.objects), [StoredObject.objects.get(content_hash=BODY_HASH).key])
+        self.assertEqual(StoredObject.objects.get().ref_count, 1)
+
+    def test_batch_uploads_each_content_once(self):
+        """Test duplicates within a batch and of stored files are not uploaded"""
+        self._upload('existing.txt')
+        uploads = [
+            SimpleUploadedFile(f'{i}.txt', body, content_type='text/plain')
+            for i, body in enumerate([BODY, b'new ' * 150, b'new ' * 150])
+        ]
+
+        response = self.client.post('/api/files/batch/', {'files': uploads}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._uploads(), 2)
+        self.assertEqual(StoredObject.objects.get(content_hash=BODY_HASH).ref_count, 2)
+        self.assertEqual(StoredObject.objects.exclude(content_hash=BODY_HASH).get().ref_count, 2)
+
+    def test_duplicate_direct_upload_is_dropped(self):
+        """Test finalizing known content references the stored object"""
+        existing = self._upload()
+        presigned = self.client.post(
+            '/api/files/presign/', {'name': 'direct.txt', 'content_type': 'text/plain'}, format='json'
+        ).data['data']
+        key = presigned['fields']['key']
+        self.s3_client.put_fixture(key, BODY)
+
+        response = self.client.post(
+            '/api/files/finalize/', {'upload_token': presigned['upload_token']}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['s3_url'], existing.s3_url)
+        self.assertNotIn(key, self.s3_client.objects)
+        self.assertEqual(StoredObject.objects.get().ref_count, 2)
+
+    def test_files_without_hash_own_their_object(self):
+        """Test rows stored before deduplication still delete their object"""
+        self.s3_client.put_fixture('legacy.txt', BODY)
+        legacy = FileUpload.objects.create(
+            name='legacy.txt', size=1.0, content='x', file_type='text/plain',
+            s3_url='https://test-bucket.s3.amazonaws.com/legacy.txt'
+        )
+
+        response = self.client.delete(f'/api/files/{legacy.id}/')
+        DeletionWorker().drain()
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.s3_client.objects, {})
@@ -0,0 +1,121 @@
+from unittest.mock import patch
+from django.core import signing
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload, FinalizedUpload, StoredObject
+from api.services.file_service import PRESIGNED_UPLOAD_SALT
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class DirectUploadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _presign(self, name='notes.txt', content_type='text/plain'):
+        return self.client.post(
+            '/api/files/presign/',
+            {'name': name, 'content_type': content_type},
+            format='json'
+        )
+
+    def _finalize(self, token):
+        return self.client.post('/api/files/finalize/', {'upload_token': token}, format='json')
+
+    def _upload_directly(self, body):
+        """Presigns, then stores the body the way the browser would."""
+        presigned = self._presign().data['data']
+        key = presigned['fields']['key']
+        self.s3_client.put_fixture(key, body)
+        return presigned['upload_token'], key
+
+    def test_presign_returns_form_and_token(self):
+        """Test presign hands out the S3 form fields and a finalize token"""
+        response = self._presign()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.data['data']
+        self.assertTrue(data['url'].startswith('https://'))
+        self.assertEqual(data['fields']['Content-Type'], 'text/plain')
+        self.assertTrue(data['upload_token'])
+
+    def test_presign_rejects_disallowed_files(self):
+        """Test presign validates name and type up front"""
+        response = self._presign(name='run.exe', content_type='application/exe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_records_valid_upload(self):
+        """Test finalize validates the object and creates the row"""
+        body = ('direct upload ' * 50).encode()
+        token, key = self._upload_directly(body)
+
+        response = self._finalize(token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        file_upload = FileUpload.objects.get()
+        self.assertEqual(file_upload.name, 'notes.txt')
+        self.assertEqual(file_upload.content, body.decode())
+        self.assertTrue(file_upload.s3_url.endswith(key))
+        self.assertIsNotNone(file_upload.s3_etag)
+
+    def test_finalize_deletes_rejected_objects(self):
+        """Test malicious or oversized objects are removed from S3"""
+        for body in ((b"x" * 600) + b"'; DROP TABLE users; --", b'x' * 5000):
+            with self.subTest(size=len(body)):
+                token, key = self._upload_directly(body)
+                response = self._finalize(token)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertNotIn(key, self.s3_client.objects)
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+    def test_finalize_rejects_forged_and_reused_tokens(self):
+        """Test finalize only accepts tokens it issued, once"""
+        forged = signing.dumps({'key': 'other.txt', 'name': 'x.txt'}, salt='wrong')
+        self.assertEqual(self._finalize(forged).status_code, status.HTTP_400_BAD_REQUEST)
+
+        token, _ = self._upload_directly(('again ' * 100).encode())
+        self.assertEqual(self._finalize(token).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._finalize(token).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_without_upload_is_rejected(self):
+        """Test finalizing before the object exists is a client error, not a retryable one"""
+        token = self._presign().data['data']['upload_token']
+        self.assertEqual(self._finalize(token).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_after_dedup_reports_already_finalized(self):
+        """Test a token whose object was dropped as a duplicate is not finalized again"""
+        body = ('shared content ' * 50).encode()
+        first, _ = self._upload_directly(body)
+        second, second_key = self._upload_directly(body)
+        self.assertEqual(self._finalize(first).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._finalize(second).status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(second_key, self.s3_client.objects)
+
+        response = self._finalize(second)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already been finalized', response.data['error'])
+        self.assertEqual(FileUpload.objects.count(), 2)
+
+    def test_concurrent_finalize_creates_one_file(self):
+        """Test a finalize that loses the race on the token key creates nothing"""
+        token, key = self._upload_directly(('raced upload ' * 50).encode())
+        real_exists = QuerySet.exists
+
+        def finalized_concurrently(queryset):
+            # Both requests pass the early check; the other one commits first
+            found = real_exists(queryset)
+            if queryset.model is FinalizedUpload and not found:
+                FinalizedUpload.objects.create(key=key)
+            return found
+
+        with patch.object(QuerySet, 'exists', finalized_concurrently):
+            response = self._finalize(token)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(FileUpload.objects.count(), 0)
+        self.assertFalse(StoredObject.objects.exists())
+        self.assertIn(key, self.s3_client.objects)
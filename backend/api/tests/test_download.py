@@ -0,0 +1,134 @@
+from urllib.parse import parse_qs, urlparse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.utils.ranges import parse_byte_range, if_range_matches
+from .s3_stub import FakeS3Client, patch_s3
+
+BODY = b''.join(f'line {i:04d}\n'.encode() for i in range(150))
+
+
+def _content(response):
+    return b''.join(response.streaming_content)
+
+
+class ByteRangeParsingTest(TestCase):
+    def test_single_ranges_are_normalized(self):
+        """Test the three single-range forms are kept"""
+        self.assertEqual(parse_byte_range('bytes=0-99'), 'bytes=0-99')
+        self.assertEqual(parse_byte_range('bytes= 100-'), 'bytes=100-')
+        self.assertEqual(parse_byte_range('bytes=-5'), 'bytes=-5')
+
+    def test_unusable_ranges_are_ignored(self):
+        """Test missing, malformed, reversed and multiple ranges yield None"""
+        for header in (None, '', 'bytes=-', 'items=0-1', 'bytes=9-1', 'bytes=0-1,5-6'):
+            self.assertIsNone(parse_byte_range(header))
+
+    def test_if_range_needs_a_strong_match(self):
+        """Test If-Range accepts the current ETag or date only"""
+        self.assertTrue(if_range_matches(None, '"a"', 0))
+        self.assertTrue(if_range_matches('"a"', '"a"', 0))
+        self.assertFalse(if_range_matches('W/"a"', '"a"', 0))
+        self.assertFalse(if_range_matches('"b"', '"a"', 0))
+        self.assertTrue(if_range_matches('Thu, 01 Jan 1970 00:00:00 GMT', '"a"', 0))
+
+
+class DownloadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+        upload = SimpleUploadedFile('report.txt', BODY, content_type='text/plain')
+        response = self.client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.url = f"/api/files/{response.data['data']['id']}/download/"
+
+    def test_redirects_to_presigned_url_by_default(self):
+        """Test the default mode is a 302 to a short-lived presigned GET"""
+        with override_settings(FILE_PRESIGNED_DOWNLOAD_EXPIRY=30):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertIn('no-store', response['Cache-Control'])
+        query = parse_qs(urlparse(response['Location']).query)
+        self.assertEqual(query['X-Amz-Expires'], ['30'])
+        self.assertEqual(query['ResponseContentType'], ['text/plain'])
+        self.assertIn('report.txt', query['ResponseContentDisposition'][0])
+
+    def test_streams_whole_file(self):
+        """Test stream mode relays the object outside the JSON envelope"""
+        with override_settings(FILE_DOWNLOAD_CHUNK_SIZE=100):
+            response = self.client.get(self.url, {'mode': 'stream'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertEqual(b''.join(chunks), BODY)
+        self.assertEqual(max(len(chunk) for chunk in chunks), 100)
+        self.assertEqual(response['Content-Length'], str(len(BODY)))
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.txt"')
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_range_request_gets_partial_content(self):
+        """Test a byte range is answered with 206 and Content-Range"""
+        for header, start, end in (('bytes=10-19', 10, 19), ('bytes=-5', len(BODY) - 5, len(BODY) - 1)):
+            response = self.client.get(self.url, {'mode': 'stream'}, HTTP_RANGE=header)
+
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(_content(response), BODY[start:end + 1])
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(BODY)}')
+            self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range_gets_416(self):
+        """Test a range past the end is refused with the real size"""
+        response = self.client.get(self.url, {'mode': 'stream'}, HTTP_RANGE=f'bytes={len(BODY)}-')
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(BODY)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        """Test a Range whose If-Range no longer matches is ignored"""
+        response = self.client.get(
+            self.url, {'mode': 'stream'}, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(_content(response), BODY)
+
+    def test_conditional_requests(self):
+        """Test If-None-Match gets 304 and a failed If-Match gets 412, without S3"""
+        etag = self.client.get(self.url, {'mode': 'stream'})['ETag']
+        calls = len(self.s3_client.calls)
+
+        not_modified = self.client.get(self.url, {'mode': 'stream'}, HTTP_IF_NONE_MATCH=etag)
+        failed = self.client.get(self.url, HTTP_IF_MATCH='"other"')
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(failed.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(len(self.s3_client.calls), calls)
+
+    def test_invalid_mode_is_rejected(self):
+        """Test an unknown mode is a 400"""
+        response = self.client.get(self.url, {'mode': 'inline'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_object_is_unavailable(self):
+        """Test a file whose object is gone gets a 503"""
+        self.s3_client.objects.clear()
+
+        response = self.client.get(self.url, {'mode': 'stream'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_missing_file_is_404(self):
+        """Test downloading an unknown id is a 404"""
+        response = self.client.get('/api/files/999999/download/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
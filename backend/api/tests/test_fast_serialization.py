@@ -0,0 +1,101 @@
+import gzip
+import json
+from unittest import skipUnless
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from api.middleware import accepted_encodings, brotli
+from api.models import FileUpload
+from api.renderers import ORJSONRenderer
+from api.serializers import FileUploadListSerializer
+from api.utils.response import build_response_body
+
+
+def _create(name, **kwargs):
+    return FileUpload.objects.create(
+        name=name, size=1.25, content='x', file_type='text/plain',
+        s3_url=f'https://test-bucket.s3.amazonaws.com/{name}',
+        s3_metadata={'original_name': name, 'nested': {'ünï': [1, 2.5, None]}},
+        **kwargs
+    )
+
+
+class ORJSONRendererTest(TestCase):
+    def test_output_matches_json_renderer(self):
+        """Test the orjson renderer produces JSONRenderer's exact bytes"""
+        _create('naïve ☃.txt', s3_etag='abc')
+        _create('line\u2028sep.txt')
+        data = FileUploadListSerializer(FileUpload.objects.all(), many=True).data
+        body = build_response_body(data, message=gettext_lazy('done'), pagination={'next': None})
+        body['raw_datetime'] = timezone.now()
+
+        self.assertEqual(ORJSONRenderer().render(body), JSONRenderer().render(body))
+
+    def test_values_path_matches_serializer(self):
+        """Test from_values equals field-by-field serialization"""
+        _create('a.txt', s3_etag='abc', content_hash='f' * 64)
+        _create('b.txt')
+        queryset = FileUpload.objects.order_by('id')
+
+        for fields in (None, ['last_modified', 'id', 's3_etag']):
+            expected = FileUploadListSerializer(queryset, many=True, fields=fields).data
+            columns = FileUploadListSerializer.ordered_fields(fields)
+            actual = FileUploadListSerializer.from_values(queryset.values(*columns), fields)
+            self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for i in range(20):
+            _create(f'{i}.txt')
+
+    def test_accept_encoding_parsing(self):
+        """Test q-values and malformed items in Accept-Encoding"""
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.5, br , identity;q=0, bad;q=x'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0}
+        )
+
+    def test_large_responses_are_gzipped(self):
+        """Test a large list is gzipped for clients that accept it"""
+        plain = self.client.get('/api/files/')
+        compressed = self.client.get('/api/files/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(compressed.content))['data'], plain.json()['data'])
+
+    def test_small_responses_are_not_compressed(self):
+        """Test bodies under the threshold are sent as they are"""
+        response = self.client.get('/api/files/', {'page_size': 1, 'fields': 'id'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_SIZE=0)
+    def test_refused_codings_are_not_used(self):
+        """Test q=0 excludes a coding"""
+        response = self.client.get('/api/files/', HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_compressed_etag_still_revalidates(self):
+        """Test the weakened ETag of a compressed body still yields 304"""
+        etag = self.client.get('/api/files/', HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        response = self.client.get('/api/files/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    @skipUnless(brotli, "Brotli is not installed")
+    def test_brotli_is_preferred(self):
+        """Test brotli wins over gzip at equal preference"""
+        response = self.client.get('/api/files/', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content))['success'], True)
@@ -0,0 +1,117 @@
+from importlib import import_module
+from unittest.mock import patch
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from api.models import FileContent, FileUpload
+
+
+def _create(name, content='hello'):
+    return FileUpload.objects.create(
+        name=name, size=1.0, content=content, file_type='text/plain',
+        s3_url=f'https://test-bucket.s3.amazonaws.com/{name}'
+    )
+
+
+class FileContentTest(TestCase):
+    def test_body_is_not_in_the_file_table(self):
+        """Test file bodies live in FileContent, not FileUpload"""
+        file_upload = _create('a.txt', 'the body')
+
+        self.assertNotIn('content', [field.name for field in FileUpload._meta.concrete_fields])
+        self.assertEqual(FileContent.objects.get(file=file_upload).text, 'the body')
+
+    def test_content_loads_lazily_once(self):
+        """Test content costs one query, on first access only"""
+        file_upload = _create('a.txt', 'the body')
+        file_upload = FileUpload.objects.get(pk=file_upload.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(file_upload.content, 'the body')
+            self.assertEqual(file_upload.content, 'the body')
+
+        self.assertEqual(len(queries), 1)
+
+    def test_content_update_is_saved(self):
+        """Test assigning content updates the FileContent row"""
+        file_upload = _create('a.txt')
+        file_upload.content = 'changed'
+        file_upload.save()
+
+        self.assertEqual(FileUpload.objects.get(pk=file_upload.pk).content, 'changed')
+
+    def test_save_without_content_change_skips_file_content(self):
+        """Test metadata-only saves never touch FileContent"""
+        file_upload = FileUpload.objects.get(pk=_create('a.txt').pk)
+        file_upload.name = 'b.txt'
+
+        with CaptureQueriesContext(connection) as queries:
+            file_upload.save()
+
+        self.assertFalse(any('api_filecontent' in query['sql'] for query in queries))
+
+    def test_bulk_create_stores_content(self):
+        """Test bulk_create inserts the FileContent rows too"""
+        FileUpload.objects.bulk_create([
+            FileUpload(name=f'{i}.txt', size=1.0, content=f'body {i}', file_type='text/plain',
+                       s3_url=f'https://test-bucket.s3.amazonaws.com/{i}.txt')
+            for i in range(3)
+        ])
+
+        self.assertEqual(
+            sorted(FileContent.objects.values_list('text', flat=True)),
+            ['body 0', 'body 1', 'body 2']
+        )
+
+    def test_delete_removes_content(self):
+        """Test deleting a file deletes its body"""
+        file_upload = _create('a.txt')
+        FileUpload.objects.filter(pk=file_upload.pk).delete()
+
+        self.assertFalse(FileContent.objects.exists())
+
+
+class FileContentMigrationTest(TransactionTestCase):
+    migrate_from = [('api', '0006_object_deletion_outbox')]
+    migrate_to = [('api', '0007_file_content')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill_copies_bodies_in_batches(self):
+        """Test the migration moves every body, one batch at a time"""
+        old_apps = self._migrate(self.migrate_from)
+        OldFileUpload = old_apps.get_model('api', 'FileUpload')
+        OldFileUpload.objects.bulk_create([
+            OldFileUpload(name=f'{i}.txt', size=1.0, content=f'body {i}', file_type='text/plain',
+                          s3_url=f'https://test-bucket.s3.amazonaws.com/{i}.txt')
+            for i in range(5)
+        ])
+        migration = import_module('api.migrations.0007_file_content')
+
+        with patch.object(migration, 'BACKFILL_BATCH_SIZE', 2):
+            new_apps = self._migrate(self.migrate_to)
+
+        NewFileContent = new_apps.get_model('api', 'FileContent')
+        self.assertEqual(
+            dict(NewFileContent.objects.values_list('file__name', 'text')),
+            {f'{i}.txt': f'body {i}' for i in range(5)}
+        )
+
+    def test_rollback_restores_bodies(self):
+        """Test migrating back copies the bodies into FileUpload again"""
+        FileUpload.objects.create(
+            name='a.txt', size=1.0, content='kept', file_type='text/plain',
+            s3_url='https://test-bucket.s3.amazonaws.com/a.txt'
+        )
+
+        old_apps = self._migrate(self.migrate_from)
+
+        self.assertEqual(old_apps.get_model('api', 'FileUpload').objects.get().content, 'kept')
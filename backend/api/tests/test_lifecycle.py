@@ -0,0 +1,188 @@
+from datetime import timedelta
+from botocore.exceptions import ClientError
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload, FinalizedUpload, ObjectDeletion, StoredObject
+from api.services.outbox import DeletionWorker
+from api.services.reconciler import Reconciler
+from .s3_stub import FakeS3Client, patch_s3
+
+BODY = ('lifecycle text ' * 50).encode()
+BUCKET_URL = 'https://test-bucket.s3.amazonaws.com'
+
+
+class FileLifecycleTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _upload(self, body=BODY):
+        upload = SimpleUploadedFile('notes.txt', body, content_type='text/plain')
+        return self.client.post('/api/files/', {'file': upload}, format='multipart')
+
+    def test_row_is_pending_while_s3_uploads(self):
+        """Test the row exists but stays hidden until the upload finishes"""
+        seen = []
+        put_object = self.s3_client.put_object
+
+        def observing_put_object(**kwargs):
+            seen.append(list(FileUpload.objects.values_list('status', flat=True)))
+            seen.append(len(self.client.get('/api/files/').data['data']))
+            return put_object(**kwargs)
+
+        self.s3_client.put_object = observing_put_object
+        response = self._upload()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(seen, [[FileUpload.Status.PENDING], 0])
+        self.assertEqual(FileUpload.objects.get().status, FileUpload.Status.COMMITTED)
+
+    def test_failed_upload_drops_the_pending_row(self):
+        """Test a failed S3 upload leaves neither row nor object"""
+        def failing_put_object(**kwargs):
+            raise ClientError({'Error': {'Code': '500', 'Message': 'boom'}}, 'PutObject')
+
+        self.s3_client.put_object = failing_put_object
+        response = self._upload()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(FileUpload.objects.exists())
+        self.assertFalse(StoredObject.objects.exists())
+
+    def test_upload_swept_while_in_flight_is_not_resurrected(self):
+        """Test a pending row dropped by the reconciler is not re-inserted on commit"""
+        put_object = self.s3_client.put_object
+
+        def swept_put_object(**kwargs):
+            result = put_object(**kwargs)
+            FileUpload.objects.filter(status=FileUpload.Status.PENDING).delete()
+            return result
+
+        self.s3_client.put_object = swept_put_object
+        response = self._upload()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(FileUpload.objects.exists())
+        self.assertFalse(StoredObject.objects.exists())
+        self.assertEqual(self.s3_client.objects, {})
+        self.assertEqual(self.client.get('/api/files/stats/').data['data']['total_files'], 0)
+
+    def test_delete_queues_the_object(self):
+        """Test deleting a file removes the row at once and the object later"""
+        file_id = self._upload().data['data']['id']
+        key = StoredObject.objects.get().key
+
+        response = self.client.delete(f'/api/files/{file_id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(FileUpload.objects.exists())
+        self.assertEqual(list(ObjectDeletion.objects.values_list('key', flat=True)), [key])
+        self.assertIn(key, self.s3_client.objects)
+        self.assertNotIn('delete_objects', self.s3_client.calls)
+
+        DeletionWorker().drain()
+
+        self.assertEqual(self.s3_client.objects, {})
+        self.assertFalse(ObjectDeletion.objects.exists())
+
+
+class ReconcilerTest(TestCase):
+    def setUp(self):
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+        self.old = timezone.now() - timedelta(days=1)
+
+    def _object(self, key, old=True):
+        self.s3_client.put_fixture(key, BODY)
+        if old:
+            self.s3_client.objects[key]['LastModified'] = self.old
+
+    def _row(self, key, file_status, old=True):
+        file_upload = FileUpload.objects.create(
+            name='notes.txt', size=0.7, content='x', file_type='text/plain',
+            s3_url=f'{BUCKET_URL}/{key}', status=file_status
+        )
+        if old:
+            FileUpload.objects.filter(pk=file_upload.pk).update(last_modified=self.old)
+        return file_upload
+
+    def test_sweeps_abandoned_state_only(self):
+        """Test stale pending rows and orphans go, live state stays"""
+        self._object('stale-pending.txt')
+        self._row('stale-pending.txt', FileUpload.Status.PENDING)
+        self._object('fresh-pending.txt', old=False)
+        self._row('fresh-pending.txt', FileUpload.Status.PENDING, old=False)
+        self._object('committed.txt')
+        self._row('committed.txt', FileUpload.Status.COMMITTED)
+        self._object('shared.txt')
+        StoredObject.objects.create(content_hash='a' * 64, key='shared.txt', ref_count=1)
+        self._object('orphan.txt')
+        self._object('recent-orphan.txt', old=False)
+        FinalizedUpload.objects.create(key='expired-token.txt')
+        FinalizedUpload.objects.update(created_at=self.old)
+        FinalizedUpload.objects.create(key='live-token.txt')
+
+        counts = Reconciler().run()
+
+        self.assertEqual(counts, {'pending': 1, 'orphans': 1, 'finalized_uploads': 1})
+        self.assertEqual(
+            sorted(self.s3_client.objects),
+            ['committed.txt', 'fresh-pending.txt', 'recent-orphan.txt', 'shared.txt']
+        )
+        self.assertEqual(FileUpload.objects.count(), 2)
+        self.assertEqual(list(FinalizedUpload.objects.values_list('key', flat=True)), ['live-token.txt'])
+
+    def test_orphans_are_checked_in_batches(self):
+        """Test a listing longer than one batch is swept while objects are deleted between pages"""
+        for i in range(2500):
+            self._object(f'orphan-{i:04d}.txt')
+        self._object('orphan-1500-legacy.txt')
+        self._row('orphan-1500-legacy.txt', FileUpload.Status.COMMITTED)
+        self._object('orphan-2000-shared.txt')
+        StoredObject.objects.create(content_hash='b' * 64, key='orphan-2000-shared.txt', ref_count=1)
+
+        self.assertEqual(Reconciler().sweep_orphans(), 2500)
+
+        self.assertEqual(
+            sorted(self.s3_client.objects), ['orphan-1500-legacy.txt', 'orphan-2000-shared.txt']
+        )
+
+    def test_legacy_rows_are_matched_by_indexed_key(self):
+        """Test objects of rows without a stored object cost two queries per batch"""
+        FileUpload.objects.bulk_create([
+            FileUpload(
+                name='notes.txt', size=0.7, content='x', file_type='text/plain',
+                s3_url=f'{BUCKET_URL}/legacy-{i:04d}.txt'
+            )
+            for i in range(1500)
+        ])
+        for i in range(1500):
+            self._object(f'legacy-{i:04d}.txt')
+
+        # One StoredObject and one FileUpload lookup for each of the two batches
+        with self.assertNumQueries(4):
+            self.assertEqual(Reconciler().sweep_orphans(), 0)
+
+        self.assertEqual(len(self.s3_client.objects), 1500)
+
+    def test_dry_run_changes_nothing(self):
+        """Test the command only reports in dry-run mode"""
+        self._object('orphan.txt')
+        self._row('pending.txt', FileUpload.Status.PENDING)
+        out = StringIO()
+
+        call_command('reconcile_files', '--dry-run', stdout=out)
+
+        self.assertIn('Would clean up 1 pending files and 1 orphaned objects', out.getvalue())
+        self.assertIn('orphan.txt', self.s3_client.objects)
+        self.assertEqual(FileUpload.objects.count(), 1)
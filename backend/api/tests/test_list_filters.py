@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+from api.models import FileUpload
+from api.utils.filters import FileFilter
+from api.utils.pagination import KeysetPagination
+from .test_constants import S3_CONFIG
+
+LIST_URL = '/api/files/'
+
+
+def _create(name, size, file_type='text/plain', days_ago=0, status_=FileUpload.Status.COMMITTED):
+    file = FileUpload.objects.create(
+        name=name, size=size, content='x', file_type=file_type, status=status_,
+        s3_url=f"{S3_CONFIG['BUCKET_URL']}/{name}"
+    )
+    FileUpload.objects.filter(pk=file.pk).update(uploaded_at=timezone.now() - timedelta(days=days_ago))
+    return file
+
+
+class ListFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _create('alpha.txt', 0.6, days_ago=3)
+        _create('alpine.txt', 1.9, days_ago=2)
+        _create('beta.txt', 1.0, days_ago=1)
+        _create('report.csv', 1.2, file_type='text/csv')
+        _create('alps.txt', 1.5, status_=FileUpload.Status.PENDING)
+
+    def _names(self, params):
+        response = self.client.get(LIST_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['data']]
+
+    def test_filters_are_applied_in_the_database(self):
+        """Test each filter narrows the list, and pending rows stay hidden"""
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self._names({'name_prefix': 'alp', 'ordering': 'name'}), ['alpha.txt', 'alpine.txt'])
+        self.assertEqual(self._names({'file_type': 'text/csv'}), ['report.csv'])
+        self.assertEqual(self._names({'min_size': 1.0, 'max_size': 1.5, 'ordering': 'size'}), ['beta.txt', 'report.csv'])
+        self.assertEqual(self._names({'uploaded_after': yesterday}), ['report.csv', 'beta.txt'])
+
+    def test_orderings_sort_by_the_requested_field(self):
+        """Test ascending and descending orderings on each sort field"""
+        self.assertEqual(self._names({}), ['report.csv', 'beta.txt', 'alpine.txt', 'alpha.txt'])
+        self.assertEqual(self._names({'ordering': 'uploaded_at'}), ['alpha.txt', 'alpine.txt', 'beta.txt', 'report.csv'])
+        self.assertEqual(self._names({'ordering': '-name'}), ['report.csv', 'beta.txt', 'alpine.txt', 'alpha.txt'])
+        self.assertEqual(self._names({'ordering': '-size'}), ['alpine.txt', 'report.csv', 'beta.txt', 'alpha.txt'])
+
+    @override_settings(FILE_LIST_PAGE_SIZE=1)
+    def test_cursors_walk_every_ordering(self):
+        """Test next and previous cursors follow a non-default ordering"""
+        seen = []
+        response = self.client.get(LIST_URL, {'ordering': 'size', 'name_prefix': 'al'})
+        while True:
+            seen.extend(item['name'] for item in response.data['data'])
+            cursor = response.data['pagination']['next']
+            if not cursor:
+                break
+            response = self.client.get(LIST_URL, {'ordering': 'size', 'name_prefix': 'al', 'cursor': cursor})
+        self.assertEqual(seen, ['alpha.txt', 'alpine.txt'])
+
+        back = self.client.get(
+            LIST_URL, {'ordering': 'size', 'name_prefix': 'al', 'cursor': response.data['pagination']['previous']}
+        )
+        self.assertEqual([item['name'] for item in back.data['data']], ['alpha.txt'])
+
+    def test_invalid_parameters_are_rejected(self):
+        """Test bad filter values, unknown orderings and foreign cursors get 400"""
+        cursor = self.client.get(LIST_URL, {'page_size': 1}).data['pagination']['next']
+        for params in (
+            {'ordering': 'content'},
+            {'min_size': 'big'},
+            {'uploaded_after': 'yesterday'},
+            {'ordering': 'name', 'cursor': cursor},
+        ):
+            response = self.client.get(LIST_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are checked on SQLite")
+class ListQueryPlanTest(TestCase):
+    """Each supported filter and ordering is an index range read, in index order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        FileUpload.objects.bulk_create([
+            FileUpload(name=f'file-{i}.txt', size=i, file_type='text/plain', s3_url=f'file-{i}.txt')
+            for i in range(200)
+        ])
+
+    def _plan(self, params):
+        request = Request(APIRequestFactory().get(LIST_URL, params))
+        queryset = FileFilter.from_query_params(request.query_params).filter_queryset(
+            FileUpload.objects.committed()
+        ).values('id', 'name', 'size', 'uploaded_at')
+        return KeysetPagination().get_page_queryset(queryset, request).explain()
+
+    def test_plans_use_the_list_indexes(self):
+        """Test no supported combination scans the table or sorts in a temp B-tree"""
+        cases = [
+            ({}, 'fileupload_list_uploaded_idx'),
+            ({'ordering': 'uploaded_at', 'uploaded_after': '2020-01-01'}, 'fileupload_list_uploaded_idx'),
+            ({'ordering': 'name', 'name_prefix': 'file-1'}, 'fileupload_list_name_idx'),
+            ({'ordering': '-name'}, 'fileupload_list_name_idx'),
+            ({'ordering': '-size', 'min_size': 5, 'max_size': 50}, 'fileupload_list_size_idx'),
+            ({'file_type': 'text/plain'}, 'fileupload_list_type_idx'),
+        ]
+        for params, index in cases:
+            with self.subTest(params=params):
+                plan = self._plan(params)
+                self.assertIn(f'INDEX {index} ', plan)
+                self.assertNotIn('SCAN api_fileupload', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,113 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.metrics import observe_stage
+from api.services.outbox import DeletionWorker
+from .s3_stub import FakeS3Client, patch_s3
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _stage_runs(stage):
+    return _sample('file_stage_duration_seconds_count', stage=stage)
+
+
+class ObserveStageTest(TestCase):
+    def test_success_counts_items_and_bytes(self):
+        """Test a completed stage is timed and feeds the throughput counters"""
+        before = (_stage_runs('s3_put'), _sample('file_stage_bytes_total', stage='s3_put'))
+
+        with observe_stage('s3_put', size=2048):
+            pass
+
+        self.assertEqual(_stage_runs('s3_put'), before[0] + 1)
+        self.assertEqual(_sample('file_stage_bytes_total', stage='s3_put'), before[1] + 2048)
+
+    def test_failure_counts_an_error(self):
+        """Test a stage that raises is timed and counted as an error"""
+        errors = _sample('file_stage_errors_total', stage='s3_head')
+        items = _sample('file_stage_items_total', stage='s3_head')
+
+        with self.assertRaises(ValueError):
+            with observe_stage('s3_head'):
+                raise ValueError
+
+        self.assertEqual(_sample('file_stage_errors_total', stage='s3_head'), errors + 1)
+        self.assertEqual(_sample('file_stage_items_total', stage='s3_head'), items)
+
+
+class PipelineMetricsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        s3_patch = patch_s3(FakeS3Client())
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def test_upload_and_delete_record_every_stage(self):
+        """Test an upload and delete time each stage they go through"""
+        stages = ('validate', 'content_scan', 's3_put', 'db_insert', 's3_delete')
+        before = {stage: _stage_runs(stage) for stage in stages}
+
+        upload = SimpleUploadedFile('a.txt', b'metrics body ' * 50, content_type='text/plain')
+        response = self.client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.delete(f"/api/files/{response.data['data']['id']}/")
+        DeletionWorker().drain()
+
+        for stage in stages:
+            self.assertGreater(_stage_runs(stage), before[stage], stage)
+
+    def test_requests_are_labelled_by_endpoint(self):
+        """Test latency, status and size are recorded per URL name, not path"""
+        labels = {'method': 'GET', 'endpoint': 'fileupload-detail'}
+        before = _sample('http_request_duration_seconds_count', **labels)
+        not_found = _sample('http_requests_total', status='404', **labels)
+
+        self.client.get('/api/files/12345/')
+        self.client.get('/api/files/67890/')
+
+        self.assertEqual(_sample('http_request_duration_seconds_count', **labels), before + 2)
+        self.assertEqual(_sample('http_requests_total', status='404', **labels), not_found + 2)
+        self.assertGreater(_sample('http_response_size_bytes_count', **labels), 0)
+
+    def test_metrics_endpoint_exposes_prometheus_text(self):
+        """Test /metrics serves the text exposition format"""
+        self.client.get('/api/files/')
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE file_stage_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{endpoint="fileupload-list",method="GET",status="200"}', body)
+
+    def test_metrics_endpoint_requires_the_token(self):
+        """Test /metrics needs the bearer token when set, or a local client"""
+        remote = self.client.get('/metrics', REMOTE_ADDR='203.0.113.5')
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            missing = self.client.get('/metrics')
+            wrong = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer guess')
+            allowed = self.client.get(
+                '/metrics', REMOTE_ADDR='203.0.113.5', HTTP_AUTHORIZATION='Bearer scrape-secret'
+            )
+
+        self.assertEqual(remote.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(missing.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(wrong.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+
+    def test_unknown_methods_share_one_label(self):
+        """Test invented HTTP methods are recorded as 'other'"""
+        labels = {'endpoint': 'fileupload-list', 'status': '405'}
+        other = _sample('http_requests_total', method='other', **labels)
+
+        self.client.generic('BREW', '/api/files/')
+        self.client.generic('PROPFIND', '/api/files/')
+
+        self.assertEqual(_sample('http_requests_total', method='other', **labels), other + 2)
+        self.assertEqual(_sample('http_requests_total', method='BREW', **labels), 0)
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from botocore.exceptions import EndpointConnectionError
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.models import ObjectDeletion, StoredObject
+from api.services.outbox import DeletionWorker, enqueue_deletions, retry_delay
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class DeletionOutboxTest(TestCase):
+    def setUp(self):
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _queue(self, *keys):
+        for key in keys:
+            self.s3_client.put_fixture(key, b'x')
+        enqueue_deletions(keys)
+
+    def test_enqueue_rolls_back_with_the_transaction(self):
+        """Test queued deletions only exist once their transaction commits"""
+        try:
+            with transaction.atomic():
+                enqueue_deletions(['a.txt'])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        enqueue_deletions(['b.txt', 'b.txt'])
+        enqueue_deletions(['b.txt'])
+
+        self.assertEqual(list(ObjectDeletion.objects.values_list('key', flat=True)), ['b.txt'])
+
+    def test_worker_deletes_in_batches_of_1000(self):
+        """Test the queue is drained with one DeleteObjects call per 1000 keys"""
+        self._queue(*[f'{i}.txt' for i in range(2500)])
+
+        handled = DeletionWorker().drain()
+
+        self.assertEqual(handled, 2500)
+        self.assertEqual(self.s3_client.calls.count('delete_objects'), 3)
+        self.assertEqual(self.s3_client.objects, {})
+        self.assertFalse(ObjectDeletion.objects.exists())
+
+    def test_failures_are_retried_with_backoff(self):
+        """Test a failed key waits longer after every attempt"""
+        self._queue('stuck.txt')
+        self.s3_client.delete_errors['stuck.txt'] = 'SlowDown'
+        worker = DeletionWorker()
+
+        waits = []
+        for _ in range(3):
+            before = timezone.now()
+            self.assertEqual(worker.drain(), 1)
+            entry = ObjectDeletion.objects.get()
+            waits.append(entry.available_at - before)
+            # Make the entry due again without waiting out the delay
+            ObjectDeletion.objects.update(available_at=before)
+
+        self.assertEqual(entry.attempts, 3)
+        self.assertIn('SlowDown', entry.last_error)
+        self.assertLess(waits[0], waits[2])
+
+        del self.s3_client.delete_errors['stuck.txt']
+        worker.drain()
+        self.assertFalse(ObjectDeletion.objects.exists())
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_unreachable_storage_backs_off_every_entry(self):
+        """Test an exception from the delete call is recorded on the whole batch"""
+        self._queue('a.txt', 'b.txt')
+
+        def unreachable(**kwargs):
+            raise EndpointConnectionError(endpoint_url='https://s3.amazonaws.com')
+
+        self.s3_client.delete_objects = unreachable
+        before = timezone.now()
+
+        self.assertEqual(DeletionWorker().drain(), 2)
+
+        for entry in ObjectDeletion.objects.all():
+            self.assertEqual(entry.attempts, 1)
+            self.assertIn('Could not connect', entry.last_error)
+            self.assertGreater(entry.available_at, before)
+
+    @override_settings(FILE_DELETE_RETRY_BASE_DELAY=5, FILE_DELETE_RETRY_MAX_DELAY=60)
+    def test_retry_delay_is_capped(self):
+        """Test backoff grows exponentially up to the configured maximum"""
+        with patch('api.services.outbox.random.uniform', return_value=1.0):
+            delays = [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 10)]
+        self.assertEqual(delays, [5, 10, 20, 60])
+
+    @override_settings(FILE_DELETE_MAX_ATTEMPTS=2)
+    def test_worker_gives_up_after_max_attempts(self):
+        """Test an entry that keeps failing is left in the table, unclaimed"""
+        self._queue('stuck.txt')
+        self.s3_client.delete_errors['stuck.txt'] = 'AccessDenied'
+        worker = DeletionWorker()
+
+        for _ in range(3):
+            worker.drain()
+            ObjectDeletion.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(ObjectDeletion.objects.get().attempts, 2)
+        self.assertEqual(self.s3_client.calls.count('delete_objects'), 2)
+
+    def test_referenced_keys_are_not_deleted(self):
+        """Test a key that is referenced again is dropped from the queue"""
+        self._queue('shared.txt', 'orphan.txt')
+        StoredObject.objects.create(content_hash='a' * 64, key='shared.txt', ref_count=1)
+
+        DeletionWorker().drain()
+
+        self.assertEqual(list(self.s3_client.objects), ['shared.txt'])
+        self.assertFalse(ObjectDeletion.objects.exists())
+
+    def test_command_drains_once(self):
+        """Test process_deletions --once reports what it handled"""
+        self._queue('a.txt', 'b.txt')
+        out = StringIO()
+
+        call_command('process_deletions', '--once', stdout=out)
+
+        self.assertIn('Processed 2 queued deletions', out.getvalue())
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_command_survives_a_failed_batch(self):
+        """Test the polling loop logs an error, sleeps and carries on"""
+        out = StringIO()
+        batches = [RuntimeError('db down'), 0, KeyboardInterrupt]
+        with patch.object(DeletionWorker, 'process_batch', side_effect=batches), \
+                patch('api.management.commands.process_deletions.time.sleep') as sleep:
+            call_command('process_deletions', stdout=out)
+
+        self.assertEqual(sleep.call_count, 2)
+        self.assertIn('Stopped', out.getvalue())
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload
+from .test_constants import TEST_FILES, S3_CONFIG
+
+
+@override_settings(FILE_LIST_PAGE_SIZE=3, FILE_LIST_MAX_PAGE_SIZE=5)
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = '/api/files/'
+        test_file = TEST_FILES['VALID_TEXT']
+        now = timezone.now()
+
+        for index in range(8):
+            file = FileUpload.objects.create(
+                name=f"file-{index}.txt",
+                size=test_file['size'],
+                content=test_file['content'],
+                file_type=test_file['type'],
+                s3_url=f"{S3_CONFIG['BUCKET_URL']}/file-{index}.txt"
+            )
+            # Pairs of rows share a timestamp so ties are broken by id
+            FileUpload.objects.filter(pk=file.pk).update(
+                uploaded_at=now - timedelta(minutes=index // 2)
+            )
+
+        self.expected_ids = list(
+            FileUpload.objects.order_by('-uploaded_at', '-id').values_list('id', flat=True)
+        )
+
+    def _ids(self, response):
+        return [f['id'] for f in response.data['data']]
+
+    def test_walk_forward_through_all_pages(self):
+        """Test following next cursors returns every row exactly once, in order"""
+        seen = []
+        response = self.client.get(self.list_url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(self._ids(response))
+            next_cursor = response.data['pagination']['next']
+            if not next_cursor:
+                break
+            response = self.client.get(self.list_url, {'cursor': next_cursor})
+
+        self.assertEqual(seen, self.expected_ids)
+
+    def test_previous_cursor_returns_prior_page(self):
+        """Test the previous cursor of page two points back to page one"""
+        first = self.client.get(self.list_url)
+        self.assertIsNone(first.data['pagination']['previous'])
+
+        second = self.client.get(self.list_url, {'cursor': first.data['pagination']['next']})
+        self.assertEqual(self._ids(second), self.expected_ids[3:6])
+
+        back = self.client.get(self.list_url, {'cursor': second.data['pagination']['previous']})
+        self.assertEqual(self._ids(back), self._ids(first))
+        self.assertIsNone(back.data['pagination']['previous'])
+
+    def test_page_size_is_capped(self):
+        """Test a page_size above the maximum is clamped"""
+        response = self.client.get(self.list_url, {'page_size': 100})
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertEqual(response.data['pagination']['page_size'], 5)
+
+    def test_invalid_cursor_and_page_size(self):
+        """Test malformed pagination parameters are rejected"""
+        for params in ({'cursor': 'not-a-cursor'}, {'page_size': 'abc'}, {'page_size': 0}):
+            response = self.client.get(self.list_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(response.data['success'])
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import boto3
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from api.models import FileUpload
+from api.profiling import RequestProfile, instrument_s3_client
+
+
+def _client(**settings):
+    """An APIClient whose middleware is loaded with these profiler settings."""
+    with override_settings(**{'PROFILER_ENABLED': True, 'PROFILER_TOKEN': 'secret', **settings}):
+        client = APIClient()
+        # Middleware is loaded on the first request
+        client.get('/api/files/', HTTP_X_PROFILE='wrong')
+    # That request cached the list; profiled ones should hit the database
+    cache.clear()
+    return client
+
+
+class ProfilerMiddlewareTest(TestCase):
+    def setUp(self):
+        FileUpload.objects.create(
+            name='a.txt', size=1.0, content='x', file_type='text/plain',
+            s3_url='https://test-bucket.s3.amazonaws.com/a.txt'
+        )
+
+    def test_disabled_by_default(self):
+        """Test nothing is profiled unless the profiler is enabled"""
+        response = APIClient().get('/api/files/', HTTP_X_PROFILE='')
+
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_token_header_profiles_request(self):
+        """Test a request with the token gets a Server-Timing summary"""
+        client = _client()
+
+        profiled = client.get('/api/files/', HTTP_X_PROFILE='secret')
+        plain = client.get('/api/files/', HTTP_X_PROFILE='wrong')
+
+        self.assertIn('X-Profile-Id', profiled)
+        timing = profiled['Server-Timing']
+        for metric in ('total;dur=', 'cpu;dur=', 'sql;dur=', 's3;dur=', 'desc="0 calls"'):
+            self.assertIn(metric, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+        self.assertNotIn('X-Profile-Id', plain)
+        self.assertNotIn('Server-Timing', plain)
+
+    def test_sample_rate_profiles_without_header(self):
+        """Test sampling profiles requests that send no token"""
+        client = _client(PROFILER_TOKEN='', PROFILER_SAMPLE_RATE=1.0)
+
+        self.assertIn('X-Profile-Id', client.get('/api/files/'))
+
+    def test_report_is_written_to_output_dir(self):
+        """Test the CPU profile and the JSON report land in the output directory"""
+        with tempfile.TemporaryDirectory() as output_dir:
+            client = _client(PROFILER_OUTPUT_DIR=output_dir)
+
+            profile_id = client.get('/api/files/', HTTP_X_PROFILE='secret')['X-Profile-Id']
+
+            self.assertTrue(os.path.exists(os.path.join(output_dir, f'{profile_id}.prof')))
+            with open(os.path.join(output_dir, f'{profile_id}.json')) as report_file:
+                report = json.load(report_file)
+        self.assertEqual(report['path'], '/api/files/')
+        self.assertEqual(report['status'], 200)
+        self.assertTrue(any('api_fileupload' in query['sql'] for query in report['queries']))
+        self.assertIn('cumulative', report['cpu_top'])
+
+
+class S3CallAccountingTest(TestCase):
+    def setUp(self):
+        client = boto3.session.Session().client(
+            's3', region_name='us-east-1', aws_access_key_id='x', aws_secret_access_key='y'
+        )
+        self.s3_client = instrument_s3_client(client)
+        self.stubber = Stubber(self.s3_client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    def test_calls_are_recorded_while_profiling(self):
+        """Test every S3 call in a profiled block is recorded with its outcome"""
+        self.stubber.add_response('head_object', {'ContentLength': 3}, {'Bucket': 'b', 'Key': 'k'})
+        self.stubber.add_client_error('get_object', 'NoSuchKey')
+
+        with RequestProfile() as profile:
+            self.s3_client.head_object(Bucket='b', Key='k')
+            with self.assertRaises(ClientError):
+                self.s3_client.get_object(Bucket='b', Key='missing')
+
+        self.assertEqual(
+            [(call['operation'], call['error']) for call in profile.s3_calls],
+            [('HeadObject', None), ('GetObject', 'NoSuchKey')]
+        )
+        self.assertTrue(all(call['ms'] >= 0 for call in profile.s3_calls))
+
+    def test_calls_outside_profiles_are_ignored(self):
+        """Test unprofiled calls leave no trace"""
+        self.stubber.add_response('head_object', {'ContentLength': 3}, {'Bucket': 'b', 'Key': 'k'})
+        with RequestProfile() as profile:
+            pass
+
+        self.s3_client.head_object(Bucket='b', Key='k')
+
+        self.assertEqual(profile.s3_calls, [])
@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileUpload
+from .s3_stub import FakeS3Client, patch_s3
+
+
+def body(i):
+    return f'cached file {i} '.encode() * 40
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _upload(self, i=0):
+        upload = SimpleUploadedFile(f'{i}.txt', body(i), content_type='text/plain')
+        response = self.client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['data']['id']
+
+    def test_list_is_served_from_cache(self):
+        """Test a repeated list runs no query and keeps its ETag"""
+        self._upload()
+        first = self.client.get('/api/files/')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/files/')
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['data'], first.data['data'])
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('no-cache', second['Cache-Control'])
+
+    def test_matching_etag_answers_304(self):
+        """Test If-None-Match with the current ETag gets an empty 304"""
+        self._upload()
+        etag = self.client.get('/api/files/')['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/files/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+        stale = self.client.get('/api/files/', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_query_parameters_are_cached_separately(self):
+        """Test different pages and fieldsets do not share an entry"""
+        for i in range(3):
+            self._upload(i)
+
+        full = self.client.get('/api/files/')
+        page = self.client.get('/api/files/', {'page_size': 2, 'fields': 'id'})
+
+        self.assertEqual(len(full.data['data']), 3)
+        self.assertEqual([set(item) for item in page.data['data']], [{'id'}] * 2)
+        self.assertNotEqual(full['ETag'], page['ETag'])
+
+    def test_writes_invalidate_the_cache(self):
+        """Test uploads and deletes change the list and its ETag"""
+        first_id = self._upload(0)
+        before = self.client.get('/api/files/')
+
+        second_id = self._upload(1)
+        after_upload = self.client.get('/api/files/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after_upload.status_code, status.HTTP_200_OK)
+        self.assertEqual({item['id'] for item in after_upload.data['data']}, {first_id, second_id})
+
+        self.client.post('/api/files/bulk-delete/', {'ids': [first_id]}, format='json')
+        after_delete = self.client.get('/api/files/', HTTP_IF_NONE_MATCH=after_upload['ETag'])
+        self.assertEqual(after_delete.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in after_delete.data['data']], [second_id])
+
+    def test_rows_saved_elsewhere_invalidate_the_cache(self):
+        """Test a row saved outside FileService, e.g. in the admin, is seen"""
+        self.client.get('/api/files/')
+        FileUpload.objects.create(
+            name='admin.txt', size=1.0, content='x', file_type='text/plain',
+            s3_url='https://test-bucket.s3.amazonaws.com/admin.txt'
+        )
+
+        response = self.client.get('/api/files/')
+
+        self.assertEqual(len(response.data['data']), 1)
+
+    def test_rows_deleted_elsewhere_invalidate_the_cache(self):
+        """Test admin and queryset deletes drop cached bodies and ETags"""
+        first_id, second_id = self._upload(0), self._upload(1)
+        listed = self.client.get('/api/files/')
+        detail = self.client.get(f'/api/files/{first_id}/')
+
+        FileUpload.objects.get(pk=second_id).delete()
+        after_list = self.client.get('/api/files/', HTTP_IF_NONE_MATCH=listed['ETag'])
+        self.assertEqual(after_list.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in after_list.data['data']], [first_id])
+
+        FileUpload.objects.filter(pk=first_id).delete()
+        after_detail = self.client.get(f'/api/files/{first_id}/', HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(after_detail.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_is_cached_with_etag(self):
+        """Test retrieve caches the file and honours If-None-Match"""
+        file_id = self._upload()
+        first = self.client.get(f'/api/files/{file_id}/')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(f'/api/files/{file_id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['id'], file_id)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.delete(f'/api/files/{file_id}/')
+        self.assertEqual(self.client.get(f'/api/files/{file_id}/').status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.test import TestCase, override_settings
+from api.services import s3
+from api.services.s3 import S3Service, get_s3_client, reset_s3_client
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class SharedS3ClientTest(TestCase):
+    def setUp(self):
+        reset_s3_client()
+
+    def tearDown(self):
+        reset_s3_client()
+
+    def test_services_share_one_client(self):
+        """Test every S3Service instance reuses the process-wide client"""
+        self.assertIs(S3Service().s3_client, S3Service().s3_client)
+        self.assertIs(S3Service().s3_client, get_s3_client())
+
+    def test_client_built_once_under_concurrency(self):
+        """Test concurrent first use still builds a single client"""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: get_s3_client(), range(32)))
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    @override_settings(
+        AWS_S3_MAX_POOL_CONNECTIONS=7,
+        AWS_S3_CONNECT_TIMEOUT=1.5,
+        AWS_S3_READ_TIMEOUT=9
+    )
+    def test_client_uses_configured_pool_and_timeouts(self):
+        """Test pool size and timeouts are taken from settings"""
+        config = get_s3_client().meta.config
+        self.assertEqual(config.max_pool_connections, 7)
+        self.assertEqual(config.connect_timeout, 1.5)
+        self.assertEqual(config.read_timeout, 9)
+
+    def test_reset_builds_new_client(self):
+        """Test reset_s3_client drops the cached client"""
+        first = get_s3_client()
+        reset_s3_client()
+        self.assertIsNone(s3._client)
+        self.assertIsNot(get_s3_client(), first)
+
+
+class PresignedPostTest(TestCase):
+    def setUp(self):
+        reset_s3_client()
+        self.addCleanup(reset_s3_client)
+
+    def test_policy_pins_type_and_size(self):
+        """Test the presigned POST policy carries the upload conditions"""
+        presigned = S3Service().generate_presigned_post('a.txt', 'text/plain', 512, 2048, 60)
+        policy = json.loads(base64.b64decode(presigned['fields']['policy']))
+
+        self.assertIn(['content-length-range', 512, 2048], policy['conditions'])
+        self.assertIn({'Content-Type': 'text/plain'}, policy['conditions'])
+        self.assertEqual(presigned['fields']['key'], 'a.txt')
+
+
+class TransferPolicyTest(TestCase):
+    def setUp(self):
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def test_small_files_take_single_put(self):
+        """Test uploads below the threshold skip the managed transfer"""
+        with self.assertLogs('api.services.s3', level='INFO') as logs:
+            url, metadata = S3Service().upload_file(io.BytesIO(b'x' * 1000), 'a.txt', 'text/plain')
+
+        self.assertIn('put_object', self.s3_client.calls)
+        self.assertNotIn('upload_fileobj', self.s3_client.calls)
+        self.assertTrue(url.endswith('/a.txt'))
+        self.assertIn('single-part upload of a.txt: 1000 bytes', logs.output[0])
+
+    @override_settings(
+        AWS_S3_MULTIPART_THRESHOLD=1024,
+        AWS_S3_MULTIPART_CHUNKSIZE=5 * 1024 * 1024,
+        AWS_S3_MAX_CONCURRENCY=4,
+        AWS_S3_USE_THREADS=False
+    )
+    def test_large_files_use_configured_multipart_policy(self):
+        """Test uploads above the threshold go through the transfer manager"""
+        with self.assertLogs('api.services.s3', level='INFO') as logs:
+            S3Service().upload_file(io.BytesIO(b'x' * 4096), 'big.txt', 'text/plain')
+
+        self.assertIn('upload_fileobj', self.s3_client.calls)
+        config = self.s3_client.transfer_configs[0]
+        self.assertEqual(config.multipart_threshold, 1024)
+        self.assertEqual(config.multipart_chunksize, 5 * 1024 * 1024)
+        self.assertEqual(config.max_concurrency, 4)
+        self.assertFalse(config.use_threads)
+        self.assertIn('multipart upload of big.txt: 4096 bytes', logs.output[0])
+
+
+class UploadMetadataTest(TestCase):
+    def setUp(self):
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def test_single_put_reads_metadata_from_the_response(self):
+        """Test a PUT upload needs no HEAD to know its ETag and version"""
+        body = b'x' * 1000
+        url, metadata = S3Service().upload_file(io.BytesIO(body), 'a.txt', 'text/plain', {'size': '1000'})
+
+        self.assertEqual(self.s3_client.calls, ['put_object'])
+        stored = self.s3_client.objects['a.txt']
+        self.assertEqual(metadata['ETag'], hashlib.md5(body).hexdigest())
+        self.assertEqual(metadata['VersionId'], stored['VersionId'])
+        self.assertIsNotNone(metadata['LastModified'])
+        self.assertEqual(metadata['size'], '1000')
+
+    @override_settings(AWS_S3_MULTIPART_THRESHOLD=1024)
+    def test_multipart_etag_is_computed_locally(self):
+        """Test the managed transfer path derives the multipart ETag"""
+        body = b'y' * 4096
+        _, metadata = S3Service().upload_file(io.BytesIO(body), 'big.txt', 'text/plain')
+
+        self.assertNotIn('head_object', self.s3_client.calls)
+        expected = hashlib.md5(hashlib.md5(body).digest()).hexdigest()
+        self.assertEqual(metadata['ETag'], f'{expected}-1')
+        self.assertIsNone(metadata['VersionId'])
+
+    @override_settings(AWS_S3_VERIFY_UPLOADS=True)
+    def test_verify_mode_checks_the_stored_object(self):
+        """Test verification reads the object back and rejects mismatches"""
+        _, metadata = S3Service().upload_file(io.BytesIO(b'x' * 1000), 'a.txt', 'text/plain')
+        self.assertEqual(self.s3_client.calls, ['put_object', 'head_object'])
+        self.assertEqual(metadata['ETag'], self.s3_client.objects['a.txt']['ETag'].strip('"'))
+
+        self.s3_client.put_object = lambda **kwargs: {'ETag': '"stale"'}
+        with self.assertLogs('api.services.s3', level='ERROR'):
+            self.assertEqual(
+                S3Service().upload_file(io.BytesIO(b'z' * 1000), 'a.txt', 'text/plain'),
+                (None, None)
+            )
+
+    def test_upload_latency_without_head(self):
+        """Test dropping the HEAD saves a round trip per upload"""
+        self.s3_client.latency = 0.01
+        uploads = 10
+
+        def timed(verify):
+            with override_settings(AWS_S3_VERIFY_UPLOADS=verify):
+                service = S3Service()
+                started = time.perf_counter()
+                for i in range(uploads):
+                    service.upload_file(io.BytesIO(b'x' * 1000), f'{i}.txt', 'text/plain')
+                return time.perf_counter() - started
+
+        verified = timed(True)
+        direct = timed(False)
+
+        self.assertEqual(self.s3_client.calls.count('head_object'), uploads)
+        self.assertEqual(self.s3_client.calls.count('put_object'), 2 * uploads)
+        # One simulated round trip per upload instead of two
+        self.assertLess(direct, verified)
+        self.assertGreaterEqual(verified - direct, uploads * self.s3_client.latency * 0.5)
@@ -0,0 +1,69 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.services.file_service import FileService
+from .s3_stub import patch_s3
+
+
+def _text_file(name, text):
+    # Pad to the minimum upload size with neutral filler
+    body = (text + ' ' + 'lorem ipsum ' * 60)[:600]
+    return SimpleUploadedFile(name, body.encode(), content_type='text/plain')
+
+
+class FileSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.search_url = '/api/files/search/'
+        self.s3_patch = patch_s3()
+        self.s3_patch.start()
+        self.addCleanup(self.s3_patch.stop)
+
+        service = FileService()
+        self.invoice = service.create_file(_text_file('invoice.txt', 'quarterly invoice for hosting'))
+        self.notes = service.create_file(_text_file('notes.txt', 'meeting notes about hosting costs'))
+        self.recipe = service.create_file(_text_file('recipe.txt', 'pancake recipe with <b>syrup</b>'))
+
+    def _ids(self, response):
+        return [f['id'] for f in response.data['data']]
+
+    def test_search_returns_ranked_matches_with_snippets(self):
+        """Test matching files are returned with highlighted snippets"""
+        response = self.client.get(self.search_url, {'q': 'hosting'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(self._ids(response), [self.invoice.id, self.notes.id])
+        for item in response.data['data']:
+            self.assertIn('<mark>hosting</mark>', item['snippet'])
+            self.assertNotIn('content', item)
+
+    def test_all_terms_must_match_and_last_is_prefix(self):
+        """Test multi-term queries are conjunctive with prefix on the last term"""
+        response = self.client.get(self.search_url, {'q': 'hosting invo'})
+        self.assertEqual(self._ids(response), [self.invoice.id])
+
+    def test_snippets_are_html_escaped(self):
+        """Test markup inside content cannot leak into the snippet"""
+        response = self.client.get(self.search_url, {'q': 'syrup'})
+        self.assertIn('&lt;b&gt;<mark>syrup</mark>', response.data['data'][0]['snippet'])
+
+    def test_search_is_paginated(self):
+        """Test results are split into pages"""
+        first = self.client.get(self.search_url, {'q': 'lorem', 'page_size': 2})
+        self.assertEqual(len(first.data['data']), 2)
+        self.assertEqual(first.data['pagination']['next'], 2)
+
+        second = self.client.get(self.search_url, {'q': 'lorem', 'page_size': 2, 'page': 2})
+        self.assertEqual(len(second.data['data']), 1)
+        self.assertIsNone(second.data['pagination']['next'])
+
+    def test_deleted_files_leave_the_index(self):
+        """Test delete_file removes the file from the full-text index"""
+        FileService().delete_file(self.recipe)
+        response = self.client.get(self.search_url, {'q': 'pancake'})
+        self.assertEqual(self._ids(response), [])
+
+    def test_missing_query_is_rejected(self):
+        """Test an empty query returns 400"""
+        response = self.client.get(self.search_url, {'q': '  ""  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,93 @@
+import io
+from botocore.exceptions import ClientError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import FileStat, FileUpload
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class FileStatsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _upload(self, body, name='a.txt'):
+        upload = SimpleUploadedFile(name, body, content_type='text/plain')
+        return self.client.post('/api/files/', {'file': upload}, format='multipart')
+
+    def _stats(self):
+        response = self.client.get('/api/files/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['data']
+
+    def test_uploads_and_deletes_adjust_the_counters(self):
+        """Test single, duplicate and batch uploads count, and deletes uncount"""
+        first = self._upload(b'first body ' * 60)
+        self._upload(b'first body ' * 60, name='copy.txt')
+        batch = [
+            SimpleUploadedFile(f'b{i}.txt', f'batch body {i} '.encode() * 50, content_type='text/plain')
+            for i in range(2)
+        ]
+        self.client.post('/api/files/batch/', {'files': batch}, format='multipart')
+        self.client.delete(f"/api/files/{first.data['data']['id']}/")
+
+        stats = self._stats()
+
+        sizes = [round(size * 1024) for size in FileUpload.objects.values_list('size', flat=True)]
+        self.assertEqual((stats['total_files'], stats['total_bytes']), (3, sum(sizes)))
+        self.assertEqual(stats['by_type'], [{'file_type': 'text/plain', 'count': 3, 'bytes': sum(sizes)}])
+        self.assertEqual(stats['by_day'], [
+            {'date': timezone.localdate().isoformat(), 'count': 3, 'bytes': sum(sizes)}
+        ])
+
+    def test_failed_uploads_are_not_counted(self):
+        """Test a pending row that never commits leaves the counters alone"""
+        def failing_put_object(**kwargs):
+            raise ClientError({'Error': {'Code': '500', 'Message': 'boom'}}, 'PutObject')
+
+        self.s3_client.put_object = failing_put_object
+        self._upload(b'doomed body ' * 50)
+
+        self.assertEqual(self._stats()['total_files'], 0)
+
+    def test_reads_cost_one_query_whatever_the_file_count(self):
+        """Test the endpoint reads the counters, never FileUpload"""
+        for i in range(5):
+            self._upload(f'body {i} '.encode() * 80, name=f'{i}.txt')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self._stats()['total_files'], 5)
+
+
+class RebuildFileStatsTest(TestCase):
+    def test_rebuild_recomputes_from_committed_files(self):
+        """Test the command replaces drifted counters with recomputed ones"""
+        for name, file_type, size, status_ in (
+            ('a.txt', 'text/plain', 1.5, FileUpload.Status.COMMITTED),
+            ('b.csv', 'text/csv', 2.0, FileUpload.Status.COMMITTED),
+            ('c.txt', 'text/plain', 4.0, FileUpload.Status.PENDING),
+        ):
+            FileUpload.objects.create(
+                name=name, size=size, content='x', file_type=file_type, status=status_,
+                s3_url=f'https://test-bucket.s3.amazonaws.com/{name}'
+            )
+        FileStat.objects.update_or_create(
+            dimension=FileStat.Dimension.TOTAL, key='', defaults={'file_count': 99, 'total_bytes': 1}
+        )
+
+        call_command('rebuild_file_stats', stdout=io.StringIO())
+
+        stats = APIClient().get('/api/files/stats/').data['data']
+        self.assertEqual((stats['total_files'], stats['total_bytes']), (2, 3584))
+        self.assertEqual(
+            [(item['file_type'], item['count'], item['bytes']) for item in stats['by_type']],
+            [('text/csv', 1, 2048), ('text/plain', 1, 1536)]
+        )
+        self.assertEqual(stats['by_day'][0]['count'], 2)
@@ -0,0 +1,174 @@
+import io
+import os
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import FileResponse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.exceptions import RangeNotSatisfiableError
+from api.services.storage import DiskCache, LocalStorage, MemoryStorage, TieredStorage, get_storage
+from api.utils.ranges import resolve_byte_range
+from .s3_stub import FakeS3Client, patch_s3
+
+BODY = b''.join(f'row {i:04d}\n'.encode() for i in range(200))
+
+
+def _content(response):
+    return b''.join(response.streaming_content)
+
+
+class ResolveByteRangeTest(TestCase):
+    def test_ranges_resolve_like_s3(self):
+        """Test bounded, open and suffix ranges are clamped to the object"""
+        self.assertEqual(resolve_byte_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(resolve_byte_range('bytes=90-200', 100), (90, 99))
+        self.assertEqual(resolve_byte_range('bytes=-500', 100), (0, 99))
+        with self.assertRaises(RangeNotSatisfiableError) as raised:
+            resolve_byte_range('bytes=100-', 100)
+        self.assertEqual(raised.exception.size, 100)
+
+
+class LocalStorageTest(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.storage = LocalStorage(root.name)
+
+    def test_round_trip(self):
+        """Test an object is written, read, ranged, listed and deleted"""
+        url, metadata = self.storage.upload_file(io.BytesIO(BODY), 'a.txt', 'text/plain', {'owner': 'qa'})
+
+        self.assertTrue(url.startswith('file://') and url.endswith('/a.txt'))
+        self.assertEqual(metadata['owner'], 'qa')
+        body, info = self.storage.get_object('a.txt', 10)
+        self.assertEqual((body, info['size'], info['ETag']), (BODY[:10], len(BODY), metadata['ETag']))
+        chunks, info = self.storage.open_object('a.txt', 'bytes=5-14', chunk_size=4)
+        self.assertEqual(b''.join(chunks), BODY[5:15])
+        self.assertEqual(info['content_range'], f'bytes 5-14/{len(BODY)}')
+        self.assertEqual([key for key, _ in self.storage.list_objects()], ['a.txt'])
+
+        self.assertEqual(self.storage.delete_files(['a.txt']), {})
+        self.assertEqual(self.storage.open_object('a.txt'), (None, None))
+
+    def test_keys_cannot_escape_the_root(self):
+        """Test keys with path components are refused"""
+        for key in ('../a.txt', 'sub/a.txt', '.meta'):
+            self.assertEqual(self.storage.upload_file(io.BytesIO(b'x'), key), (None, None))
+
+
+class DiskCacheTest(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+    def test_least_recently_used_is_evicted(self):
+        """Test going past the size bound drops the coldest object first"""
+        cache = DiskCache(self.root, max_bytes=250, max_object_bytes=100)
+        cache.put('a.txt', [b'a' * 100], {})
+        cache.put('b.txt', [b'b' * 100], {})
+        chunks, _ = cache.open_object('a.txt')
+        chunks.close()
+
+        cache.put('c.txt', [b'c' * 100], {})
+
+        self.assertTrue(cache.contains('a.txt'))
+        self.assertFalse(cache.contains('b.txt'))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'b.txt')))
+        self.assertEqual(cache.size, 200)
+
+    def test_oversized_objects_are_not_cached(self):
+        """Test an object above the per-object bound leaves nothing behind"""
+        cache = DiskCache(self.root, max_bytes=1000, max_object_bytes=100)
+
+        self.assertFalse(cache.put('big.txt', [b'x' * 60, b'x' * 60], {}))
+        self.assertFalse(cache.contains('big.txt'))
+        self.assertEqual([name for name in os.listdir(self.root) if not name.startswith('.')], [])
+
+    def test_restart_reloads_the_directory(self):
+        """Test a new process picks up what an earlier one cached"""
+        DiskCache(self.root, max_bytes=1000, max_object_bytes=100).put('a.txt', [b'abc'], {})
+
+        cache = DiskCache(self.root, max_bytes=1000, max_object_bytes=100)
+
+        self.assertTrue(cache.contains('a.txt'))
+        self.assertEqual(cache.size, 3)
+
+
+class TieredDownloadTest(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings = override_settings(FILE_STORAGE_CACHE_DIR=cache_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+        self.client = APIClient()
+        upload = SimpleUploadedFile('report.txt', BODY, content_type='text/plain')
+        response = self.client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.url = f"/api/files/{response.data['data']['id']}/download/"
+        self.key = response.data['data']['s3_url'].split('/')[-1]
+
+    def _s3_gets(self):
+        return self.s3_client.calls.count('get_object')
+
+    def test_uploads_are_served_from_disk(self):
+        """Test a written-through upload downloads without touching S3"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(_content(response), BODY)
+        self.assertEqual(response['Content-Length'], str(len(BODY)))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.txt"')
+        self.assertEqual(self._s3_gets(), 0)
+
+    def test_miss_fills_the_cache_once(self):
+        """Test only the first read of an uncached object goes to S3"""
+        storage = get_storage()
+        self.assertIsInstance(storage, TieredStorage)
+        storage.cache.discard([self.key])
+
+        first = self.client.get(self.url, {'mode': 'stream'}, HTTP_RANGE='bytes=10-19')
+        second = self.client.get(self.url, {'mode': 'stream'}, HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(first.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(_content(first), BODY[10:20])
+        self.assertEqual(second['Content-Range'], f'bytes {len(BODY) - 5}-{len(BODY) - 1}/{len(BODY)}')
+        self.assertEqual(_content(second), BODY[-5:])
+        self.assertEqual(self._s3_gets(), 1)
+
+    def test_delete_drops_the_cached_copy(self):
+        """Test deleting an object also removes it from the cache"""
+        storage = get_storage()
+
+        storage.delete_files([self.key])
+
+        self.assertFalse(storage.cache.contains(self.key))
+        self.assertNotIn(self.key, self.s3_client.objects)
+
+
+@override_settings(FILE_STORAGE_BACKEND='memory')
+class MemoryBackendTest(TestCase):
+    def setUp(self):
+        self.addCleanup(MemoryStorage.clear)
+
+    def test_upload_and_download_without_s3(self):
+        """Test the API works end to end on the in-memory backend"""
+        client = APIClient()
+        upload = SimpleUploadedFile('a.txt', BODY, content_type='text/plain')
+        response = client.post('/api/files/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['data']['s3_url'].startswith('memory://'))
+
+        # Redirect is the default mode, but there is nothing to redirect to
+        download = client.get(f"/api/files/{response.data['data']['id']}/download/")
+
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(_content(download), BODY)
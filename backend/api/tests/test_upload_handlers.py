@@ -0,0 +1,128 @@
+import hashlib
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import SkipFile
+from django.test import TestCase, SimpleTestCase, RequestFactory
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.exceptions import FileValidationError, SuspiciousContentError
+from api.models import FileUpload
+from api.upload_handlers import ValidatingUploadHandler
+from .s3_stub import FakeS3Client, patch_s3
+
+
+class ValidatingUploadHandlerTest(SimpleTestCase):
+    def setUp(self):
+        # Allow many files so the Content-Length precheck never triggers
+        self.handler = ValidatingUploadHandler(RequestFactory().post('/'), max_files=1000)
+
+    def _start(self, name='notes.txt', content_type='text/plain'):
+        self.handler.new_file('file', name, content_type, None)
+
+    def test_streams_chunks_into_validated_file(self):
+        """Test chunks are decoded across boundaries, hashed and kept"""
+        body = ('héllo wörld ' * 60).encode()
+        self._start()
+        # 7-byte chunks split multi-byte characters in half
+        for start in range(0, len(body), 7):
+            self.handler.receive_data_chunk(body[start:start + 7], start)
+        upload = self.handler.file_complete(len(body))
+
+        self.assertEqual(upload.size, len(body))
+        self.assertEqual(upload.validated_text, body.decode())
+        self.assertEqual(upload.sha256, hashlib.sha256(body).hexdigest())
+        self.assertEqual(upload.read(), body)
+
+    def test_rejects_wrong_type_before_reading(self):
+        """Test type and extension are checked from the part headers"""
+        with self.assertRaises(FileValidationError):
+            self._start(name='run.exe', content_type='application/exe')
+
+    def test_aborts_at_the_chunk_that_exceeds_the_limit(self):
+        """Test the size limit stops the upload mid-stream"""
+        self._start()
+        self.handler.receive_data_chunk(b'x' * 2000, 0)
+        with self.assertRaises(FileValidationError):
+            self.handler.receive_data_chunk(b'x' * 100, 2000)
+
+    def test_aborts_on_invalid_utf8(self):
+        """Test invalid bytes fail as soon as they are decoded"""
+        self._start()
+        with self.assertRaises(FileValidationError):
+            self.handler.receive_data_chunk(b'ok \xff\xfe', 0)
+
+    def test_aborts_when_a_chunk_is_malicious(self):
+        """Test the scanner rejects content without waiting for the end"""
+        self._start()
+        self.handler.receive_data_chunk(b'a' * 100, 0)
+        with self.assertRaises(SuspiciousContentError) as ctx:
+            self.handler.receive_data_chunk(b"'; DROP TABLE users; --", 100)
+        self.assertEqual(ctx.exception.rules, ('drop_table',))
+
+
+class BatchModeUploadHandlerTest(SimpleTestCase):
+    def setUp(self):
+        self.handler = ValidatingUploadHandler(
+            RequestFactory().post('/'), max_files=10, abort_on_error=False
+        )
+
+    def _upload(self, name, body, content_type='text/plain'):
+        try:
+            self.handler.new_file('files', name, content_type, None)
+            self.handler.receive_data_chunk(body, 0)
+        except SkipFile:
+            return None
+        return self.handler.file_complete(len(body))
+
+    def test_records_every_file_in_order(self):
+        """Test invalid files are skipped and recorded instead of aborting"""
+        good = self._upload('good.txt', b'a' * 600)
+        skipped = self._upload('big.txt', b'a' * 5000)
+        short = self._upload('short.txt', b'a')
+
+        self.assertIsNotNone(good)
+        self.assertIsNone(skipped)
+        self.assertIsNone(short)
+        names = [(name, upload is not None) for name, upload, _ in self.handler.outcomes]
+        self.assertEqual(names, [('good.txt', True), ('big.txt', False), ('short.txt', False)])
+        self.assertFalse(good.file.closed)
+
+    def test_file_cap_still_aborts(self):
+        """Test exceeding max_files fails the request even in batch mode"""
+        self.handler.max_files = 1
+        self._upload('one.txt', b'a' * 600)
+        with self.assertRaises(FileValidationError):
+            self.handler.new_file('files', 'two.txt', 'text/plain', None)
+
+class StreamingUploadViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.s3_client = FakeS3Client()
+        s3_patch = patch_s3(self.s3_client)
+        s3_patch.start()
+        self.addCleanup(s3_patch.stop)
+
+    def _post(self, body, name='notes.txt'):
+        upload = SimpleUploadedFile(name, body, content_type='text/plain')
+        return self.client.post('/api/files/', {'file': upload}, format='multipart')
+
+    def test_upload_uses_streamed_content(self):
+        """Test an upload is stored with the bytes received"""
+        body = ('plain text ' * 60).encode()
+        response = self._post(body)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(FileUpload.objects.get().content, body.decode())
+        stored = next(iter(self.s3_client.objects.values()))
+        self.assertEqual(stored['Body'], body)
+
+    def test_oversized_body_is_rejected_up_front(self):
+        """Test a body larger than the limit fails on Content-Length"""
+        response = self._post(b'x' * (1024 * 1024))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.s3_client.objects, {})
+
+    def test_invalid_encoding_is_rejected(self):
+        """Test non UTF-8 uploads return 400"""
+        response = self._post(b'\xff' * 600)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "File must be UTF-8 encoded")
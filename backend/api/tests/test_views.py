@@ -1,4 +1,6 @@
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -72,4 +74,45 @@ class FileUploadViewSetTest(TestCase):
 
         response = self.client.delete(f'{self.upload_url}{file.id}/')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(FileUpload.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+class FileListSparseFieldsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = '/api/files/'
+        test_file = TEST_FILES['VALID_TEXT']
+
+        for index in range(5):
+            FileUpload.objects.create(
+                name=f"file-{index}.txt",
+                size=test_file['size'],
+                content=test_file['content'],
+                file_type=test_file['type'],
+                s3_url=f"{S3_CONFIG['BUCKET_URL']}/file-{index}.txt"
+            )
+
+    def test_list_runs_a_single_query_without_content(self):
+        """Test listing does not refetch content row by row"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertTrue(all('content' not in f for f in response.data['data']))
+
+    def test_sparse_fieldset_limits_columns(self):
+        """Test ?fields= restricts both the payload and the selected columns"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'fields': 'id,name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['data'][0]), {'id', 'name'})
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"s3_metadata"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        """Test requesting a field outside the list representation fails"""
+        response = self.client.get(self.list_url, {'fields': 'id,content'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,161 @@
+# api/upload_handlers.py
+import codecs
+import hashlib
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .constants.file_service_constants import FileValidationConstants, ContentValidationMessages
+from .exceptions import FileValidationError
+from .metrics import observe_stage_duration
+from .services.content_validator import ContentValidator
+from .services.file_service import FileService
+
+# Room for each file part's boundary and headers on top of its bytes; the
+# Content-Disposition line alone carries a filename of up to 255 characters,
+# which can take four bytes each once UTF-8 or percent encoded
+MULTIPART_PART_OVERHEAD_BYTES = 2 * 1024
+# Room for the closing boundary and ordinary form fields
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+class ValidatedUploadedFile(UploadedFile):
+    """
+    An upload that was decoded, hashed and scanned while it streamed in.
+    FileService reuses `validated_text` instead of reading the file again.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, content_type_extra,
+                 validated_text, sha256):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.validated_text = validated_text
+        self.sha256 = sha256
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    Validates text uploads chunk by chunk as Django reads the request body.
+
+    Type and extension are checked from the part headers, then every chunk
+    is counted, hashed, incrementally UTF-8 decoded and fed to the content
+    scanner. The first violation raises FileValidationError, which stops
+    parsing so the rest of an oversized or malicious body is never buffered.
+
+    With abort_on_error=False (batch uploads) a violation only skips the
+    offending file and parsing carries on with the next one. Every file is
+    recorded in `outcomes`, in request order, as (name, upload, error).
+    """
+
+    def __init__(self, request=None, max_files=1, abort_on_error=True):
+        super().__init__(request)
+        self.max_files = max_files
+        self.max_size = FileValidationConstants.MAX_SIZE_BYTES
+        self.abort_on_error = abort_on_error
+        self.file_count = 0
+        self.outcomes = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Reject bodies that cannot possibly fit before reading any of them
+        limit = self.max_files * (self.max_size + MULTIPART_PART_OVERHEAD_BYTES) + MULTIPART_OVERHEAD_BYTES
+        if content_length and content_length > limit:
+            raise FileValidationError(ContentValidationMessages.INVALID_SIZE)
+        return None
+
+    def _reject(self, error: FileValidationError) -> None:
+        """Aborts the request, or records the error and skips this file."""
+        if self.abort_on_error:
+            raise error
+        self.outcomes.append((self.file_name, None, error))
+        raise SkipFile()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file_count += 1
+        if self.file_count > self.max_files:
+            # Too many files always ends the request, batch or not
+            raise FileValidationError(f"At most {self.max_files} files per request")
+
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.scan = ContentValidator.SCANNER.session()
+        # Summed over the chunks and recorded once the file is complete
+        self.scan_seconds = 0.0
+        # Opened before validating: a skipped file's handle is what the
+        # parser closes, never the previous file already handed out
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            dir=settings.FILE_UPLOAD_TEMP_DIR
+        )
+        try:
+            FileService.validate_file_metadata(self.file_name, self.content_type)
+        except FileValidationError as e:
+            self._reject(e)
+
+    def _decode(self, raw_data: bytes, final: bool = False) -> str:
+        try:
+            return self.decoder.decode(raw_data, final)
+        except UnicodeDecodeError:
+            raise FileValidationError(ContentValidationMessages.INVALID_ENCODING)
+
+    def _feed(self, text: str) -> None:
+        start = time.perf_counter()
+        result = self.scan.feed(text) if text else None
+        self.scan_seconds += time.perf_counter() - start
+        if result is not None:
+            ContentValidator.reject(result)
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.size += len(raw_data)
+            if self.size > self.max_size:
+                raise FileValidationError(ContentValidationMessages.INVALID_SIZE)
+            self._feed(self._decode(raw_data))
+        except FileValidationError as e:
+            self._reject(e)
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        # The chunk is fully handled here; later handlers never see it
+        return None
+
+    def _finish_file(self) -> None:
+        self._feed(self._decode(b'', final=True))
+        start = time.perf_counter()
+        result = self.scan.finish()
+        self.scan_seconds += time.perf_counter() - start
+        observe_stage_duration('content_scan', self.scan_seconds)
+        if result is not None:
+            ContentValidator.reject(result)
+
+        if self.size < FileValidationConstants.MIN_SIZE_BYTES:
+            raise FileValidationError(ContentValidationMessages.INVALID_SIZE)
+
+    def file_complete(self, file_size):
+        try:
+            self._finish_file()
+        except FileValidationError as e:
+            if self.abort_on_error:
+                raise
+            # The parser does not catch SkipFile here; returning None
+            # simply leaves the file out of request.FILES
+            self.file.close()
+            self.outcomes.append((self.file_name, None, e))
+            return None
+
+        self.file.seek(0)
+        upload = ValidatedUploadedFile(
+            file=self.file,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+            validated_text=self.scan.content,
+            sha256=self.digest.hexdigest()
+        )
+        self.outcomes.append((self.file_name, upload, None))
+        return upload
@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import FileUploadViewSet
+from .async_views import AsyncFileListView, AsyncFileDetailView
 
 router = DefaultRouter()
 router.register(r'files', FileUploadViewSet)
 
 urlpatterns = [
+    # Native async endpoints; they only pay off when served by an ASGI server
+    path('async/files/', AsyncFileListView.as_view(), name='async-file-list'),
+    path('async/files/<int:pk>/', AsyncFileDetailView.as_view(), name='async-file-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
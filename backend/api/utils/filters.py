@@ -0,0 +1,103 @@
+# api/utils/filters.py
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..exceptions import QueryParameterError
+
+
+def _parse_text(value, name):
+    if not isinstance(value, str) or not value:
+        raise QueryParameterError(f"{name} must be a non-empty string")
+    return value
+
+
+def _parse_float(value, name):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise QueryParameterError(f"{name} must be a number")
+
+
+def _parse_datetime(value, name):
+    try:
+        parsed = parse_datetime(str(value))
+        if parsed is None:
+            day = parse_date(str(value))
+            if day is not None:
+                parsed = datetime.combine(day, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise QueryParameterError(f"{name} must be an ISO 8601 date or datetime")
+    # Dates and naive datetimes are in TIME_ZONE
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _prefix_lookups(prefix):
+    """
+    Name prefix match as a range on the name index: 'abc' is
+    'abc' <= name < 'abd'. LIKE 'abc%' alone cannot use a B-tree index on
+    SQLite or on PostgreSQL outside the C collation. startswith keeps the
+    match exact under collations that order differently.
+    """
+    lookups = {'name__gte': prefix, 'name__startswith': prefix}
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates are not valid characters on their own
+        following = 0xE000
+    if following <= 0x10FFFF:
+        lookups['name__lt'] = prefix[:-1] + chr(following)
+    return lookups
+
+
+class FileFilter:
+    """
+    Filters FileUpload rows from a flat {param: value} mapping, e.g. the
+    query string or a JSON request body. Unknown parameters are rejected
+    rather than silently ignored, since a typo in a bulk delete filter
+    would otherwise widen it.
+
+    Each entry maps a parameter to (ORM lookup, value parser); the lookup
+    may also be a function building several lookups from the value.
+    """
+    filters = {
+        'name': ('name__icontains', _parse_text),
+        'name_prefix': (_prefix_lookups, _parse_text),
+        'file_type': ('file_type', _parse_text),
+        'min_size': ('size__gte', _parse_float),
+        'max_size': ('size__lte', _parse_float),
+        'uploaded_after': ('uploaded_at__gte', _parse_datetime),
+        'uploaded_before': ('uploaded_at__lt', _parse_datetime),
+    }
+
+    def __init__(self, params):
+        self.params = params or {}
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        """Filters on the known parameters of a query string, ignoring the rest."""
+        return cls({name: query_params[name] for name in cls.filters if name in query_params})
+
+    def get_lookups(self):
+        """Returns the ORM lookups for the given parameters."""
+        if not hasattr(self.params, 'items'):
+            raise QueryParameterError("filter must be an object")
+
+        unknown = [name for name in self.params if name not in self.filters]
+        if unknown:
+            raise QueryParameterError(f"Unknown filters: {', '.join(unknown)}")
+
+        lookups = {}
+        for name, value in self.params.items():
+            lookup, parse = self.filters[name]
+            value = parse(value, name)
+            if callable(lookup):
+                lookups.update(lookup(value))
+            else:
+                lookups[lookup] = value
+        return lookups
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(**self.get_lookups())
@@ -0,0 +1,171 @@
+# api/utils/pagination.py
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination
+
+from ..exceptions import PaginationError
+
+
+def _parse_key(field, value):
+    """Reads a cursor's sort key back into the field's Python type."""
+    if field == 'uploaded_at':
+        return parse_datetime(value) if isinstance(value, str) else None
+    if field == 'name':
+        return value if isinstance(value, str) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over (<sort field>, id), newest first by
+    default. ?ordering= picks another sort field or direction.
+
+    Pages are selected with a range condition on the sort field's index
+    rather than an OFFSET, so a page deep in the table costs the same as
+    the first one. Cursors are opaque base64 tokens, valid only for the
+    ordering they were issued under.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    # Each has a composite index on FileUpload
+    orderings = ('-uploaded_at', 'uploaded_at', 'name', '-name', 'size', '-size')
+    default_ordering = '-uploaded_at'
+
+    def __init__(self):
+        self.ordering = self.default_ordering
+        self.page_size = settings.FILE_LIST_PAGE_SIZE
+        self.max_page_size = settings.FILE_LIST_MAX_PAGE_SIZE
+        self._cursor = None
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def get_page_size(self, request) -> int:
+        """Reads the requested page size, capped at the configured maximum."""
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            page_size = int(raw)
+        except ValueError:
+            raise PaginationError("page_size must be an integer")
+        if page_size < 1:
+            raise PaginationError("page_size must be at least 1")
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request) -> str:
+        """Reads the requested ordering, such as 'name' or '-size'."""
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            raise PaginationError(f"ordering must be one of: {', '.join(self.orderings)}")
+        return ordering
+
+    @property
+    def key_field(self) -> str:
+        """The sort field of the current ordering."""
+        return self.ordering.lstrip('-')
+
+    def encode_cursor(self, instance, direction: str) -> str:
+        """
+        Builds an opaque cursor pointing just past the given row, a model
+        instance or a .values() dict.
+        """
+        if isinstance(instance, dict):
+            key, pk = instance[self.key_field], instance['id']
+        else:
+            key, pk = getattr(instance, self.key_field), instance.pk
+        payload = {
+            'k': key.isoformat() if hasattr(key, 'isoformat') else key,
+            'i': pk,
+            'd': direction,
+            'o': self.ordering
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Decodes a cursor produced by encode_cursor."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            # Cursors issued before ?ordering= existed carry no ordering
+            ordering = payload.get('o', self.default_ordering)
+            if ordering != self.ordering:
+                raise PaginationError("Cursor does not match the ordering")
+            key = _parse_key(self.key_field, payload['k'])
+            pk = int(payload['i'])
+            direction = payload['d']
+        except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+            raise PaginationError("Invalid cursor")
+        if key is None or direction not in ('next', 'prev'):
+            raise PaginationError("Invalid cursor")
+        return key, pk, direction
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Narrows the queryset to the requested page, plus one extra row that
+        tells whether another page exists. Pass the rows to build_page.
+        """
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        backwards = cursor is not None and cursor[2] == 'prev'
+        # Walking a descending ordering backwards reads ascending, and vice versa
+        descending = self.ordering.startswith('-') != backwards
+
+        if cursor is not None:
+            key, pk = cursor[0], cursor[1]
+            op = 'lt' if descending else 'gt'
+            seek = Q(**{f'{self.key_field}__{op}': key}) | Q(**{self.key_field: key, f'pk__{op}': pk})
+            queryset = queryset.filter(seek)
+
+        if descending:
+            queryset = queryset.order_by(f'-{self.key_field}', '-pk')
+        else:
+            queryset = queryset.order_by(self.key_field, 'pk')
+
+        self.page_size = page_size
+        self._cursor = cursor
+        return queryset[:page_size + 1]
+
+    def build_page(self, rows):
+        """Trims the rows fetched from get_page_queryset and sets the cursors."""
+        cursor, page_size = self._cursor, self.page_size
+        backwards = cursor is not None and cursor[2] == 'prev'
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = self.encode_cursor(rows[-1], 'next') if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], 'prev') if rows and has_previous else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Async version of paginate_queryset, fetching with async iteration."""
+        page = self.get_page_queryset(queryset, request)
+        return self.build_page([row async for row in page])
+
+    def get_pagination_data(self) -> dict:
+        """Pagination block for the create_api_response envelope."""
+        return {
+            'next': self.next_cursor,
+            'previous': self.previous_cursor,
+            'page_size': self.page_size
+        }
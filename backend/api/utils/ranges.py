@@ -0,0 +1,61 @@
+# api/utils/ranges.py
+import re
+from typing import Optional, Tuple
+
+from django.utils.http import http_date
+
+from ..exceptions import RangeNotSatisfiableError
+
+_BYTE_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def parse_byte_range(header: Optional[str]) -> Optional[str]:
+    """
+    Normalizes a Range header to a single 'bytes=first-last' range.
+
+    Returns None when there is no usable range: no header, a syntax error
+    or several ranges. RFC 9110 lets a server ignore such headers and send
+    the whole representation, which is simpler than multipart/byteranges.
+    """
+    match = _BYTE_RANGE.fullmatch((header or '').replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if first and last and int(first) > int(last):
+        return None
+    return f"bytes={first}-{last}"
+
+
+def if_range_matches(header: Optional[str], etag: Optional[str], last_modified: Optional[int]) -> bool:
+    """
+    Whether a Range request may be honoured given its If-Range header:
+    it must name the current strong ETag or exact Last-Modified date.
+    """
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith('W/'):
+        # Weak validators never satisfy If-Range
+        return etag is not None and header == etag
+    return last_modified is not None and header == http_date(last_modified)
+
+
+def resolve_byte_range(byte_range: str, size: int) -> Tuple[int, int]:
+    """
+    Resolves a range from parse_byte_range against an object size, the way
+    S3 does. Returns the first and last byte offsets, both inclusive.
+    Raises:
+        RangeNotSatisfiableError: If the range starts past the end
+    """
+    first, last = _BYTE_RANGE.fullmatch(byte_range).groups()
+    if not first:
+        # 'bytes=-N' is the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiableError("Requested range not satisfiable", size=size)
+    return start, end
@@ -1,26 +1,46 @@
 # api/utils/response.py
+from django.http import HttpResponse
 from rest_framework.response import Response
 from datetime import datetime
 
-def create_api_response(data=None, error=None, status=200, message=None):
+from ..renderers import dumps
+
+def build_response_body(data=None, error=None, message=None, pagination=None):
+    """Builds the standardized response envelope shared by every endpoint."""
+    response_data = {
+        'success': error is None,
+        'timestamp': datetime.now().isoformat(),
+        'data': data or {},
+        'error': error,
+        'message': message
+    }
+    if pagination is not None:
+        response_data['pagination'] = pagination
+    return response_data
+
+def create_api_response(data=None, error=None, status=200, message=None, pagination=None):
     """
     Creates a standardized API response.
-    
+
     Args:
         data: The data to return (default: None)
         error: Error message if any (default: None)
         status: HTTP status code (default: 200)
         message: Optional success message (default: None)
-    
+        pagination: Cursor block for paginated lists (default: None)
+
     Returns:
         Response: DRF Response object with standardized format
     """
-    response_data = {
-        'success': error is None,
-        'timestamp': datetime.now().isoformat(),
-        'data': data or {},
-        'error': error,
-        'message': message
-    }
-    
-    return Response(response_data, status=status)
\ No newline at end of file
+    return Response(build_response_body(data, error, message, pagination), status=status)
+
+def create_json_response(data=None, error=None, status=200, message=None, pagination=None):
+    """
+    Same envelope as create_api_response, as a plain Django response for
+    the async views, which run outside DRF. Rendered like ORJSONRenderer.
+    """
+    return HttpResponse(
+        dumps(build_response_body(data, error, message, pagination)),
+        content_type='application/json',
+        status=status
+    )
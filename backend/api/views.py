@@ -1,12 +1,27 @@
 # api/views.py
+from calendar import timegm
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
 from rest_framework import viewsets, status
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.response import Response
 import logging
 
 from .models import FileUpload
-from .serializers import FileUploadSerializer
+from .serializers import FileUploadSerializer, FileUploadListSerializer
 from .services.file_service import FileService
-from .exceptions import FileValidationError, StorageError
+from .services.response_cache import ResponseCache, compute_etag
+from .services.outbox import deletion_status
+from .services.search import parse_terms
+from .services.stats import get_stats
+from .exceptions import FileValidationError, StorageError, QueryParameterError, RangeNotSatisfiableError
+from .upload_handlers import ValidatingUploadHandler
+from .utils.filters import FileFilter
+from .utils.pagination import KeysetPagination
+from .utils.ranges import parse_byte_range, if_range_matches
 from .utils.response import create_api_response
 
 logger = logging.getLogger(__name__)
@@ -15,14 +30,47 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     """
     ViewSet for handling file uploads, storage, and management.
     """
-    queryset = FileUpload.objects.all()
+    # Pending rows are mid-flight and never exposed
+    queryset = FileUpload.objects.committed()
     serializer_class = FileUploadSerializer
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = KeysetPagination
+    # Actions whose uploads are validated while the body streams in
+    streaming_upload_actions = ('create', 'batch')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.file_service = FileService()
 
+    def get_upload_handler(self, request):
+        """Batch uploads skip invalid files instead of failing the request"""
+        if self.action == 'batch':
+            return ValidatingUploadHandler(
+                request,
+                max_files=settings.FILE_BATCH_MAX_FILES,
+                abort_on_error=False
+            )
+        return ValidatingUploadHandler(request)
+
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action in self.streaming_upload_actions:
+            self.upload_handler = self.get_upload_handler(request._request)
+            request._request.upload_handlers = [self.upload_handler]
+        return request
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'search'):
+            return FileUploadListSerializer
+        return super().get_serializer_class()
+
+    def _get_requested_fields(self):
+        """
+        Parses the sparse fieldset from ?fields=a,b,c.
+        Returns None when every list field is wanted.
+        """
+        return FileUploadListSerializer.parse_fields(self.request.query_params.get('fields'))
+
     def create(self, request, *args, **kwargs):
         """Handle file upload"""
         try:
@@ -58,14 +106,63 @@ class FileUploadViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _conditional_response(self, etag, build_response):
+        """
+        Answers 304 when the client already holds this ETag, otherwise
+        the response from build_response(). Either way the client is told
+        to revalidate before reusing its copy.
+        """
+        if ResponseCache.matches(self.request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = build_response()
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     def list(self, request, *args, **kwargs):
-        """List all files"""
+        """
+        List files, one keyset page at a time, filtered and sorted in the
+        database; pages are cached per collection version
+        """
         try:
-            queryset = self.get_queryset().defer('content')
-            serializer = self.get_serializer(queryset, many=True)
+            fields = self._get_requested_fields()
+            response_cache = ResponseCache('list')
+            key = response_cache.key(*sorted(request.query_params.lists()))
+            entry = response_cache.get(key)
+            if entry is None:
+                columns = FileUploadListSerializer.ordered_fields(fields)
+                key_field = self.paginator.get_ordering(request).lstrip('-')
+                # Plain .values() rows: no model instances, no per-field
+                # serializer calls. The paginator's ordering/seek columns
+                # and the ETag inputs are always read.
+                queryset = FileFilter.from_query_params(request.query_params).filter_queryset(
+                    self.get_queryset()
+                ).values(
+                    *dict.fromkeys([*columns, 'id', key_field, 's3_etag', 'last_modified'])
+                )
+                page = self.paginate_queryset(queryset)
+                payload = {
+                    'data': FileUploadListSerializer.from_values(page, fields),
+                    'pagination': self.paginator.get_pagination_data()
+                }
+                etag = compute_etag(
+                    response_cache.version,
+                    [(row['id'], row['s3_etag'], row['last_modified']) for row in page]
+                )
+                response_cache.set(key, etag, payload)
+            else:
+                etag, payload = entry
+
+            return self._conditional_response(etag, lambda: create_api_response(
+                data=payload['data'],
+                message="Files retrieved successfully",
+                pagination=payload['pagination']
+            ))
+        except QueryParameterError as e:
             return create_api_response(
-                data=serializer.data,
-                message="Files retrieved successfully"
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
@@ -74,6 +171,375 @@ class FileUploadViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve one file; the serialized file is cached per collection version"""
+        response_cache = ResponseCache('detail')
+        key = response_cache.key(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        entry = response_cache.get(key)
+        if entry is None:
+            instance = self.get_object()
+            data = dict(self.get_serializer(instance).data)
+            etag = compute_etag(
+                response_cache.version,
+                [(instance.id, instance.s3_etag, instance.last_modified)]
+            )
+            response_cache.set(key, etag, data)
+        else:
+            etag, data = entry
+        return self._conditional_response(etag, lambda: Response(data))
+
+    def _get_download_mode(self) -> str:
+        mode = self.request.query_params.get('mode', settings.FILE_DOWNLOAD_MODE)
+        if mode not in ('redirect', 'stream'):
+            raise QueryParameterError("mode must be 'redirect' or 'stream'")
+        return mode
+
+    def _stream_download(self, file_upload, etag, last_modified):
+        """Relays the object, or the requested byte range, chunk by chunk"""
+        byte_range = parse_byte_range(self.request.META.get('HTTP_RANGE'))
+        if byte_range and not if_range_matches(self.request.META.get('HTTP_IF_RANGE'), etag, last_modified):
+            byte_range = None
+        chunks, metadata = self.file_service.open_download(file_upload, byte_range)
+
+        local_file = getattr(chunks, 'file', None)
+        if local_file is not None and not metadata['content_range']:
+            # A whole file on local disk: the server can sendfile() it
+            response = FileResponse(local_file, content_type=file_upload.file_type)
+        else:
+            response = StreamingHttpResponse(
+                chunks,
+                status=status.HTTP_206_PARTIAL_CONTENT if metadata['content_range'] else status.HTTP_200_OK,
+                content_type=file_upload.file_type
+            )
+        response['Content-Length'] = str(metadata['length'])
+        if metadata['content_range']:
+            response['Content-Range'] = metadata['content_range']
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = content_disposition_header(True, file_upload.name)
+        return response
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download a file: a redirect to a presigned S3 URL, or the bytes streamed through"""
+        file_upload = self.get_object()
+        try:
+            mode = self._get_download_mode()
+            etag = f'"{file_upload.s3_etag}"' if file_upload.s3_etag else None
+            last_modified = timegm(file_upload.last_modified.utctimetuple())
+
+            # 304 for a copy the client already holds, 412 for failed preconditions
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                # Objects already on this host are served from here
+                if mode == 'redirect' and not self.file_service.is_stored_locally(file_upload):
+                    response = HttpResponseRedirect(self.file_service.presign_download(file_upload))
+                    # The URL expires; never reuse the redirect
+                    patch_cache_control(response, private=True, no_store=True)
+                    return response
+                response = self._stream_download(file_upload, etag, last_modified)
+
+            if etag:
+                response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        except RangeNotSatisfiableError as e:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            if e.size is not None:
+                response['Content-Range'] = f"bytes */{e.size}"
+            return response
+        except QueryParameterError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except StorageError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Error downloading file: {str(e)}")
+            return create_api_response(
+                error="Failed to download file",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _get_page_number(self) -> int:
+        raw = self.request.query_params.get('page', 1)
+        try:
+            page = int(raw)
+        except ValueError:
+            raise QueryParameterError("page must be an integer")
+        if page < 1:
+            raise QueryParameterError("page must be at least 1")
+        return page
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search over file names and content"""
+        try:
+            terms = parse_terms(request.query_params.get('q'))
+            if not terms:
+                raise QueryParameterError("Search query is required")
+
+            page = self._get_page_number()
+            page_size = self.paginator.get_page_size(request)
+            # Fetch one extra hit to learn whether another page exists
+            results = self.file_service.search_files(
+                terms, page_size + 1, (page - 1) * page_size
+            )
+            has_next = len(results) > page_size
+
+            data = []
+            for file_upload, score, snippet in results[:page_size]:
+                item = self.get_serializer(file_upload).data
+                item['score'] = score
+                item['snippet'] = snippet
+                data.append(item)
+
+            return create_api_response(
+                data=data,
+                message="Search completed successfully",
+                pagination={
+                    'page': page,
+                    'page_size': page_size,
+                    'next': page + 1 if has_next else None,
+                    'previous': page - 1 if page > 1 else None
+                }
+            )
+        except QueryParameterError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error searching files: {str(e)}")
+            return create_api_response(
+                error="Failed to search files",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """File count and bytes overall, by type and by upload day"""
+        try:
+            return create_api_response(
+                data=get_stats(),
+                message="Stats retrieved successfully"
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving stats: {str(e)}")
+            return create_api_response(
+                error="Failed to retrieve stats",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _batch_item(self, index, name, file_upload, error):
+        if error is None:
+            return {
+                'index': index,
+                'name': name,
+                'status': 'created',
+                'file': self.get_serializer(file_upload).data
+            }
+        if isinstance(error, (FileValidationError, StorageError)):
+            message = str(error)
+        else:
+            message = "An unexpected error occurred"
+        return {'index': index, 'name': name, 'status': 'failed', 'error': message}
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Upload many files in one request, reporting each file separately"""
+        try:
+            # Reading FILES runs the upload handler over the whole body
+            request.FILES
+            outcomes = self.upload_handler.outcomes
+            if not outcomes:
+                return create_api_response(
+                    error="No files provided",
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            uploads = [upload for _, upload, _ in outcomes if upload]
+            stored = iter(self.file_service.create_files(uploads))
+            results = []
+            for index, (name, upload, error) in enumerate(outcomes):
+                file_upload = None
+                if upload:
+                    file_upload, error = next(stored)
+                results.append(self._batch_item(index, name, file_upload, error))
+
+            created = sum(1 for item in results if item['status'] == 'created')
+            return create_api_response(
+                data=results,
+                message=f"{created} of {len(results)} files uploaded",
+                status=status.HTTP_201_CREATED if created == len(results)
+                else status.HTTP_207_MULTI_STATUS
+            )
+
+        except FileValidationError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except StorageError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during batch upload: {str(e)}")
+            return create_api_response(
+                error="An unexpected error occurred",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def presign(self, request):
+        """Hand out a presigned POST for uploading straight to S3"""
+        try:
+            upload = self.file_service.create_presigned_upload(
+                request.data.get('name', ''),
+                request.data.get('content_type', '')
+            )
+            return create_api_response(
+                data=upload,
+                message="Direct upload prepared",
+                status=status.HTTP_201_CREATED
+            )
+        except FileValidationError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except StorageError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error preparing direct upload: {str(e)}")
+            return create_api_response(
+                error="An unexpected error occurred",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def finalize(self, request):
+        """Validate a direct upload and record it"""
+        try:
+            file_upload = self.file_service.finalize_presigned_upload(
+                request.data.get('upload_token')
+            )
+            serializer = self.get_serializer(file_upload)
+            return create_api_response(
+                data=serializer.data,
+                message="File uploaded successfully",
+                status=status.HTTP_201_CREATED
+            )
+        except FileValidationError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except StorageError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error finalizing direct upload: {str(e)}")
+            return create_api_response(
+                error="An unexpected error occurred",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _get_bulk_delete_targets(self):
+        """
+        Reads {"ids": [...]} or {"filter": {...}} from the request body.
+        Returns (queryset, requested ids or None).
+        """
+        ids = self.request.data.get('ids')
+        filters = self.request.data.get('filter')
+        if (ids is None) == (filters is None):
+            raise QueryParameterError("Provide either ids or filter")
+
+        if ids is not None:
+            if not isinstance(ids, list) or not all(
+                isinstance(file_id, int) and not isinstance(file_id, bool) for file_id in ids
+            ):
+                raise QueryParameterError("ids must be a list of integers")
+            if len(ids) > settings.FILE_BULK_DELETE_MAX_FILES:
+                raise QueryParameterError(
+                    f"At most {settings.FILE_BULK_DELETE_MAX_FILES} ids per request"
+                )
+            return self.get_queryset().filter(pk__in=ids), ids
+
+        if not filters:
+            # An empty filter would match every file
+            raise QueryParameterError("filter must contain at least one condition")
+        return FileFilter(filters).filter_queryset(self.get_queryset()), None
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete', parser_classes=[JSONParser])
+    def bulk_delete(self, request):
+        """
+        Delete many files by id or by filter; S3 objects are removed asynchronously.
+        A filter delete removes at most FILE_BULK_DELETE_MAX_FILES files and
+        sets has_more when matches are left, so clients repeat it until false.
+        """
+        try:
+            queryset, ids = self._get_bulk_delete_targets()
+            result = self.file_service.delete_files(queryset, limit=settings.FILE_BULK_DELETE_MAX_FILES)
+            if ids is not None:
+                found = set(result['deleted'])
+                result['not_found'] = [file_id for file_id in ids if file_id not in found]
+
+            return create_api_response(
+                data=result,
+                message=f"{len(result['deleted'])} files deleted"
+            )
+        except QueryParameterError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error bulk deleting files: {str(e)}")
+            return create_api_response(
+                error="Failed to delete files",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def deletions(self, request):
+        """Status of queued S3 deletions, e.g. ?ids=1,2 from a bulk delete"""
+        try:
+            try:
+                ids = [int(entry_id) for entry_id in request.query_params.get('ids', '').split(',')]
+            except ValueError:
+                raise QueryParameterError("ids must be a comma-separated list of integers")
+            if len(ids) > settings.FILE_DELETION_STATUS_MAX_IDS:
+                raise QueryParameterError(
+                    f"At most {settings.FILE_DELETION_STATUS_MAX_IDS} ids per request"
+                )
+            return create_api_response(
+                data=deletion_status(ids),
+                message="Deletion status retrieved successfully"
+            )
+        except QueryParameterError as e:
+            return create_api_response(
+                error=str(e),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving deletion status: {str(e)}")
+            return create_api_response(
+                error="Failed to retrieve deletion status",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     def destroy(self, request, *args, **kwargs):
         """Delete file"""
         try:
@@ -37,6 +37,89 @@ AWS_STORAGE_BUCKET_NAME = os.getenv("AWS_STORAGE_BUCKET_NAME")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY= os.getenv("AWS_SECRET_ACCESS_KEY")
 
+# Shared S3 client tuning (one client per worker process)
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", 50))
+AWS_S3_CONNECT_TIMEOUT = float(os.getenv("AWS_S3_CONNECT_TIMEOUT", 5))
+AWS_S3_READ_TIMEOUT = float(os.getenv("AWS_S3_READ_TIMEOUT", 30))
+AWS_S3_MAX_ATTEMPTS = int(os.getenv("AWS_S3_MAX_ATTEMPTS", 3))
+AWS_S3_PREWARM_CLIENT = os.getenv("AWS_S3_PREWARM_CLIENT", "True") == "True"
+
+# S3 transfer policy. Uploads below the threshold go up as a single PUT,
+# larger ones in parallel parts. Keep AWS_S3_MAX_CONCURRENCY at or below
+# AWS_S3_MAX_POOL_CONNECTIONS so parts do not wait for a connection.
+AWS_S3_MULTIPART_THRESHOLD = int(os.getenv("AWS_S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+AWS_S3_MULTIPART_CHUNKSIZE = int(os.getenv("AWS_S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+AWS_S3_MAX_CONCURRENCY = int(os.getenv("AWS_S3_MAX_CONCURRENCY", 10))
+AWS_S3_USE_THREADS = os.getenv("AWS_S3_USE_THREADS", "True") == "True"
+
+# Read every upload back with HEAD and check its ETag. Off by default: the
+# write response already carries the ETag and version id.
+AWS_S3_VERIFY_UPLOADS = os.getenv("AWS_S3_VERIFY_UPLOADS", "False") == "True"
+
+# Threads that run blocking S3 calls for the async (ASGI) views. Keep it at
+# or below AWS_S3_MAX_POOL_CONNECTIONS so no call waits for a connection.
+AWS_S3_ASYNC_MAX_WORKERS = int(os.getenv("AWS_S3_ASYNC_MAX_WORKERS", 50))
+
+# Where file objects live: 's3' (the default), 'local' (files under
+# FILE_STORAGE_LOCAL_ROOT on this host) or 'memory' (per process, for tests and
+# development). A dotted path to a StorageBackend subclass also works.
+FILE_STORAGE_BACKEND = os.getenv("FILE_STORAGE_BACKEND", "s3")
+FILE_STORAGE_LOCAL_ROOT = os.getenv("FILE_STORAGE_LOCAL_ROOT", str(BASE_DIR / 'media' / 'files'))
+
+# With FILE_STORAGE_CACHE_DIR set, objects uploaded or downloaded are also kept
+# there and later downloads are served from local disk. The least recently used
+# are evicted past FILE_STORAGE_CACHE_MAX_BYTES per worker process; objects above
+# FILE_STORAGE_CACHE_MAX_OBJECT_BYTES are never cached.
+FILE_STORAGE_CACHE_DIR = os.getenv("FILE_STORAGE_CACHE_DIR", "")
+FILE_STORAGE_CACHE_MAX_BYTES = int(os.getenv("FILE_STORAGE_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+FILE_STORAGE_CACHE_MAX_OBJECT_BYTES = int(os.getenv("FILE_STORAGE_CACHE_MAX_OBJECT_BYTES", 64 * 1024 * 1024))
+
+# Lifetime in seconds of presigned direct-to-S3 upload forms
+FILE_PRESIGNED_UPLOAD_EXPIRY = int(os.getenv("FILE_PRESIGNED_UPLOAD_EXPIRY", 300))
+
+# Downloads (GET /api/files/<id>/download/): 'redirect' answers with a 302 to a
+# presigned S3 URL valid for FILE_PRESIGNED_DOWNLOAD_EXPIRY seconds, 'stream'
+# relays the object through the worker FILE_DOWNLOAD_CHUNK_SIZE bytes at a time.
+# Clients can pick either with ?mode=. Objects on local disk are always streamed.
+FILE_DOWNLOAD_MODE = os.getenv("FILE_DOWNLOAD_MODE", "redirect")
+FILE_PRESIGNED_DOWNLOAD_EXPIRY = int(os.getenv("FILE_PRESIGNED_DOWNLOAD_EXPIRY", 60))
+FILE_DOWNLOAD_CHUNK_SIZE = int(os.getenv("FILE_DOWNLOAD_CHUNK_SIZE", 64 * 1024))
+
+# Batch uploads: files accepted per request and concurrent S3 uploads per batch.
+# Django's own per-request file cap is raised to match.
+FILE_BATCH_MAX_FILES = int(os.getenv("FILE_BATCH_MAX_FILES", 100))
+FILE_BATCH_MAX_WORKERS = int(os.getenv("FILE_BATCH_MAX_WORKERS", 8))
+DATA_UPLOAD_MAX_NUMBER_FILES = FILE_BATCH_MAX_FILES
+
+# Age in seconds after which the reconciler treats pending rows and
+# unreferenced S3 objects as abandoned. Orphaned objects are never swept
+# before twice FILE_PRESIGNED_UPLOAD_EXPIRY, so unfinalized direct uploads survive.
+FILE_RECONCILE_GRACE_PERIOD = int(os.getenv("FILE_RECONCILE_GRACE_PERIOD", 3600))
+
+# Queued S3 deletes (manage.py process_deletions): failed keys are retried with
+# exponential backoff, in seconds, up to FILE_DELETE_MAX_ATTEMPTS times.
+FILE_DELETE_MAX_ATTEMPTS = int(os.getenv("FILE_DELETE_MAX_ATTEMPTS", 10))
+FILE_DELETE_RETRY_BASE_DELAY = float(os.getenv("FILE_DELETE_RETRY_BASE_DELAY", 5))
+FILE_DELETE_RETRY_MAX_DELAY = float(os.getenv("FILE_DELETE_RETRY_MAX_DELAY", 3600))
+# Outbox entries one GET /api/files/deletions/ request can look up
+FILE_DELETION_STATUS_MAX_IDS = int(os.getenv("FILE_DELETION_STATUS_MAX_IDS", 1000))
+# Files one bulk delete removes: longer id lists are rejected, filter
+# deletes stop here and report has_more, so each transaction stays short
+FILE_BULK_DELETE_MAX_FILES = int(os.getenv("FILE_BULK_DELETE_MAX_FILES", 1000))
+
+# Request profiler (api.profiling.ProfilerMiddleware), off unless enabled. It
+# profiles requests sending 'X-Profile: <PROFILER_TOKEN>' and a random
+# PROFILER_SAMPLE_RATE fraction of all others, and writes full reports to
+# PROFILER_OUTPUT_DIR when set.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False") == "True"
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0))
+PROFILER_OUTPUT_DIR = os.getenv("PROFILER_OUTPUT_DIR", "")
+
+# GET /metrics requires 'Authorization: Bearer <METRICS_TOKEN>' when set;
+# when empty it only answers scrapes from this host
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -52,7 +135,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.profiling.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -110,10 +196,51 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Concurrent writers wait for the lock instead of failing
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+            'TEST': {
+                # In memory unless set; concurrent load tests need a file
+                'NAME': os.getenv('SQLITE_TEST_NAME'),
+            },
         }
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# File responses are cached per collection version; every worker must see
+# the same version, so production needs a shared backend.
+
+if os.getenv('DJANGO_ENVIRONMENT') == 'production':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'file-loader',
+        }
+    }
+
+# Lifetime in seconds of cached list/detail responses. Writes through
+# FileService invalidate them immediately; this only bounds stale entries
+# left by writes made elsewhere, e.g. in the admin.
+FILE_CACHE_TIMEOUT = int(os.getenv("FILE_CACHE_TIMEOUT", 300))
+
+# Responses of at least this many bytes are compressed with brotli or gzip,
+# whichever the client accepts (brotli needs the Brotli package)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", 6))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", 5))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -155,7 +282,15 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# File list pagination: default page size and the hard cap a client can ask for
+FILE_LIST_PAGE_SIZE = int(os.getenv('FILE_LIST_PAGE_SIZE', 50))
+FILE_LIST_MAX_PAGE_SIZE = int(os.getenv('FILE_LIST_MAX_PAGE_SIZE', 200))
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.MultiPartParser',
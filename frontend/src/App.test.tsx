@@ -1,5 +1,5 @@
 // src/App.test.tsx
-import { screen } from '@testing-library/react';
+import { fireEvent, screen } from '@testing-library/react';
 import { render } from './test-utils';
 import App from './App';
 import { useFileManager } from './hooks/useFileManager';
@@ -26,6 +26,9 @@ describe('App Component', () => {
       files: [],
       error: "",
       loading: false,
+      hasMore: false,
+      loadingMore: false,
+      loadMore: jest.fn(),
       handleFileUpload: jest.fn().mockImplementation(async () => {}),
       deleteFile: jest.fn().mockImplementation(async () => {}),
     });
@@ -55,6 +58,9 @@ describe('App Component', () => {
       files: mockFiles,
       error: "",
       loading: false,
+      hasMore: false,
+      loadingMore: false,
+      loadMore: jest.fn(),
       handleFileUpload: jest.fn().mockImplementation(async () => {}),
       deleteFile: jest.fn().mockImplementation(async () => {}),
     });
@@ -71,6 +77,9 @@ describe('App Component', () => {
       files: [],
       error: "",
       loading: false,
+      hasMore: false,
+      loadingMore: false,
+      loadMore: jest.fn(),
       handleFileUpload: mockHandleFileUpload,
       deleteFile: jest.fn().mockImplementation(async () => {}),
     });
@@ -78,4 +87,23 @@ describe('App Component', () => {
     render(<App />);
     // Additional upload testing logic here
   });
+
+  it('loads more files on demand', async () => {
+    const mockLoadMore = jest.fn();
+
+    mockUseFileManager.mockReturnValue({
+      files: [],
+      error: "",
+      loading: false,
+      hasMore: true,
+      loadingMore: false,
+      loadMore: mockLoadMore,
+      handleFileUpload: jest.fn().mockImplementation(async () => {}),
+      deleteFile: jest.fn().mockImplementation(async () => {}),
+    });
+
+    render(<App />);
+    fireEvent.click(await screen.findByText('Load more'));
+    expect(mockLoadMore).toHaveBeenCalledTimes(1);
+  });
 });
\ No newline at end of file
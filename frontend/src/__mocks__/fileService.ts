@@ -9,14 +9,17 @@ export class FileService {
     }
   
     async getFiles() {
-      return [
-        {
-          id: 1,
-          name: 'test.txt',
-          size: '1.5',
-          uploadDate: '2024-12-21'
-        }
-      ];
+      return {
+        files: [
+          {
+            id: 1,
+            name: 'test.txt',
+            size: '1.5',
+            uploadDate: '2024-12-21'
+          }
+        ],
+        next: null
+      };
     }
   
     async deleteFile(id: number) {
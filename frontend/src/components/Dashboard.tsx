@@ -9,8 +9,16 @@ import "react-toastify/dist/ReactToastify.css";
 const Dashboard: React.FC = () => {
   const [searchQuery, setSearchQuery] = useState<string>("");
   const [dragActive, setDragActive] = useState<boolean>(false);
-  const { files, error, loading, handleFileUpload, deleteFile } =
-    useFileManager();
+  const {
+    files,
+    error,
+    loading,
+    hasMore,
+    loadingMore,
+    loadMore,
+    handleFileUpload,
+    deleteFile,
+  } = useFileManager();
 
   const filteredFiles = files.filter((file) =>
     file.name.toLowerCase().includes(searchQuery.toLowerCase())
@@ -64,6 +72,9 @@ const Dashboard: React.FC = () => {
             }
           }}
           onDelete={deleteFile}
+          hasMore={hasMore}
+          loadingMore={loadingMore}
+          onLoadMore={loadMore}
         />
       </div>
 
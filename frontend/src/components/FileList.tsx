@@ -15,6 +15,9 @@ interface FileListProps {
   onDrop: (e: React.DragEvent) => void;
   onFileSelect: (e: React.ChangeEvent<HTMLInputElement>) => void;
   onDelete?: (id: number) => void;
+  hasMore?: boolean;
+  loadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 export const FileList: React.FC<FileListProps> = ({
@@ -28,6 +31,9 @@ export const FileList: React.FC<FileListProps> = ({
   onDrop,
   onFileSelect,
   onDelete,
+  hasMore,
+  loadingMore,
+  onLoadMore,
 }) => {
   const dragCounterRef = useRef(0);
 
@@ -163,6 +169,19 @@ export const FileList: React.FC<FileListProps> = ({
             </div>
           )}
         </div>
+
+        {/* Further pages are fetched on demand */}
+        {hasMore && onLoadMore && (
+          <div className="py-4 text-center">
+            <button
+              onClick={onLoadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 text-blue-600 border border-blue-200 rounded-lg hover:bg-blue-50 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {error && <p className="text-sm text-red-500 mt-2 px-4">{error}</p>}
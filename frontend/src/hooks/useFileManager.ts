@@ -7,16 +7,19 @@ export const useFileManager = () => {
   const [files, setFiles] = useState<UploadedFile[]>([]);
   const [error, setError] = useState<string>("");
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  // Fetch files on component mount
+  // Fetch the first page of files on component mount
   useEffect(() => {
     fetchFiles();
   }, []);
 
   const fetchFiles = async () => {
     try {
-      const data = await fileService.getFiles();
-      setFiles(data);
+      const page = await fileService.getFiles();
+      setFiles(page.files);
+      setNextCursor(page.next);
     } catch (err) {
       toast.error("Failed to fetch files");
     } finally {
@@ -24,6 +27,24 @@ export const useFileManager = () => {
     }
   };
 
+  // Appends the next page, when there is one
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+
+    try {
+      setLoadingMore(true);
+      const page = await fileService.getFiles(nextCursor);
+      setFiles((prev) => [...prev, ...page.files]);
+      setNextCursor(page.next);
+    } catch (err) {
+      toast.error("Failed to fetch files");
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
   const validateFile = (file: File): FileValidationResult => {
     if (file.type !== "text/plain") {
       return {
@@ -83,6 +104,9 @@ export const useFileManager = () => {
     files,
     error,
     loading,
+    hasMore: nextCursor !== null,
+    loadingMore,
+    loadMore,
     handleFileUpload,
     deleteFile,
   };
@@ -1,7 +1,7 @@
 import axios, { AxiosError, AxiosInstance, AxiosResponse } from 'axios';
 import { API_CONFIG } from '../config/api';
 import { ValidationError, validateApiResponse, validateFileData } from '../utils/validators';
-import type { UploadedFile, ApiFile, ApiResponse, ApiError } from '../types/api';
+import type { UploadedFile, ApiFile, ApiResponse, ApiError, FilePage } from '../types/api';
 
 interface ErrorResponse {
   error?: string;
@@ -74,17 +74,21 @@ class FileService {
     }
   }
 
-  async getFiles(): Promise<UploadedFile[]> {
+  // One page of the list; pass the returned `next` cursor to get the following page
+  async getFiles(cursor?: string | null): Promise<FilePage> {
     try {
-      const response = await this.api.get<ApiResponse<ApiFile[]>>('/files/');
+      const files: UploadedFile[] = [];
+      const response: AxiosResponse<ApiResponse<ApiFile[]>> = await this.api.get('/files/', {
+        params: { fields: 'id,name,size,uploaded_at', cursor: cursor ?? undefined },
+      });
       const validatedData = validateApiResponse(response.data);
-      if ( Object.keys(validatedData).length === 0 ) {
-        return []
+      if ( Object.keys(validatedData).length > 0 ) {
+        validatedData.forEach((file) => {
+          validateFileData(file);
+          files.push(this.transformFileData(file));
+        });
       }
-      return validatedData.map((file) => {
-        validateFileData(file);
-        return this.transformFileData(file);
-      });
+      return { files, next: response.data.pagination?.next ?? null };
     } catch (error) {
       if (error instanceof ValidationError) {
         throw error;
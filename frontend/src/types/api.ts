@@ -5,6 +5,11 @@ export interface UploadedFile {
   uploadDate: string;
 }
 
+export interface FilePage {
+  files: UploadedFile[];
+  next: string | null;
+}
+
 export interface ApiFile {
   id: number;
   name: string;
@@ -18,6 +23,13 @@ export interface ApiResponse<T> {
   error: string | null;
   message: string | null;
   timestamp: string;
+  pagination?: ApiPagination;
+}
+
+export interface ApiPagination {
+  next: string | null;
+  previous: string | null;
+  page_size: number;
 }
 
 export interface ApiError {